@@ -50,21 +50,30 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
-    'cride.users',
-    'cride.circles',
-    'cride.rides',
+    'cride.users.apps.UsersAppConfig',
+    'cride.circles.apps.CirclesAppConfig',
+    'cride.rides.apps.RidesConfig',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 # Passwords
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'cride.users.hashers.PooledArgon2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
     'django.contrib.auth.hashers.BCryptPasswordHasher',
 ]
+# Argon2 costs (memory in KiB); hashes made with other costs are upgraded on login.
+ARGON2_TIME_COST = env.int('ARGON2_TIME_COST', default=2)
+ARGON2_MEMORY_COST = env.int('ARGON2_MEMORY_COST', default=19 * 1024)
+ARGON2_PARALLELISM = env.int('ARGON2_PARALLELISM', default=1)
+# Processes hashing passwords per server process, hashes running or queued
+# at once, and seconds to wait for a slot before answering 503.
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=2)
+PASSWORD_HASHING_CONCURRENCY = env.int('PASSWORD_HASHING_CONCURRENCY', default=16)
+PASSWORD_HASHING_TIMEOUT = env.float('PASSWORD_HASHING_TIMEOUT', default=5)
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -167,8 +176,19 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'cride.users.authentication.JWTAuthentication',
+        'cride.users.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 3,
 }
+
+# Access tokens
+# Lifetimes in seconds of the signed tokens returned by login and refresh.
+ACCESS_TOKEN_LIFETIME = env.int('ACCESS_TOKEN_LIFETIME', default=15 * 60)
+REFRESH_TOKEN_LIFETIME = env.int('REFRESH_TOKEN_LIFETIME', default=7 * 24 * 60 * 60)
+
+# Rides
+# Serve the plain ride feed from the ride card projection. Run
+# `manage.py rebuild_ride_cards` before turning it on.
+RIDE_FEED_FROM_CARDS = env.bool('RIDE_FEED_FROM_CARDS', default=False)
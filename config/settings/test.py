@@ -22,6 +22,7 @@ CACHES = {
 
 # Passwords
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+PASSWORD_HASHING_WORKERS = 0
 
 # Templates
 TEMPLATES[0]["OPTIONS"]["debug"] = DEBUG
@@ -39,3 +40,8 @@ TEMPLATES[0]["OPTIONS"]["loaders"] = [
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 EMAIL_HOST = "localhost"
 EMAIL_PORT = 1025
+
+# Celery
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_RESULT_BACKEND = "cache+memory://"
@@ -2,6 +2,7 @@
 
 # Django
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CirclesAppConfig(AppConfig):
@@ -9,3 +10,15 @@ class CirclesAppConfig(AppConfig):
 
     name = 'cride.circles'
     verbose_name = 'Circles'
+
+    def ready(self):
+        """Index the circle search fields and connect the membership cache signals."""
+        from cride.utils.search import TrigramIndexes
+        import cride.circles.signals  # noqa: F401
+
+        post_migrate.connect(
+            TrigramIndexes('circles.Circle', ('slug_name', 'name')),
+            sender=self,
+            weak=False,
+            dispatch_uid='circles_trigram_indexes',
+        )
@@ -0,0 +1,208 @@
+"""Circle leaderboards"""
+
+# Django
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, IntegerField
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import RideStatDelta
+
+# Utilities
+from cride.utils.leaderboards import Leaderboard
+
+__all__ = ('LEADERBOARD_FIELDS', 'CircleLeaderboards', 'leaderboards')
+
+LEADERBOARD_FIELDS = ('rides_offered', 'rides_taken')
+
+
+def scored(queryset, field):
+    """Annotate `queryset` with its stored plus pending `field` as `score`."""
+    return RideStatDelta.objects.annotate_pending(queryset).annotate(
+        score=ExpressionWrapper(F(field) + F(f'pending_{field}'), output_field=IntegerField())
+    )
+
+
+def competition_ranks(scores):
+    """Return the competition rank of each score of a descending list."""
+    ranks = []
+    for position, score in enumerate(scores):
+        ranks.append(ranks[-1] if ranks and scores[position - 1] == score else position + 1)
+    return ranks
+
+
+class CircleLeaderboards:
+    """
+    Rankings of public circles, and of the active members of each circle,
+    by rides offered and rides taken.
+
+    Scores include the ride stats not folded yet, like the API does.
+    Rankings live in Redis sorted sets updated as ride stats are recorded
+    and as circles or members enter or leave them, once the transaction
+    commits. `rebuild` recomputes them from the database. Without Redis
+    the same rankings are computed from the database on every call.
+    """
+
+    def circles(self, field):
+        """Return the ranking of public circles by `field`."""
+        return Leaderboard(f'leaderboards:circles:{field}')
+
+    def members(self, circle_id, field):
+        """Return the ranking of the members of a circle by `field`."""
+        return Leaderboard(f'leaderboards:circles:{circle_id}:members:{field}')
+
+    @property
+    def available(self):
+        """Return whether the rankings are kept in Redis."""
+        return self.circles(LEADERBOARD_FIELDS[0]).available
+
+    def record(self, delta):
+        """Add a recorded ride stats increment to the rankings."""
+        if not self.available:
+            return
+        circle = delta.circle
+
+        def apply():
+            for field in LEADERBOARD_FIELDS:
+                amount = getattr(delta, field)
+                if not amount:
+                    continue
+                if circle.is_public:
+                    self.circles(field).increment(circle.pk, amount)
+                self.members(circle.pk, field).increment(delta.membership_id, amount)
+
+        transaction.on_commit(apply)
+
+    def sync_circle(self, circle):
+        """Add a saved circle to the rankings if it's public, drop it otherwise."""
+        if not self.available:
+            return
+        scores = self.scores(Circle.objects.filter(pk=circle.pk)) if circle.is_public else {}
+
+        def apply():
+            for field in LEADERBOARD_FIELDS:
+                self.circles(field).set(circle.pk, scores.get(field, 0))
+
+        transaction.on_commit(apply)
+
+    def sync_member(self, membership):
+        """Add a saved membership to its circle rankings if it's active, drop it otherwise."""
+        if not self.available:
+            return
+        scores = self.scores(Membership.objects.filter(pk=membership.pk)) if membership.is_active else {}
+
+        def apply():
+            for field in LEADERBOARD_FIELDS:
+                self.members(membership.circle_id, field).set(membership.pk, scores.get(field, 0))
+
+        transaction.on_commit(apply)
+
+    def drop_member(self, membership):
+        """Drop a deleted membership from its circle rankings."""
+        if not self.available:
+            return
+
+        def apply():
+            for field in LEADERBOARD_FIELDS:
+                self.members(membership.circle_id, field).remove(membership.pk)
+
+        transaction.on_commit(apply)
+
+    def drop_circle(self, circle_id):
+        """Drop a deleted circle and its member rankings."""
+        if not self.available:
+            return
+
+        def apply():
+            for field in LEADERBOARD_FIELDS:
+                self.circles(field).remove(circle_id)
+                self.members(circle_id, field).replace(())
+
+        transaction.on_commit(apply)
+
+    def scores(self, queryset):
+        """Return the `{field: score}` of the single row of `queryset`."""
+        row = RideStatDelta.objects.annotate_pending(queryset).values(
+            *LEADERBOARD_FIELDS, *(f'pending_{field}' for field in LEADERBOARD_FIELDS)
+        ).first()
+        if row is None:
+            return {}
+        return {field: row[field] + row[f'pending_{field}'] for field in LEADERBOARD_FIELDS}
+
+    def top_circles(self, field, count):
+        """Return the `(circle, score, rank)` of the best ranked public circles."""
+        if self.available:
+            ranking = self.circles(field).top(count)
+            circles = Circle.objects.in_bulk([pk for pk, _, _ in ranking])
+            return [(circles[pk], score, rank) for pk, score, rank in ranking if pk in circles]
+
+        circles = list(scored(Circle.objects.filter(is_public=True), field).filter(
+            score__gt=0
+        ).order_by('-score', 'pk')[:count])
+        ranks = competition_ranks([circle.score for circle in circles])
+        return [(circle, circle.score, rank) for circle, rank in zip(circles, ranks)]
+
+    def circle_rank(self, circle, field):
+        """Return the `(score, rank)` of a circle, ranked None unless it's public."""
+        if not circle.is_public:
+            return self.scores(Circle.objects.filter(pk=circle.pk)).get(field, 0), None
+        if self.available:
+            return self.circles(field).rank(circle.pk)
+        return self.rank_in(scored(Circle.objects.filter(is_public=True), field), circle.pk)
+
+    def top_members(self, circle, field, count):
+        """Return the `(membership, score, rank)` of the best ranked members of a circle."""
+        if self.available:
+            ranking = self.members(circle.pk, field).top(count)
+            members = Membership.objects.select_related('user').filter(is_active=True).in_bulk(
+                [pk for pk, _, _ in ranking]
+            )
+            return [(members[pk], score, rank) for pk, score, rank in ranking if pk in members]
+
+        members = list(scored(Membership.objects.filter(circle=circle, is_active=True), field).filter(
+            score__gt=0
+        ).select_related('user').order_by('-score', 'pk')[:count])
+        ranks = competition_ranks([member.score for member in members])
+        return [(member, member.score, rank) for member, rank in zip(members, ranks)]
+
+    def member_rank(self, circle, membership_id, field):
+        """Return the `(score, rank)` of a member in its circle."""
+        if self.available:
+            return self.members(circle.pk, field).rank(membership_id)
+        return self.rank_in(scored(Membership.objects.filter(circle=circle, is_active=True), field), membership_id)
+
+    @staticmethod
+    def rank_in(queryset, pk):
+        """Return the `(score, rank)` of row `pk` among the scored `queryset`."""
+        score = queryset.filter(pk=pk).values_list('score', flat=True).first() or 0
+        return score, queryset.filter(score__gt=score).count() + 1
+
+    def rebuild(self, batch_size=1000):
+        """
+        Recompute every ranking from the database.
+
+        Return the number of circles whose members were ranked. Does
+        nothing without Redis.
+        """
+        if not self.available:
+            return 0
+
+        for field in LEADERBOARD_FIELDS:
+            self.circles(field).replace(
+                scored(Circle.objects.filter(is_public=True), field).values_list('pk', 'score').iterator(batch_size),
+                batch_size=batch_size
+            )
+
+        circles = 0
+        for circle in Circle.objects.values_list('pk', flat=True).iterator(batch_size):
+            members = Membership.objects.filter(circle=circle, is_active=True)
+            for field in LEADERBOARD_FIELDS:
+                self.members(circle, field).replace(
+                    scored(members, field).values_list('pk', 'score').iterator(batch_size),
+                    batch_size=batch_size
+                )
+            circles += 1
+        return circles
+
+
+leaderboards = CircleLeaderboards()
@@ -0,0 +1,87 @@
+"""Circle payload benchmark"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Django REST Framework
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import Profile, User
+
+# Views
+from cride.circles.views import CircleViewSet, MembershipViewSet
+
+# Utilities
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    """
+    Measure the payload size and latency of a large circle and its member
+    list with the default, expanded and sparse fieldsets.
+
+    Every row is created inside a transaction that is rolled back at the end,
+    so the benchmark can be run against any database.
+    """
+
+    help = 'Benchmark sparse fieldsets on a large circle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=3000)
+        parser.add_argument('--requests', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            circle = Circle.objects.create(name='Benchmark', slug_name='benchmark-payload', about='Benchmark')
+            user = self.seed(circle, options['members'])
+            self.factory = APIRequestFactory()
+            self.user = user
+
+            circle_view = CircleViewSet.as_view({'get': 'retrieve'})
+            members_view = MembershipViewSet.as_view({'get': 'list'})
+            cases = (
+                ('circle, members expanded', circle_view, {'expand': 'members'}),
+                ('circle, default', circle_view, {}),
+                ('circle, fields=slug_name,members_count', circle_view, {'fields': 'slug_name,members_count'}),
+                ('member list, default', members_view, {'limit': options['members']}),
+                ('member list, fields=user.username,is_admin', members_view,
+                 {'limit': options['members'], 'fields': 'user.username,is_admin'}),
+            )
+            for label, view, params in cases:
+                self.report(label, view, params, circle.slug_name, options['requests'])
+            transaction.set_rollback(True)
+
+    def seed(self, circle, members):
+        """Create `members` users with their profiles and memberships."""
+        User.objects.bulk_create([
+            User(username=f'benchmark{i}', email=f'benchmark{i}@comparteride.com') for i in range(members)
+        ])
+        users = list(User.objects.filter(username__startswith='benchmark').order_by('pk'))
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        profiles = {profile.user_id: profile for profile in Profile.objects.filter(user__in=users)}
+        Membership.objects.bulk_create([
+            Membership(user=user, profile=profiles[user.pk], circle=circle) for user in users
+        ])
+        Circle.objects.filter(pk=circle.pk).update(members_count=members)
+        return users[0]
+
+    def report(self, label, view, params, slug_name, requests):
+        """Time `requests` requests and print the payload size and latency."""
+        timings = []
+        for _ in range(requests):
+            request = self.factory.get('/', params)
+            force_authenticate(request, self.user)
+            start = time.perf_counter()
+            response = view(request, slug_name=slug_name)
+            response.render()
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+        timings.sort()
+        self.stdout.write(
+            f'{label}: {len(response.content) / 1024:.1f} KiB, '
+            f'p50 {statistics.median(timings):.1f} ms, p99 {timings[int(len(timings) * 0.99) - 1]:.1f} ms'
+        )
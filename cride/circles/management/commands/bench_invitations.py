@@ -0,0 +1,59 @@
+"""Invitation issuing benchmark"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+# Models
+from cride.circles.models import Circle, Invitation
+from cride.users.models import User
+
+# Utilities
+import time
+
+
+class Command(BaseCommand):
+    """
+    Compare issuing invitations one by one with `bulk_issue`.
+
+    Every row is created inside a transaction that is rolled back at the end,
+    so the benchmark can be run against any database.
+    """
+
+    help = 'Benchmark issuing many invitation codes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codes', type=int, default=10_000)
+        parser.add_argument('--existing', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark', email='benchmark@comparteride.com')
+            circle = Circle.objects.create(name='Benchmark', slug_name='benchmark-invitations', about='Benchmark')
+            Invitation.objects.bulk_issue(circle, user, options['existing'])
+            self.stdout.write(f'Seeded {options["existing"]} invitations')
+
+            def one_by_one():
+                for _ in range(options['codes']):
+                    Invitation.objects.create(circle=circle, issued_by=user)
+
+            def bulk():
+                Invitation.objects.bulk_issue(circle, user, options['codes'])
+
+            self.report('create() loop', one_by_one, options['codes'])
+            self.report('bulk_issue()', bulk, options['codes'])
+            transaction.set_rollback(True)
+
+    def report(self, label, issue, codes):
+        """Issue the codes and print the time and queries taken."""
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            issue()
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label}: {codes} codes in {elapsed * 1000:.0f} ms, {len(queries)} queries')
@@ -0,0 +1,80 @@
+"""Invitation breakdown benchmark"""
+
+# Django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Django REST Framework
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Models
+from cride.circles.models import Circle, Invitation, Membership
+from cride.users.models import Profile, User
+
+# Views
+from cride.circles.views import MembershipViewSet
+
+# Utilities
+import statistics
+import time
+
+
+class Command(BaseCommand):
+    """
+    Compare the invitation breakdown computed on every request with the cached one.
+
+    Every row is created inside a transaction that is rolled back at the end,
+    so the benchmark can be run against any database.
+    """
+
+    help = 'Benchmark the member invitations endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invited', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            circle = Circle.objects.create(name='Benchmark', slug_name='benchmark-breakdown', about='Benchmark')
+            issuer = self.member(circle, 'benchmark', remaining_invitations=options['invited'] + 10)
+            for i in range(options['invited']):
+                self.member(circle, f'benchmark{i}', invited_by=issuer.user)
+            Invitation.objects.issue_missing(circle, issuer.user, 10)
+
+            view = MembershipViewSet.as_view({'get': 'invitations'})
+            factory = APIRequestFactory()
+
+            def fetch():
+                request = factory.get('/')
+                force_authenticate(request, user=issuer.user)
+                response = view(request, slug_name=circle.slug_name, pk=issuer.user.username)
+                response.render()
+
+            def uncached():
+                cache.delete(Invitation.objects.breakdown_key(circle.pk, issuer.user_id))
+                fetch()
+
+            fetch()
+            self.report('uncached', uncached, options['requests'])
+            self.report('cached', fetch, options['requests'])
+            transaction.set_rollback(True)
+
+    def member(self, circle, username, **fields):
+        """Create a user, its profile and its membership."""
+        user = User.objects.create(username=username, email=f'{username}@comparteride.com')
+        profile = Profile.objects.create(user=user)
+        return Membership.objects.create(user=user, profile=profile, circle=circle, **fields)
+
+    def report(self, label, fetch, requests):
+        """Time `requests` calls to `fetch` and print the latency percentiles."""
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{label}: p50 {statistics.median(timings):.2f} ms, '
+            f'p99 {timings[int(len(timings) * 0.99) - 1]:.2f} ms'
+        )
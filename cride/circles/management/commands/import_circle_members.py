@@ -0,0 +1,118 @@
+"""Import circle members"""
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User
+
+# Utilities
+import csv
+import json
+import sys
+import time
+
+
+def read_csv(stream):
+    """
+    Yield the `(line, email)` rows of a CSV stream.
+
+    Emails are read from the `email` column when the first row is a
+    header naming one, and from the first column otherwise.
+    """
+    reader = csv.reader(stream)
+    column = 0
+    for row in reader:
+        if reader.line_num == 1:
+            header = [name.strip().lower() for name in row]
+            if 'email' in header:
+                column = header.index('email')
+                continue
+        if not any(row):
+            continue
+        yield reader.line_num, row[column].strip() if len(row) > column else ''
+
+
+def read_ndjson(stream):
+    """Yield the `(line, email)` rows of a stream of JSON objects or strings, one per line."""
+    for line, text in enumerate(stream, start=1):
+        text = text.strip()
+        if not text:
+            continue
+        try:
+            record = json.loads(text)
+        except ValueError:
+            yield line, text[:254]
+            continue
+        email = record.get('email') if isinstance(record, dict) else record
+        yield line, email.strip() if isinstance(email, str) else ''
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+class Command(BaseCommand):
+    """
+    Add the users listed in a CSV or NDJSON file to a circle.
+
+    The file is streamed and imported in batches, so memory stays flat
+    however many rows it has. Rows that can't be imported are written to
+    stderr as they are found, followed by a summary with the throughput.
+    """
+
+    help = 'Bulk import the members of a circle from a CSV or NDJSON stream of emails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('circle', help='Slug name of the circle.')
+        parser.add_argument('path', nargs='?', default='-', help='File to read, or - for stdin.')
+        parser.add_argument('--format', choices=sorted(READERS), help='Defaults to the file extension, or csv.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--invited-by', help='Username recorded as the inviter of the new members.')
+
+    def handle(self, *args, **options):
+        try:
+            circle = Circle.objects.get(slug_name=options['circle'])
+        except Circle.DoesNotExist:
+            raise CommandError(f'Circle "{options["circle"]}" does not exist.')
+
+        invited_by = None
+        if options['invited_by']:
+            try:
+                invited_by = User.objects.get(username=options['invited_by'])
+            except User.DoesNotExist:
+                raise CommandError(f'User "{options["invited_by"]}" does not exist.')
+
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+
+        rows = created = failed = 0
+        started = time.monotonic()
+        try:
+            batches = Membership.objects.bulk_import(
+                circle,
+                READERS[file_format](stream),
+                batch_size=options['batch_size'],
+                invited_by=invited_by
+            )
+            for batch in batches:
+                rows += batch.rows
+                created += batch.created
+                failed += len(batch.failures)
+                for line, email, reason in batch.failures:
+                    self.stderr.write(f'line {line}: {email}: {reason}')
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'{rows} rows read, {created} members added.')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} members into {circle.slug_name} from {rows} rows '
+            f'({failed} failed) in {elapsed:.1f}s, {rows / max(elapsed, 1e-6):.0f} rows/s.'
+        ))
@@ -0,0 +1,23 @@
+"""Rebuild leaderboards"""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Utilities
+from cride.circles.leaderboards import leaderboards
+
+
+class Command(BaseCommand):
+    """Recompute the circle and member leaderboards from the database."""
+
+    help = 'Rebuild the Redis leaderboards of circles and members.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not leaderboards.available:
+            self.stdout.write('The cache is not Redis; leaderboards are read from the database.')
+            return
+        circles = leaderboards.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the leaderboards of {circles} circles.'))
@@ -0,0 +1,17 @@
+"""Recount circle members"""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Models
+from cride.circles.models import Circle
+
+
+class Command(BaseCommand):
+    """Recompute the materialized member count of every circle."""
+
+    help = 'Recount the active members of every circle.'
+
+    def handle(self, *args, **options):
+        circles = Circle.objects.recount_members()
+        self.stdout.write(self.style.SUCCESS(f'Recounted the members of {circles} circles.'))
@@ -1 +1,3 @@
 from cride.circles.managers.invitations import InvitationManager
+from cride.circles.managers.memberships import CircleMembership, MembershipImportBatch, MembershipManager
+from cride.circles.managers.circles import CircleManager, circle_cache
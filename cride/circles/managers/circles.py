@@ -0,0 +1,40 @@
+"""Circle managers"""
+
+# Django
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Utilities
+from cride.utils.cache import TwoTierCache
+
+circle_cache = TwoTierCache('circles:slug')
+
+
+class CircleManager(models.Manager):
+    """
+    Circle manager.
+
+    Resolves slugs through a process-local LRU backed by the shared cache.
+    """
+
+    def get_by_slug(self, slug_name):
+        """Return the circle with the given slug, raising DoesNotExist otherwise."""
+        circle = circle_cache.get(slug_name, lambda slug: self.filter(slug_name=slug).first())
+        if circle is None:
+            raise self.model.DoesNotExist(f'No circle with slug "{slug_name}".')
+        return circle
+
+    def invalidate(self, *slugs):
+        """Drop cached slugs now and again on commit."""
+        circle_cache.invalidate(*slugs)
+        transaction.on_commit(lambda: circle_cache.invalidate(*slugs), using=self.db)
+
+    def recount_members(self):
+        """Recompute every circle's member count from the active memberships."""
+        Membership = self.model.members.through
+        active = Membership.objects.filter(
+            circle=OuterRef('pk'),
+            is_active=True
+        ).order_by().values('circle').annotate(total=Count('pk')).values('total')
+        return self.update(members_count=Coalesce(Subquery(active), 0))
@@ -1,7 +1,8 @@
 """Circle invitation managers"""
 
 # Django
-from django.db import models
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
 
 # Utils
 import random
@@ -12,16 +13,83 @@ class InvitationManager(models.Manager):
     """
     Invitation manager.
 
-    Used to handle code creation.
+    Used to handle code creation and the cached invitation breakdown
+    of each member, which is dropped whenever the member issues codes.
     """
 
     CODE_LENGTH = 10
+    CODE_POOL = ascii_uppercase + digits + '.-'
+    MAX_ATTEMPTS = 10
+    BREAKDOWN_TIMEOUT = 300
+
+    def generate_code(self):
+        """Return a random code."""
+        return ''.join(random.choices(self.CODE_POOL, k=self.CODE_LENGTH))
 
     def create(self, **kwargs):
         """Handle code creation."""
-        pool = ascii_uppercase + digits + '.-'
-        code = kwargs.get('code', ''.join(random.choices(pool, k=self.CODE_LENGTH)))
+        code = kwargs.get('code') or self.generate_code()
         while self.filter(code=code).exists():
-            code = kwargs.get('code', ''.join(random.choices(pool, k=self.CODE_LENGTH)))
+            code = self.generate_code()
         kwargs['code'] = code
-        return super(InvitationManager, self).create()
+        invitation = super(InvitationManager, self).create(**kwargs)
+        self.invalidate_breakdown(invitation.circle_id, invitation.issued_by_id)
+        return invitation
+
+    def bulk_issue(self, circle, issuer, n):
+        """
+        Issue `n` invitations to a circle at once.
+
+        Each round generates the codes still missing, drops the ones
+        already taken with a single `IN` query and inserts the rest with
+        one `bulk_create` that ignores conflicts. The codes that lost a
+        race with a concurrent insert are the only ones generated again.
+
+        Return the issued invitations.
+        """
+        issued = []
+        for _ in range(self.MAX_ATTEMPTS):
+            missing = n - len(issued)
+            if missing <= 0:
+                return issued
+
+            codes = set()
+            while len(codes) < missing:
+                codes.add(self.generate_code())
+            codes -= set(self.filter(code__in=codes).values_list('code', flat=True))
+            if not codes:
+                continue
+
+            self.bulk_create([
+                self.model(code=code, circle=circle, issued_by=issuer)
+                for code in codes
+            ], ignore_conflicts=True)
+            issued += self.filter(code__in=codes, circle=circle, issued_by=issuer)
+
+        if len(issued) < n:
+            raise IntegrityError(f'Could not issue {n} unique invitation codes.')
+        self.invalidate_breakdown(circle.pk, issuer.pk)
+        return issued
+
+    def issue_missing(self, circle, issuer, remaining):
+        """Issue the codes `issuer` is owed: `remaining` minus the unused ones."""
+        missing = remaining - self.filter(circle=circle, issued_by=issuer, used=False).count()
+        if missing <= 0:
+            return []
+        return self.bulk_issue(circle, issuer, missing)
+
+    @staticmethod
+    def breakdown_key(circle_id, user_id):
+        """Return the cache key of a member's invitation breakdown."""
+        return f'circles:invitations:{circle_id}:{user_id}'
+
+    def invalidate_breakdown(self, circle_id, *user_ids):
+        """
+        Drop the cached invitation breakdowns of some members of a circle.
+
+        Dropped again on commit so a request reading the old rows in the
+        meantime can't cache them past the transaction.
+        """
+        keys = [self.breakdown_key(circle_id, user_id) for user_id in user_ids if user_id]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys), using=self.db)
@@ -0,0 +1,150 @@
+"""Circle membership managers"""
+
+# Django
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import models, transaction
+from django.db.models import F
+
+# Utils
+from collections import namedtuple
+from itertools import islice
+
+CircleMembership = namedtuple('CircleMembership', ('pk', 'is_admin', 'is_active'))
+MembershipImportBatch = namedtuple('MembershipImportBatch', ('rows', 'created', 'failures'))
+
+
+class MembershipManager(models.Manager):
+    """
+    Membership manager.
+
+    Resolves a user's memberships from a per-user map cached for
+    `CACHE_TIMEOUT` seconds, so permission checks and serializers
+    share one lookup. The map is dropped whenever one of the user's
+    memberships is saved or deleted.
+    """
+
+    CACHE_TIMEOUT = 60
+
+    @staticmethod
+    def cache_key(user_id):
+        """Return the cache key of a user's memberships."""
+        return f'circles:memberships:{user_id}'
+
+    def memberships(self, user):
+        """Return a `{circle_id: CircleMembership}` map of every membership of `user`."""
+        if not user or not user.is_authenticated:
+            return {}
+        key = self.cache_key(user.pk)
+        memberships = cache.get(key)
+        if memberships is None:
+            memberships = {
+                circle: CircleMembership(pk, is_admin, is_active)
+                for pk, circle, is_admin, is_active in self.filter(user=user).values_list(
+                    'pk', 'circle_id', 'is_admin', 'is_active'
+                )
+            }
+            cache.set(key, memberships, self.CACHE_TIMEOUT)
+        return memberships
+
+    def resolve(self, user, circle, is_admin=False):
+        """Return the active membership of `user` in `circle`, or None."""
+        membership = self.memberships(user).get(getattr(circle, 'pk', circle))
+        if membership is None or not membership.is_active or (is_admin and not membership.is_admin):
+            return None
+        return membership
+
+    def invalidate(self, *user_ids):
+        """
+        Drop the cached memberships of some users.
+
+        Dropped again on commit so a request reading the old rows in the
+        meantime can't cache them past the transaction.
+        """
+        keys = [self.cache_key(user_id) for user_id in user_ids]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys), using=self.db)
+
+    def bulk_import(self, circle, rows, batch_size=1000, invited_by=None):
+        """
+        Add the users behind a stream of `(line, email)` rows to `circle`.
+
+        `rows` is consumed lazily, `batch_size` rows at a time: each batch
+        resolves its users and their memberships with one query each and
+        inserts the new members with a single `bulk_create` in its own
+        short transaction, so memory stays flat however long the stream.
+
+        Yields a MembershipImportBatch per batch, whose failures are
+        `(line, email, reason)` tuples.
+        """
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield self._import_batch(circle, batch, invited_by)
+
+    def _import_batch(self, circle, batch, invited_by):
+        """Import one batch of rows."""
+        from cride.circles.models import Invitation
+
+        User = self.model._meta.get_field('user').related_model
+        Circle = self.model._meta.get_field('circle').related_model
+
+        emails = {email for _, email in batch}
+        users = {
+            email: (pk, profile)
+            for email, pk, profile in User.objects.filter(email__in=emails).values_list('email', 'pk', 'profile')
+        }
+        members = set(self.filter(
+            circle=circle,
+            user__in=[pk for pk, _ in users.values()]
+        ).values_list('user', flat=True))
+
+        failures = []
+        pending = []
+        seen = set()
+        for line, email in batch:
+            try:
+                validate_email(email)
+            except ValidationError:
+                failures.append((line, email, 'invalid email'))
+                continue
+            if email in seen:
+                failures.append((line, email, 'duplicated row'))
+                continue
+            seen.add(email)
+            if email not in users:
+                failures.append((line, email, 'unknown user'))
+                continue
+            user, profile = users[email]
+            if profile is None:
+                failures.append((line, email, 'user has no profile'))
+            elif user in members:
+                failures.append((line, email, 'already a member'))
+            else:
+                pending.append((line, email, self.model(user_id=user, profile_id=profile,
+                                                        circle=circle, invited_by=invited_by)))
+
+        created = []
+        if pending:
+            with transaction.atomic(using=self.db):
+                # Lock the circle so the limit and the count stay in step with other joins.
+                is_limited, members_limit, members_count = Circle.objects.select_for_update().filter(
+                    pk=circle.pk
+                ).values_list('is_limited', 'members_limit', 'members_count').get()
+                if is_limited:
+                    room = max(members_limit - members_count, 0)
+                    failures.extend((line, email, 'circle is full') for line, email, _ in pending[room:])
+                    pending = pending[:room]
+
+                created = self.bulk_create([member for _, _, member in pending])
+                Circle.objects.filter(pk=circle.pk).update(members_count=F('members_count') + len(created))
+                self.invalidate(*(member.user_id for member in created))
+                # bulk_create sends no post_save, so drop the inviter's breakdown here.
+                if created and invited_by is not None:
+                    Invitation.objects.invalidate_breakdown(circle.pk, invited_by.pk)
+
+        failures.sort()
+        return MembershipImportBatch(len(batch), len(created), failures)
@@ -5,9 +5,13 @@ from django.db import models
 
 # Utils
 from cride.utils.models import CRideModel
+from cride.rides.models.stats import RideStatsMixin
 
+# Managers
+from cride.circles.managers import CircleManager
 
-class Circle(CRideModel):
+
+class Circle(RideStatsMixin, CRideModel):
     """
     Circle model.
 
@@ -40,6 +44,10 @@ class Circle(CRideModel):
     )
 
     # stats
+    members_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of active members, kept in sync by Membership.',
+    )
     rides_offered = models.PositiveIntegerField(
         default=0,
     )
@@ -70,8 +78,16 @@ class Circle(CRideModel):
         help_text='If circle is limited, this will be the limit on the number of members.'
     )
 
+    objects = CircleManager()
+
+    class MembersLimitReached(Exception):
+        """The circle has no room for another active member."""
+
     class Meta(CRideModel.Meta):
         ordering = ['-rides_taken', '-rides_offered']
+        indexes = [
+            models.Index(fields=['is_public', '-members_count', '-rides_offered', '-rides_taken']),
+        ]
 
     def __str__(self):
         """Return circle name."""
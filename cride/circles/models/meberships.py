@@ -1,13 +1,18 @@
 """Membership models"""
 
 # Django
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 
 # Utilities
 from cride.utils.models import CRideModel
+from cride.rides.models.stats import RideStatsMixin
 
+# Managers
+from cride.circles.managers import MembershipManager
 
-class Membership(CRideModel):
+
+class Membership(RideStatsMixin, CRideModel):
     """
     Membership model.
 
@@ -66,6 +71,47 @@ class Membership(CRideModel):
         help_text='Only active users are allowed to interact in the circle.'
     )
 
+    objects = MembershipManager()
+
+    def save(self, *args, **kwargs):
+        """
+        Save the membership, keeping the circle's member count in sync.
+
+        The stored row is locked while an existing membership is saved,
+        so concurrent (de)activations count exactly once. Raise
+        Circle.MembersLimitReached if a limited circle has no room left.
+        """
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            if self._state.adding:
+                was_active = False
+            elif update_fields is not None and 'is_active' not in update_fields:
+                was_active = self.is_active
+            else:
+                was_active = Membership.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('is_active', flat=True).first()
+                if was_active is None:
+                    was_active = False
+            super().save(*args, **kwargs)
+            if was_active != self.is_active:
+                self.count_member(1 if self.is_active else -1)
+
+    def count_member(self, delta):
+        """
+        Add `delta` to the circle's member count.
+
+        New members are counted with a conditional UPDATE that only matches
+        while the circle has room, so parallel joins can't overfill it.
+        """
+        Circle = self._meta.get_field('circle').related_model
+        circles = Circle.objects.filter(pk=self.circle_id)
+        if delta > 0:
+            circles = circles.filter(Q(is_limited=False) | Q(members_limit__gte=F('members_count') + delta))
+        counted = circles.update(members_count=F('members_count') + delta)
+        if delta > 0 and not counted:
+            raise Circle.MembersLimitReached('Circle has reached it\'s members limit')
+
     def __str__(self):
         """
         Return username and circle
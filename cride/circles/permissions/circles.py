@@ -21,14 +21,4 @@ class IsCircleAdmin(BasePermission):
         :param obj:
         :return:
         """
-        try:
-            Membership.objects.get(
-                user=request.user,
-                circle=obj,
-                is_admin=True,
-                is_active=True
-            )
-        except Membership.DoesNotExist:
-            return False
-
-        return True
+        return Membership.objects.resolve(request.user, obj, is_admin=True) is not None
@@ -16,7 +16,7 @@ class IsSelfMember(BasePermission):
         """
 
         obj = view.get_object()
-        return obj.has_object_permission(request, view, obj)
+        return self.has_object_permission(request, view, obj)
 
     def has_object_permission(self, request, view, obj):
         """
@@ -18,13 +18,4 @@ class IsActiveCircleMember(BasePermission):
         """
         Verify user is an active member of the circle.
         """
-        circle = view.circle
-        try:
-            Membership.objects.get(
-                user=request.user,
-                circle=circle,
-                is_active=True
-            )
-        except Membership.DoesNotExist:
-            return False
-        return True
+        return Membership.objects.resolve(request.user, view.circle) is not None
@@ -1,2 +1,3 @@
 from cride.circles.serializers.circles import *
 from cride.circles.serializers.memberships import *
+from cride.circles.serializers.leaderboards import *
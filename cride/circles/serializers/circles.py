@@ -5,11 +5,17 @@ from rest_framework import serializers
 
 # Models
 from cride.circles.models import Circle
+from cride.rides.models import RideStatDelta
 
+# Serializers
+from cride.utils.serializers import DynamicFieldsMixin
 
-class CircleModelSerializer(serializers.ModelSerializer):
+
+class CircleModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Circle model serializer
+
+    Member ids are only rendered with `?expand=members`.
     """
 
     members_limit = serializers.IntegerField(
@@ -22,6 +28,9 @@ class CircleModelSerializer(serializers.ModelSerializer):
         default=False
     )
 
+    rides_offered = serializers.IntegerField(source='total_rides_offered', read_only=True)
+    rides_taken = serializers.IntegerField(source='total_rides_taken', read_only=True)
+
     class Meta:
         """
         Meta class
@@ -34,6 +43,7 @@ class CircleModelSerializer(serializers.ModelSerializer):
             'about',
             'picture',
             'members',
+            'members_count',
             'rides_offered',
             'rides_taken',
             'verified',
@@ -45,10 +55,23 @@ class CircleModelSerializer(serializers.ModelSerializer):
         read_only_fields = (
             'is_public',
             'verified',
+            'members_count',
             'rides_offered',
             'rides_taken',
         )
 
+        expandable_fields = ('members',)
+        field_columns = {
+            'rides_offered': ('rides_offered',),
+            'rides_taken': ('rides_taken',),
+        }
+
+    def setup_queryset(self, queryset):
+        """Annotate the ride stats pending to be folded, when they are rendered."""
+        if self.fields.keys() & {'rides_offered', 'rides_taken'}:
+            return RideStatDelta.objects.annotate_pending(queryset)
+        return queryset
+
     def validate(self, attrs):
         """
         Ensure both members_limit and is_limited are present.
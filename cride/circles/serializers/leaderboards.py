@@ -0,0 +1,34 @@
+"""Leaderboard serializers"""
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Utilities
+from cride.circles.leaderboards import LEADERBOARD_FIELDS
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """
+    Leaderboard query serializer.
+
+    Validate the stat to rank by and the number of entries to return.
+    """
+
+    by = serializers.ChoiceField(choices=LEADERBOARD_FIELDS, default='rides_offered')
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class CircleRankSerializer(serializers.Serializer):
+    """Ranked circle serializer, from `(circle, score, rank)` entries."""
+
+    def to_representation(self, instance):
+        circle, score, rank = instance
+        return {'rank': rank, 'score': score, 'slug_name': circle.slug_name, 'name': circle.name}
+
+
+class MemberRankSerializer(serializers.Serializer):
+    """Ranked member serializer, from `(membership, score, rank)` entries."""
+
+    def to_representation(self, instance):
+        membership, score, rank = instance
+        return {'rank': rank, 'score': score, 'username': membership.user.username}
@@ -1,19 +1,24 @@
 """Circle membership serializers"""
 
 # Django
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 # Django REST Framework
 from rest_framework import serializers
 
 # Models
-from cride.circles.models import Membership, Invitation
+from cride.circles.models import Circle, Membership, Invitation
+from cride.rides.models import RideStatDelta
 
 # Serializers
 from cride.users.serializers import UserModelSerializer
+from cride.utils.serializers import DynamicFieldsMixin
 
 
-class MembershipModelSerializer(serializers.ModelSerializer):
+class MembershipModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Member model serializer
     """
@@ -21,6 +26,8 @@ class MembershipModelSerializer(serializers.ModelSerializer):
     user = UserModelSerializer(read_only=True)
     invited_by = serializers.StringRelatedField()
     joined_at = serializers.DateTimeField(source='created', read_only=True)
+    rides_offered = serializers.IntegerField(source='total_rides_offered', read_only=True)
+    rides_taken = serializers.IntegerField(source='total_rides_taken', read_only=True)
 
     class Meta:
         """
@@ -43,6 +50,16 @@ class MembershipModelSerializer(serializers.ModelSerializer):
             'used_invitations',
             'invited_by',
         )
+        field_columns = {
+            'rides_offered': ('rides_offered',),
+            'rides_taken': ('rides_taken',),
+        }
+
+    def setup_queryset(self, queryset):
+        """Annotate the ride stats pending to be folded, when they are rendered."""
+        if self.fields.keys() & {'rides_offered', 'rides_taken'}:
+            return RideStatDelta.objects.annotate_pending(queryset)
+        return queryset
 
 
 class AddMemberSerializer(serializers.Serializer):
@@ -63,61 +80,49 @@ class AddMemberSerializer(serializers.Serializer):
         """
         circle = self.context['circle']
         user = attr
-        q = Membership.objects.filter(circle=circle, user=user)
-        if q.exists():
+        if circle.pk in Membership.objects.memberships(user):
             raise serializers.ValidationError('User already exists in this circle')
         return attr
 
-    def validate_invitation_code(self, attr):
-        """
-        Verify code exists and that it's related to the circle.
-        """
-
-        try:
-            invitation = Invitation.objects.get(code=attr,
-                                                circle=self.context['circle'],
-                                                used=False)
-        except Invitation.DoesNotExist:
-            raise serializers.ValidationError('Invalid invitation code')
-        self.context['invitation'] = invitation
-        return attr
-
-    def validate(self, attrs):
-        """
-        Verify circle is capable of accepting new members.
-        """
-        circle = self.context['circle']
-        if circle.is_limited and circle.members.count >= circle.members_limit:
-            raise serializers.ValidationError('Circle has reached it\'s members limit')
-        return attrs
-
     def create(self, validated_data):
         """
-        Create new circle member and update circle info.
+        Redeem the invitation and create the new member.
+
+        The invitation is claimed and the circle's room is reserved with
+        conditional UPDATEs, so of many concurrent redemptions of a code
+        only one can succeed and a limited circle can't be overfilled. The
+        member and the issuer's counters are written in the same
+        transaction, which is rolled back if the circle is full.
         """
         circle = self.context['circle']
-        invitation = self.context['invitation']
         user = validated_data['user']
-
         now = timezone.now()
 
-        # Member creation
-        member = Membership.objects.create(user=user,
-                                           profile=user.profile,
-                                           circle=circle,
-                                           invited_by=invitation.issued_by)
-
-        # Update invitation
-        invitation.used_by = user
-        invitation.used = True
-        invitation.used_at = now
-        invitation.save()
-
-        # Update issuer data
-        issuer = Membership.objects.get(user=invitation.issued_by,
-                                        circle=circle)
-        issuer.used_inviations += 1
-        issuer.remaining_invitations -= 1
-        issuer.save()
+        with transaction.atomic():
+            claimed = Invitation.objects.filter(
+                code=validated_data['invitation_code'],
+                circle=circle,
+                used=False
+            ).update(used=True, used_by=user, used_at=now, modified=now)
+            if not claimed:
+                raise serializers.ValidationError({'invitation_code': 'Invalid invitation code'})
+
+            issuer = Invitation.objects.filter(
+                code=validated_data['invitation_code']
+            ).values_list('issued_by', flat=True).get()
+
+            try:
+                member = Membership.objects.create(user=user,
+                                                   profile=user.profile,
+                                                   circle=circle,
+                                                   invited_by_id=issuer)
+            except Circle.MembersLimitReached as error:
+                raise serializers.ValidationError(str(error))
+
+            Membership.objects.filter(user=issuer, circle=circle).update(
+                used_invitations=F('used_invitations') + 1,
+                remaining_invitations=Greatest(F('remaining_invitations') - 1, 0),
+                modified=now
+            )
 
         return member
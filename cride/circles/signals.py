@@ -0,0 +1,108 @@
+"""Circles signals"""
+
+# Django
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+# Models
+from cride.circles.models import Circle, Invitation, Membership
+from cride.rides.models import RideStatDelta
+from cride.taskapp.models import OutboxMessage
+from cride.users.models import Profile, User
+
+# Tasks
+from cride.taskapp.tasks import issue_missing_invitations
+
+# Utilities
+from cride.circles.leaderboards import leaderboards
+
+
+@receiver(post_save, sender=Membership, dispatch_uid='membership_cache_saved')
+@receiver(post_delete, sender=Membership, dispatch_uid='membership_cache_deleted')
+def membership_changed(sender, instance, **kwargs):
+    """Drop the cached memberships of the member."""
+    Membership.objects.invalidate(instance.user_id)
+
+
+@receiver(pre_save, sender=Circle, dispatch_uid='circle_cache_renamed')
+def circle_renamed(sender, instance, raw=False, **kwargs):
+    """Drop the cached slug a circle is being renamed from."""
+    if raw or instance.pk is None:
+        return
+    previous = Circle.objects.filter(pk=instance.pk).values_list('slug_name', flat=True).first()
+    if previous and previous != instance.slug_name:
+        Circle.objects.invalidate(previous)
+
+
+@receiver(post_save, sender=Circle, dispatch_uid='circle_cache_saved')
+@receiver(post_delete, sender=Circle, dispatch_uid='circle_cache_deleted')
+def circle_changed(sender, instance, **kwargs):
+    """Drop the cached slug of the circle."""
+    Circle.objects.invalidate(instance.slug_name)
+
+
+@receiver(post_delete, sender=Membership, dispatch_uid='membership_count_deleted')
+def membership_deleted(sender, instance, **kwargs):
+    """Stop counting a deleted active member."""
+    if instance.is_active:
+        instance.count_member(-1)
+
+
+@receiver(post_save, sender=RideStatDelta, dispatch_uid='leaderboards_stats_recorded')
+def ride_stats_recorded(sender, instance, created, raw=False, **kwargs):
+    """Add recorded ride stats to the leaderboards."""
+    if created and not raw:
+        leaderboards.record(instance)
+
+
+@receiver(post_save, sender=Circle, dispatch_uid='leaderboards_circle_saved')
+def circle_ranked(sender, instance, raw=False, **kwargs):
+    """Rank public circles only."""
+    if not raw:
+        leaderboards.sync_circle(instance)
+
+
+@receiver(post_delete, sender=Circle, dispatch_uid='leaderboards_circle_deleted')
+def circle_unranked(sender, instance, **kwargs):
+    """Drop a deleted circle from the leaderboards."""
+    leaderboards.drop_circle(instance.pk)
+
+
+@receiver(post_save, sender=Membership, dispatch_uid='leaderboards_membership_saved')
+def member_ranked(sender, instance, raw=False, **kwargs):
+    """Rank active members only."""
+    if not raw:
+        leaderboards.sync_member(instance)
+
+
+@receiver(post_delete, sender=Membership, dispatch_uid='leaderboards_membership_deleted')
+def member_unranked(sender, instance, **kwargs):
+    """Drop a deleted membership from the leaderboards."""
+    leaderboards.drop_member(instance)
+
+
+@receiver(post_save, sender=Membership, dispatch_uid='invitations_membership_saved')
+@receiver(post_delete, sender=Membership, dispatch_uid='invitations_membership_deleted')
+def invitation_member_changed(sender, instance, raw=False, **kwargs):
+    """Drop the invitation breakdowns of the member and of whoever invited it."""
+    if not raw:
+        Invitation.objects.invalidate_breakdown(instance.circle_id, instance.user_id, instance.invited_by_id)
+
+
+@receiver(post_save, sender=Membership, dispatch_uid='invitations_membership_created')
+def member_joined(sender, instance, created, raw=False, **kwargs):
+    """Issue the invitation codes of a new member off the request path."""
+    if created and not raw and instance.remaining_invitations:
+        OutboxMessage.objects.enqueue(issue_missing_invitations, instance.pk)
+
+
+@receiver(post_save, sender=User, dispatch_uid='invitations_user_saved')
+@receiver(post_save, sender=Profile, dispatch_uid='invitations_profile_saved')
+def invited_user_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Drop the invitation breakdowns listing a changed user."""
+    if created or raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    invitations = Membership.objects.filter(user_id=user_id, invited_by__isnull=False)
+    for circle, inviter in invitations.values_list('circle', 'invited_by'):
+        Invitation.objects.invalidate_breakdown(circle, inviter)
@@ -0,0 +1,366 @@
+"""Circle tests."""
+
+# Django
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+
+# Django REST Framework
+from rest_framework.test import APIClient, APITestCase
+
+# Models
+from cride.circles.models import Circle, Invitation, Membership
+from cride.rides.models import RideStatDelta
+from cride.users.models import User, Profile
+from rest_framework.authtoken.models import Token
+
+# Utilities
+from cride.circles.leaderboards import leaderboards
+from cride.circles.managers import circle_cache
+from cride.circles.tests.test_leaderboards import FakeRedis
+from cride.utils.leaderboards import Leaderboard
+from unittest import mock
+import multiprocessing
+
+
+class CircleSlugCacheTestCase(APITestCase):
+    """Circle slug resolution cache test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        circle_cache.clear()
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        user = User.objects.create(email='jestrada@mail.com', username='jestrada')
+        profile = Profile.objects.create(user=user)
+        Membership.objects.create(user=user, profile=profile, circle=self.circle)
+        token = Token.objects.create(user=user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def circle_queries(self, slug):
+        """Request a circle's members and return the status and circle queries."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/circles/{slug}/members/')
+        queries = [query for query in context.captured_queries if 'FROM "circles_circle"' in query['sql']]
+        return response.status_code, len(queries)
+
+    def test_slugs_are_cached(self):
+        """Known and unknown slugs are resolved once."""
+        self.assertEqual(self.circle_queries('fciencias'), (200, 1))
+        self.assertEqual(self.circle_queries('fciencias'), (200, 0))
+        self.assertEqual(self.circle_queries('unknown'), (404, 1))
+        self.assertEqual(self.circle_queries('unknown'), (404, 0))
+
+        stats = circle_cache.stats()
+        self.assertEqual((stats['local_hits'], stats['misses'], stats['hit_ratio']), (2, 2, 0.5))
+
+        circle_cache.clear()
+        self.assertEqual(self.circle_queries('fciencias'), (200, 0))
+        self.assertEqual(circle_cache.stats()['shared_hits'], 1)
+
+    def test_saving_invalidates(self):
+        """Renaming a circle drops both slugs."""
+        self.assertEqual(self.circle_queries('fciencias'), (200, 1))
+        self.assertEqual(self.circle_queries('ciencias'), (404, 1))
+
+        self.circle.slug_name = 'ciencias'
+        self.circle.save()
+        self.assertEqual(self.circle_queries('fciencias'), (404, 1))
+        self.assertEqual(self.circle_queries('ciencias'), (200, 1))
+
+
+class CircleMembersCountTestCase(APITestCase):
+    """Materialized member count test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        self.circles = [
+            Circle.objects.create(name=name, slug_name=name.lower(), about=name)
+            for name in ('Ciencias', 'Medicina')
+        ]
+        self.admin = self.add_member(self.circles[0], 'jestrada', is_admin=True)
+        token = Token.objects.create(user=self.admin.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def add_member(self, circle, username, **fields):
+        """Create a user, its profile and its membership."""
+        user = User.objects.create(email=f'{username}@mail.com', username=username)
+        profile = Profile.objects.create(user=user)
+        return Membership.objects.create(user=user, profile=profile, circle=circle, **fields)
+
+    def test_members_are_expanded_on_request(self):
+        """Member ids are left out of circles unless expanded."""
+        self.add_member(self.circles[0], 'member')
+        circle = self.client.get('/circles/ciencias/').data
+        self.assertNotIn('members', circle)
+        self.assertIn('rides_offered', circle)
+
+        circle = self.client.get('/circles/ciencias/', {'expand': 'members'}).data
+        self.assertEqual(len(circle['members']), 2)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/circles/', {'fields': 'slug_name,members_count'})
+        self.assertEqual(response.data['results'][0], {'slug_name': 'ciencias', 'members_count': 2})
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('ridestatdelta', sql)
+        self.assertNotIn('"circles_circle"."about"', sql)
+
+    def members_count(self, circle):
+        """Return the stored member count of a circle."""
+        return Circle.objects.values_list('members_count', flat=True).get(pk=circle.pk)
+
+    def test_count_follows_memberships(self):
+        """Joining, leaving, rejoining and deleting update the count."""
+        circle = self.circles[0]
+        member = self.add_member(circle, 'member')
+        self.assertEqual(self.members_count(circle), 2)
+
+        response = self.client.delete(f'/circles/{circle.slug_name}/members/member/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.members_count(circle), 1)
+
+        member.refresh_from_db()
+        member.save()
+        self.assertEqual(self.members_count(circle), 1)
+        member.is_active = True
+        member.save()
+        self.assertEqual(self.members_count(circle), 2)
+
+        member.delete()
+        self.assertEqual(self.members_count(circle), 1)
+
+        Circle.objects.update(members_count=0)
+        self.assertEqual(Circle.objects.recount_members(), 2)
+        self.assertEqual(self.members_count(circle), 1)
+
+    def test_members_limit(self):
+        """A full limited circle refuses new and reactivated members."""
+        circle = self.circles[0]
+        Circle.objects.filter(pk=circle.pk).update(is_limited=True, members_limit=2)
+        member = self.add_member(circle, 'member')
+
+        with self.assertRaises(Circle.MembersLimitReached):
+            self.add_member(circle, 'extra')
+        self.assertFalse(Membership.objects.filter(user__username='extra').exists())
+
+        member.is_active = False
+        member.save()
+        self.add_member(circle, 'late')
+        member.is_active = True
+        with self.assertRaises(Circle.MembersLimitReached):
+            member.save()
+        self.assertEqual(self.members_count(circle), 2)
+
+    def test_list_ordered_by_members(self):
+        """The public list is ordered by members in a constant number of queries."""
+        self.add_member(self.circles[1], 'ana')
+
+        def list_circles():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get('/circles/', {'limit': 100})
+            self.assertEqual(response.status_code, 200)
+            return len(context.captured_queries), [circle['slug_name'] for circle in response.data['results']]
+
+        list_circles()  # Warm the token cache.
+        queries, slugs = list_circles()
+        self.assertEqual(slugs, ['ciencias', 'medicina'])
+
+        self.add_member(self.circles[1], 'bob')
+        Circle.objects.create(name='Derecho', slug_name='derecho', about='Derecho')
+        self.assertEqual(list_circles(), (queries, ['medicina', 'ciencias', 'derecho']))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ParallelJoinTestCase(TransactionTestCase):
+    """
+    Hundreds of users joining a nearly full circle at once.
+
+    Joins are sent from several processes, each with its own database
+    connection. Needs a database with row-level locking; SQLite's
+    in-memory test database can't be shared across processes.
+    """
+
+    limit = 10
+    joins = 500
+    processes = 20
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM',
+                                            is_limited=True, members_limit=self.limit)
+        issuer = User.objects.create(email='jestrada@mail.com', username='jestrada')
+        Membership.objects.create(user=issuer, profile=Profile.objects.create(user=issuer),
+                                  circle=self.circle, remaining_invitations=self.joins)
+
+        users = User.objects.bulk_create([
+            User(email=f'guest{i}@mail.com', username=f'guest{i}') for i in range(self.joins)
+        ])
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        tokens = Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+        invitations = Invitation.objects.bulk_issue(self.circle, issuer, self.joins)
+        self.requests = [(token.key, invitation.code) for token, invitation in zip(tokens, invitations)]
+
+    def test_limit_holds(self):
+        """Only the free seats are taken; every other join is rejected."""
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(self.processes)
+        results = context.Queue()
+        url = f'/circles/{self.circle.slug_name}/members/'
+
+        def join(requests):
+            client = APIClient()
+            barrier.wait()
+            statuses = []
+            for token, code in requests:
+                client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+                statuses.append(client.post(url, {'invitation_code': code}).status_code)
+            connections.close_all()
+            results.put(statuses)
+
+        # Children must open their own connections.
+        connections.close_all()
+        workers = [
+            context.Process(target=join, args=(self.requests[i::self.processes],))
+            for i in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        statuses = [status for _ in workers for status in results.get(timeout=120)]
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(statuses), self.joins)
+        self.assertEqual(statuses.count(201), self.limit - 1)
+        self.assertEqual(statuses.count(400), self.joins - self.limit + 1)
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, self.limit)
+        self.assertEqual(Membership.objects.filter(circle=self.circle).count(), self.limit)
+        self.assertEqual(Invitation.objects.filter(used=True).count(), self.limit - 1)
+
+
+class LeaderboardAPITestCase(APITestCase):
+    """Circle and member leaderboards test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        self.circles = {
+            name: Circle.objects.create(name=name, slug_name=name.lower(), about=name, is_public=is_public)
+            for name, is_public in (('Ciencias', True), ('Medicina', True), ('Derecho', True), ('Secreto', False))
+        }
+        self.members = {
+            username: self.add_member(self.circles['Ciencias'], username)
+            for username in ('ana', 'bob', 'eve', 'joe')
+        }
+        token = Token.objects.create(user=self.members['eve'].user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def add_member(self, circle, username):
+        """Create a user, its profile and its membership."""
+        user = User.objects.create(email=f'{username}@mail.com', username=username)
+        profile = Profile.objects.create(user=user)
+        return Membership.objects.create(user=user, profile=profile, circle=circle)
+
+    def offer(self, membership, rides, circle=None):
+        """Record rides offered by a member, not folded yet."""
+        RideStatDelta.objects.record(circle=circle or membership.circle, membership=membership,
+                                     profile=membership.profile, rides_offered=rides)
+
+    def test_member_leaderboard(self):
+        """Members are ranked by their stats, folded or not, and get their own rank."""
+        self.offer(self.members['ana'], 5)
+        self.offer(self.members['bob'], 3)
+        self.offer(self.members['eve'], 3)
+        RideStatDelta.objects.fold()
+        self.offer(self.members['bob'], 1)
+
+        response = self.client.get('/circles/ciencias/members/leaderboard/', {'limit': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [
+            {'rank': 1, 'score': 5, 'username': 'ana'},
+            {'rank': 2, 'score': 4, 'username': 'bob'},
+        ])
+        self.assertEqual(response.data['me'], {'rank': 3, 'score': 3})
+
+        self.members['ana'].is_active = False
+        self.members['ana'].save()
+        response = self.client.get('/circles/ciencias/members/leaderboard/')
+        self.assertEqual([row['username'] for row in response.data['results']], ['bob', 'eve'])
+        self.assertEqual(response.data['me'], {'rank': 2, 'score': 3})
+
+        response = self.client.get('/circles/ciencias/members/leaderboard/', {'by': 'rides_taken'})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['me'], {'rank': 1, 'score': 0})
+
+    def test_circle_leaderboard(self):
+        """Only public circles are ranked, ties share a rank."""
+        ciencias = self.members['ana']
+        self.offer(ciencias, 2)
+        self.offer(self.add_member(self.circles['Medicina'], 'doc'), 2)
+        self.offer(self.add_member(self.circles['Secreto'], 'spy'), 9)
+
+        response = self.client.get('/circles/leaderboard/', {'circle': 'derecho'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted((row['slug_name'], row['rank']) for row in response.data['results']),
+                         [('ciencias', 1), ('medicina', 1)])
+        self.assertEqual(response.data['circle'], {'slug_name': 'derecho', 'rank': 3, 'score': 0})
+
+        response = self.client.get('/circles/leaderboard/', {'circle': 'secreto'})
+        self.assertEqual(response.data['circle'], {'slug_name': 'secreto', 'rank': None, 'score': 9})
+        self.assertEqual(self.client.get('/circles/leaderboard/', {'by': 'members'}).status_code, 400)
+
+
+class RedisLeaderboardAPITestCase(LeaderboardAPITestCase):
+    """
+    Circle and member leaderboards served from Redis sorted sets.
+
+    Runs the database fallback tests against an in-memory Redis, with
+    the rankings updated as soon as the changes are recorded instead of
+    on commit.
+    """
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.redis = FakeRedis()
+        for patcher in (
+            mock.patch.object(Leaderboard, 'available', new_callable=mock.PropertyMock, return_value=True),
+            mock.patch.object(Leaderboard, 'redis', lambda leaderboard: self.redis),
+            mock.patch('cride.circles.leaderboards.transaction', mock.Mock(on_commit=lambda apply: apply())),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        super().setUp()
+
+    def test_rankings_are_kept_in_redis(self):
+        """Recorded stats update the sorted sets of the circle and its members."""
+        self.offer(self.members['ana'], 2)
+        circle = self.circles['Ciencias']
+        self.assertEqual(self.redis.sets['leaderboards:circles:rides_offered'], {str(circle.pk).encode(): 2.0})
+        self.assertEqual(self.redis.sets[f'leaderboards:circles:{circle.pk}:members:rides_offered'],
+                         {str(self.members['ana'].pk).encode(): 2.0})
+
+    def test_rebuild(self):
+        """Rebuilding replaces drifted rankings with the database scores."""
+        self.offer(self.members['ana'], 2)
+        self.offer(self.members['bob'], 1)
+        circle = self.circles['Ciencias']
+        members_key = f'leaderboards:circles:{circle.pk}:members:rides_offered'
+        self.redis.sets[members_key] = {b'999': 50.0, str(self.members['bob'].pk).encode(): 7.0}
+        self.redis.sets['leaderboards:circles:rides_offered'][str(self.circles['Secreto'].pk).encode()] = 9.0
+
+        self.assertEqual(leaderboards.rebuild(), len(self.circles))
+
+        self.assertEqual(self.redis.sets[members_key], {
+            str(self.members['ana'].pk).encode(): 2.0,
+            str(self.members['bob'].pk).encode(): 1.0,
+        })
+        self.assertEqual(self.redis.sets['leaderboards:circles:rides_offered'], {str(circle.pk).encode(): 3.0})
+        self.assertFalse(any(key.endswith(':rebuild') for key in self.redis.sets))
+
+        response = self.client.get('/circles/ciencias/members/leaderboard/')
+        self.assertEqual([(row['username'], row['rank']) for row in response.data['results']],
+                         [('ana', 1), ('bob', 2)])
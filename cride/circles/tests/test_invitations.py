@@ -1,16 +1,39 @@
 """Invitation tests."""
 
 # Django
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 
 # Django REST Framework
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 
 # Models
 from cride.circles.models import Invitation, Circle, Membership
-from cride.users.models import User
+from cride.taskapp.models import OutboxMessage
+from cride.users.models import User, Profile
 from rest_framework.authtoken.models import Token
 
+# Managers
+from cride.circles.managers import InvitationManager
+
+# Tasks
+from cride.taskapp.tasks import issue_missing_invitations
+
+# Utilities
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import threading
+import time
+
+
+def create_user(username):
+    """Create a user with a profile and a token."""
+    user = User.objects.create(email=f'{username}@mail.com', username=username)
+    Profile.objects.create(user=user)
+    return user, Token.objects.create(user=user).key
+
 
 class InvitationManagerTestCase(TestCase):
     """Invitations manager test case."""
@@ -98,3 +121,252 @@ class MemberInvitationsAPITestCase(APITestCase):
     def test_response_success(self):
         """Verify request succeed."""
         # url = reverse()
+
+
+class BulkIssueTestCase(APITestCase):
+    """Bulk invitation issuing test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.user = User.objects.create(email='jestrada@mail.com', username='jestrada')
+        profile = Profile.objects.create(user=self.user)
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.member = Membership.objects.create(user=self.user, profile=profile, circle=self.circle,
+                                                remaining_invitations=10)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def test_collisions_are_regenerated(self):
+        """Codes already taken are replaced by new ones."""
+        Invitation.objects.create(issued_by=self.user, circle=self.circle, code='TAKEN00000')
+        codes = iter(['TAKEN00000', 'FRESH00001', 'FRESH00002', 'FRESH00003'])
+        with mock.patch.object(InvitationManager, 'generate_code', side_effect=lambda: next(codes)):
+            invitations = Invitation.objects.bulk_issue(self.circle, self.user, 3)
+
+        self.assertEqual(sorted(invitation.code for invitation in invitations),
+                         ['FRESH00001', 'FRESH00002', 'FRESH00003'])
+        self.assertEqual(Invitation.objects.count(), 4)
+
+    def test_invitations_endpoint(self):
+        """Missing invitations are issued off the request path in a fixed number of queries."""
+        url = f'/circles/{self.circle.slug_name}/members/{self.user.username}/invitations/'
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unused_invitations'], [])
+
+        inserts = [query for query in context.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(inserts, [])
+        self.assertLess(len(context.captured_queries), 20)
+
+        self.assertEqual([message.args for message in OutboxMessage.objects.all()], [[self.member.pk]])
+        OutboxMessage.objects.relay()
+        response = self.client.get(url)
+        self.assertEqual(len(set(response.data['unused_invitations'])), 10)
+
+    def test_missing_invitations_are_queued_once(self):
+        """Refreshing the breakdown while codes are missing queues a single task."""
+        OutboxMessage.objects.all().delete()
+        url = f'/circles/{self.circle.slug_name}/members/{self.user.username}/invitations/'
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).data['unused_invitations'], [])
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        OutboxMessage.objects.relay()
+        self.assertEqual(len(self.client.get(url).data['unused_invitations']), 10)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+class InvitationBreakdownTestCase(APITestCase):
+    """Cached invitation breakdown test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        self.issuer, token = create_user('jestrada')
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        Membership.objects.create(user=self.issuer, profile=self.issuer.profile,
+                                  circle=self.circle, remaining_invitations=3)
+        Invitation.objects.issue_missing(self.circle, self.issuer, 3)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/members/{self.issuer.username}/invitations/'
+
+    def breakdown(self):
+        """Return the breakdown and the queries it took, warming the caches first."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(context.captured_queries)
+
+    def test_breakdown_is_cached(self):
+        """Repeated requests skip the breakdown queries until it changes."""
+        data, queries = self.breakdown()
+        self.assertEqual(len(data['unused_invitations']), 3)
+
+        guest, _ = create_user('guest')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=guest).key}')
+        response = self.client.post(f'/circles/{self.circle.slug_name}/members/',
+                                    {'invitation_code': data['unused_invitations'][0]})
+        self.assertEqual(response.status_code, 201)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=self.issuer).key}')
+
+        with CaptureQueriesContext(connection) as context:
+            data = self.client.get(self.url).data
+        self.assertGreater(len(context.captured_queries), queries)
+        self.assertEqual(len(data['unused_invitations']), 2)
+        self.assertEqual([member['user']['username'] for member in data['used_invitations']], ['guest'])
+
+        guest.first_name = 'Guest'
+        guest.save()
+        data, cached_queries = self.breakdown()
+        self.assertEqual(data['used_invitations'][0]['user']['first_name'], 'Guest')
+        self.assertEqual(cached_queries, queries)
+
+
+class RedeemInvitationAPITestCase(APITestCase):
+    """Invitation redemption test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        self.issuer, _ = create_user('jestrada')
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        Membership.objects.create(user=self.issuer, profile=self.issuer.profile,
+                                  circle=self.circle, remaining_invitations=2)
+        self.code = Invitation.objects.create(issued_by=self.issuer, circle=self.circle).code
+        self.url = f'/circles/{self.circle.slug_name}/members/'
+
+    def redeem(self, username, code):
+        """Redeem `code` as a new user."""
+        _, token = create_user(username)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        return self.client.post(self.url, {'invitation_code': code})
+
+    def test_redeem(self):
+        """Redeeming claims the code and updates both members' counters."""
+        response = self.redeem('guest', self.code)
+
+        self.assertEqual(response.status_code, 201)
+        invitation = Invitation.objects.get(code=self.code)
+        self.assertTrue(invitation.used)
+        self.assertEqual(invitation.used_by.username, 'guest')
+        issuer = Membership.objects.get(user=self.issuer, circle=self.circle)
+        self.assertEqual((issuer.used_invitations, issuer.remaining_invitations), (1, 1))
+        self.assertEqual(Membership.objects.get(user__username='guest').invited_by, self.issuer)
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 2)
+
+    def test_code_is_single_use(self):
+        """A used code is rejected."""
+        self.assertEqual(self.redeem('guest', self.code).status_code, 201)
+        response = self.redeem('other', self.code)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('invitation_code', response.data)
+
+    def test_members_limit(self):
+        """A full circle rejects the redemption and leaves the code unused."""
+        Circle.objects.filter(pk=self.circle.pk).update(is_limited=True, members_limit=1)
+
+        response = self.redeem('guest', self.code)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Invitation.objects.get(code=self.code).used)
+        self.assertEqual(Membership.objects.filter(circle=self.circle).count(), 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentRedeemTestCase(TransactionTestCase):
+    """
+    Many users racing to redeem invitations of one circle.
+
+    Needs a database with row-level locking; SQLite serializes the whole
+    database and its in-memory test database can't be shared by threads.
+    """
+
+    guests = 30
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.issuer, _ = create_user('jestrada')
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        Membership.objects.create(user=self.issuer, profile=self.issuer.profile,
+                                  circle=self.circle, remaining_invitations=self.guests)
+        self.tokens = [create_user(f'guest{i}')[1] for i in range(self.guests)]
+        self.url = f'/circles/{self.circle.slug_name}/members/'
+
+    def redeem_all(self, codes):
+        """Redeem `codes[i]` as guest `i`, all at once."""
+        barrier = threading.Barrier(self.guests)
+
+        def redeem(args):
+            token, code = args
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            barrier.wait()
+            try:
+                return client.post(self.url, {'invitation_code': code}).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.guests) as executor:
+            return list(executor.map(redeem, zip(self.tokens, codes)))
+
+    def test_no_double_redemption(self):
+        """Exactly one redemption of a shared code succeeds."""
+        code = Invitation.objects.create(issued_by=self.issuer, circle=self.circle).code
+
+        statuses = self.redeem_all([code] * self.guests)
+
+        self.assertEqual(statuses.count(201), 1)
+        self.assertEqual(statuses.count(400), self.guests - 1, statuses)
+        self.assertEqual(Membership.objects.filter(circle=self.circle).count(), 2)
+        issuer = Membership.objects.get(user=self.issuer, circle=self.circle)
+        self.assertEqual(issuer.used_invitations, 1)
+
+    def test_members_limit(self):
+        """Distinct codes never fill the circle past its limit."""
+        limit = 10
+        Circle.objects.filter(pk=self.circle.pk).update(is_limited=True, members_limit=limit)
+        codes = [invitation.code for invitation in Invitation.objects.bulk_issue(self.circle, self.issuer, self.guests)]
+
+        statuses = self.redeem_all(codes)
+
+        self.assertEqual(statuses.count(201), limit - 1)
+        self.assertEqual(Membership.objects.filter(circle=self.circle).count(), limit)
+        self.assertEqual(Invitation.objects.filter(used=True).count(), limit - 1)
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, limit)
+        issuer = Membership.objects.get(user=self.issuer, circle=self.circle)
+        self.assertEqual(issuer.used_invitations, limit - 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentIssueTestCase(TransactionTestCase):
+    """Invitation issuing tasks running at once for the same member."""
+
+    def test_codes_are_issued_once(self):
+        """Concurrent tasks never issue more codes than the member is owed."""
+        issuer, _ = create_user('jestrada')
+        circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        membership = Membership.objects.create(user=issuer, profile=issuer.profile,
+                                               circle=circle, remaining_invitations=5)
+        barrier = threading.Barrier(2)
+        bulk_issue = InvitationManager.bulk_issue
+
+        def slow_bulk_issue(manager, *args):
+            time.sleep(0.2)
+            return bulk_issue(manager, *args)
+
+        def issue(_):
+            barrier.wait()
+            try:
+                return issue_missing_invitations(membership.pk)
+            finally:
+                connection.close()
+
+        with mock.patch.object(InvitationManager, 'bulk_issue', autospec=True, side_effect=slow_bulk_issue):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                issued = list(executor.map(issue, range(2)))
+
+        self.assertEqual(sorted(issued), [0, 5])
+        self.assertEqual(Invitation.objects.filter(issued_by=issuer, used=False).count(), 5)
@@ -0,0 +1,125 @@
+"""Leaderboard tests."""
+
+# Django
+from django.test import SimpleTestCase
+
+# Utilities
+from cride.utils.leaderboards import Leaderboard
+from unittest import mock
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis sorted set commands used by leaderboards."""
+
+    def __init__(self):
+        self.sets = {}
+
+    @staticmethod
+    def encode(member):
+        return str(member).encode()
+
+    def zincrby(self, key, amount, member):
+        scores = self.sets.setdefault(key, {})
+        member = self.encode(member)
+        scores[member] = scores.get(member, 0.0) + amount
+        return scores[member]
+
+    def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update({self.encode(member): float(score) for member, score in mapping.items()})
+        return len(mapping)
+
+    def zrem(self, key, member):
+        scores = self.sets.get(key, {})
+        removed = scores.pop(self.encode(member), None) is not None
+        if not scores:
+            self.sets.pop(key, None)
+        return int(removed)
+
+    def zscore(self, key, member):
+        return self.sets.get(key, {}).get(self.encode(member))
+
+    def zcount(self, key, low, high):
+        exclusive, low = low.startswith('('), float(low.lstrip('('))
+        high = float(high)
+        return sum(
+            1 for score in self.sets.get(key, {}).values()
+            if (score > low or not exclusive and score == low) and score <= high
+        )
+
+    def zrevrange(self, key, start, end, withscores=False):
+        entries = sorted(self.sets.get(key, {}).items(), key=lambda entry: (entry[1], entry[0]), reverse=True)
+        entries = entries[start:end + 1 if end >= 0 else None]
+        return entries if withscores else [member for member, _ in entries]
+
+    def delete(self, *keys):
+        return sum(self.sets.pop(key, None) is not None for key in keys)
+
+    def rename(self, source, destination):
+        if source not in self.sets:
+            raise KeyError('ERR no such key')
+        self.sets[destination] = self.sets.pop(source)
+
+
+class LeaderboardTestCase(SimpleTestCase):
+    """Redis sorted set leaderboard test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(Leaderboard, 'redis', lambda leaderboard: self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.leaderboard = Leaderboard('leaderboards:test')
+
+    def test_competition_ranks(self):
+        """Ties share a rank and the next rank skips past them."""
+        self.leaderboard.increment(1, 5)
+        self.leaderboard.increment(2, 3)
+        self.leaderboard.increment(3, 3)
+        self.leaderboard.increment(2, 0)
+        self.leaderboard.set(4, 1)
+
+        self.assertEqual(sorted(self.leaderboard.top(3)), [(1, 5, 1), (2, 3, 2), (3, 3, 2)])
+        self.assertEqual(self.leaderboard.top(10)[-1], (4, 1, 4))
+        self.assertEqual(self.leaderboard.rank(1), (5, 1))
+        self.assertEqual(self.leaderboard.rank(3), (3, 2))
+        self.assertEqual(self.leaderboard.rank(4), (1, 4))
+
+    def test_unscored_members(self):
+        """Ids with no score rank after every scored one."""
+        self.assertEqual(self.leaderboard.rank(1), (0, 1))
+        self.assertEqual(self.leaderboard.top(3), [])
+
+        self.leaderboard.increment(1, 2)
+        self.leaderboard.increment(2, 1)
+        self.assertEqual(self.leaderboard.rank(9), (0, 3))
+
+        self.leaderboard.set(2, 0)
+        self.assertEqual(self.leaderboard.rank(2), (0, 2))
+        self.assertEqual(self.leaderboard.top(3), [(1, 2, 1)])
+
+    def test_replace_renames_over_existing_ranking(self):
+        """Rebuilding swaps the whole ranking in, dropping members left out."""
+        self.leaderboard.increment(1, 9)
+        self.leaderboard.increment(2, 4)
+
+        written = self.leaderboard.replace(iter([(2, 7), (3, 0), (4, 2), (5, 7)]), batch_size=2)
+
+        self.assertEqual(written, 3)
+        self.assertEqual(sorted(self.leaderboard.top(10)), [(2, 7, 1), (4, 2, 3), (5, 7, 1)])
+        self.assertEqual(self.leaderboard.rank(1), (0, 4))
+        self.assertEqual(set(self.redis.sets), {'leaderboards:test'})
+
+    def test_replace_with_no_scores_drops_ranking(self):
+        """Rebuilding from nothing but zeros leaves no key behind."""
+        self.leaderboard.increment(1, 9)
+        self.assertEqual(self.leaderboard.replace([(1, 0)]), 0)
+        self.assertEqual(self.redis.sets, {})
+
+    def test_errors_are_swallowed(self):
+        """Redis failures fall back to empty rankings instead of failing requests."""
+        with mock.patch.object(FakeRedis, 'zscore', side_effect=ConnectionError('down')), \
+                mock.patch.object(FakeRedis, 'zrevrange', side_effect=ConnectionError('down')), \
+                self.assertLogs('cride.utils.leaderboards', 'WARNING'):
+            self.assertEqual(self.leaderboard.rank(1), (0, None))
+            self.assertEqual(self.leaderboard.top(3), [])
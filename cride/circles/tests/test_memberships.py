@@ -0,0 +1,245 @@
+"""Membership tests."""
+
+# Django
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import RideStatDelta
+from cride.users.models import User, Profile
+from rest_framework.authtoken.models import Token
+
+# Utilities
+from datetime import timedelta
+from io import StringIO
+import csv
+import tempfile
+
+
+class MembershipListQueriesTestCase(APITestCase):
+    """Member list query count test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.admin = self.add_member('jestrada')
+        token = Token.objects.create(user=self.admin).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/members/'
+
+    def add_member(self, username, invited_by=None):
+        """Create a user, its profile and its membership."""
+        user = User.objects.create(email=f'{username}@mail.com', username=username)
+        profile = Profile.objects.create(user=user)
+        Membership.objects.create(user=user, profile=profile, circle=self.circle, invited_by=invited_by)
+        return user
+
+    def count_queries(self):
+        """Return the number of queries issued by a full member list page."""
+        self.client.get(self.url)  # Warm the membership cache.
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), len(response.data['results'])
+
+    def test_list_queries_are_constant(self):
+        """Rendering more members issues no extra queries."""
+        queries, rendered = self.count_queries()
+        self.assertEqual(rendered, 1)
+
+        for i in range(5):
+            self.add_member(f'member{i}', invited_by=self.admin)
+        self.assertEqual(self.count_queries(), (queries, 6))
+
+    def test_sparse_fields(self):
+        """Only the picked fields are rendered and fetched."""
+        for i in range(3):
+            self.add_member(f'member{i}', invited_by=self.admin)
+        self.client.get(self.url)  # Warm the membership cache.
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'limit': 100, 'fields': 'user.username,is_admin'})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        usernames = {member['user']['username'] for member in results}
+        self.assertEqual(usernames, {'jestrada', 'member0', 'member1', 'member2'})
+        self.assertEqual(results[0], {'user': {'username': results[0]['user']['username']}, 'is_admin': False})
+
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('users_profile', sql)
+        self.assertNotIn('ridestatdelta', sql)
+        self.assertNotIn('"users_user"."email"', sql)
+
+
+class MembershipResolverTestCase(APITestCase):
+    """Cached membership resolver test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.user = User.objects.create(email='jestrada@mail.com', username='jestrada')
+        profile = Profile.objects.create(user=self.user)
+        self.membership = Membership.objects.create(user=self.user, profile=profile, circle=self.circle)
+        token = Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/rides/'
+
+    def offer_ride(self):
+        """Offer a ride and return the response and the membership queries it made."""
+        departure = timezone.now() + timedelta(days=1)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, {
+                'available_seats': 2,
+                'departure_location': 'Zona 10',
+                'departure_date': departure.isoformat(),
+                'arrival_location': 'Antigua',
+                'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+            })
+        queries = [query for query in context.captured_queries if 'FROM "circles_membership"' in query['sql']]
+        return response, len(queries)
+
+    def test_warm_requests_skip_membership_queries(self):
+        """The permission and the serializer share one cached lookup."""
+        response, queries = self.offer_ride()
+        self.assertEqual((response.status_code, queries), (201, 1))
+
+        response, queries = self.offer_ride()
+        self.assertEqual((response.status_code, queries), (201, 0))
+
+    def test_membership_changes_invalidate(self):
+        """Saving a membership drops the cached map."""
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.membership.is_active = False
+        self.membership.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class MemberImportTestCase(APITestCase):
+    """Bulk member import test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        for username in ('ana', 'bob', 'eve', 'member'):
+            user = User.objects.create(email=f'{username}@mail.com', username=username)
+            Profile.objects.create(user=user)
+        User.objects.create(email='noprofile@mail.com', username='noprofile')
+        self.member = User.objects.get(username='member')
+        Membership.objects.create(user=self.member, profile=self.member.profile, circle=self.circle)
+
+    def run_import(self, content, suffix, *args):
+        """Import `content` from a file and return the command's (stdout, stderr)."""
+        stdout, stderr = StringIO(), StringIO()
+        with tempfile.NamedTemporaryFile('w', suffix=suffix) as file:
+            file.write(content)
+            file.flush()
+            call_command('import_circle_members', 'fciencias', file.name, '--batch-size=2', *args,
+                         stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def members(self):
+        """Return the usernames of the circle members."""
+        return set(Membership.objects.filter(circle=self.circle).values_list('user__username', flat=True))
+
+    def test_csv_import(self):
+        """Valid rows become members and every other row is reported."""
+        self.assertEqual(Membership.objects.resolve(User.objects.get(username='ana'), self.circle), None)
+        stdout, stderr = self.run_import(
+            'name,email\n'
+            'Ana,ana@mail.com\n'
+            'Bob,bob@mail.com\n'
+            'Ana,ana@mail.com\n'
+            'Nadie,nobody@mail.com\n'
+            'Nope,not-an-email\n'
+            'Member,member@mail.com\n'
+            'No profile,noprofile@mail.com\n',
+            '.csv'
+        )
+
+        self.assertEqual(self.members(), {'ana', 'bob', 'member'})
+        self.assertEqual(stderr.splitlines(), [
+            'line 4: ana@mail.com: already a member',
+            'line 5: nobody@mail.com: unknown user',
+            'line 6: not-an-email: invalid email',
+            'line 7: member@mail.com: already a member',
+            'line 8: noprofile@mail.com: user has no profile',
+        ])
+        self.assertIn('Imported 2 members into fciencias from 7 rows (5 failed)', stdout)
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 3)
+        self.assertIsNotNone(Membership.objects.resolve(User.objects.get(username='ana'), self.circle))
+
+    def test_ndjson_import_respects_limit(self):
+        """Rows past the members limit are reported instead of imported."""
+        Circle.objects.filter(pk=self.circle.pk).update(is_limited=True, members_limit=3)
+        _, stderr = self.run_import(
+            '{"email": "ana@mail.com"}\n"bob@mail.com"\n\n{"email": "eve@mail.com"}\n{oops\n',
+            '.ndjson', '--invited-by=member'
+        )
+
+        self.assertEqual(self.members(), {'member', 'ana', 'bob'})
+        self.assertEqual(stderr.splitlines(), [
+            'line 4: eve@mail.com: circle is full',
+            'line 5: {oops: invalid email',
+        ])
+        self.assertEqual(Membership.objects.get(user__username='ana').invited_by, self.member)
+        self.circle.refresh_from_db()
+        self.assertEqual(self.circle.members_count, 3)
+
+    def test_import_drops_inviter_breakdown(self):
+        """Members imported on behalf of an inviter show up in its cached invitations breakdown."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.member).key}')
+        url = f'/circles/{self.circle.slug_name}/members/{self.member.username}/invitations/'
+        self.assertEqual(self.client.get(url).data['used_invitations'], [])
+
+        self.run_import('ana@mail.com\nbob@mail.com\n', '.ndjson', '--invited-by=member')
+
+        used = self.client.get(url).data['used_invitations']
+        self.assertEqual({member['user']['username'] for member in used}, {'ana', 'bob'})
+
+
+class MemberExportAPITestCase(APITestCase):
+    """Member export test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.admin = self.add_member('jestrada', is_admin=True)
+        self.add_member('ana', invited_by=self.admin.user)
+        self.add_member('bob', is_active=False)
+        RideStatDelta.objects.record(circle=self.circle, membership=self.admin,
+                                     profile=self.admin.profile, rides_offered=2)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.admin.user).key}')
+        self.url = f'/circles/{self.circle.slug_name}/members/export/'
+
+    def add_member(self, username, **fields):
+        """Create a user, its profile and its membership."""
+        user = User.objects.create(email=f'{username}@mail.com', username=username)
+        profile = Profile.objects.create(user=user)
+        return Membership.objects.create(user=user, profile=profile, circle=self.circle, **fields)
+
+    def test_csv(self):
+        """Every member is exported with the fields of the member list."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row['username'] for row in rows], ['jestrada', 'ana', 'bob'])
+        self.assertEqual(rows[0]['rides_offered'], '2')
+        self.assertEqual(rows[1]['invited_by'], 'jestrada')
+        self.assertEqual(rows[2]['is_active'], 'False')
+
+    def test_admins_only(self):
+        """Regular members can't export the circle."""
+        ana = User.objects.get(username='ana')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=ana).key}')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
@@ -2,6 +2,9 @@
 
 # Django REST framework
 from rest_framework import viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
 
 # Permissions
 from rest_framework.permissions import IsAuthenticated
@@ -14,11 +17,16 @@ from cride.circles.models import Circle
 from cride.circles.usecases.create_circle import CreateCircleUseCase
 
 # Serializers
-from cride.circles.serializers import CircleModelSerializer
+from cride.circles.serializers import CircleModelSerializer, CircleRankSerializer, LeaderboardQuerySerializer
+from cride.utils.serializers import eager_load
 
  # Filters
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from cride.utils.search import TrigramSearchFilter
+
+# Utilities
+from cride.circles.leaderboards import leaderboards
 
 
 class CircleViewSet(mixins.CreateModelMixin,
@@ -33,15 +41,15 @@ class CircleViewSet(mixins.CreateModelMixin,
     lookup_field = 'slug_name'
 
     # Filters
-    filter_backends = (SearchFilter, OrderingFilter, DjangoFilterBackend)
+    filter_backends = (OrderingFilter, TrigramSearchFilter, DjangoFilterBackend)
     filter_fields = ('verified', 'is_limited')
 
     # Search fields
     search_fields = ('slug_name', 'name')
 
     # ordering
-    ordering_fields = ('rides_offered', 'rides_taken', 'name', 'created', 'member_limit')
-    ordering = ('-members__count', '-rides_offered', '-rides_taken')
+    ordering_fields = ('members_count', 'rides_offered', 'rides_taken', 'name', 'created', 'members_limit')
+    ordering = ('-members_count', '-rides_offered', '-rides_taken')
 
     def get_queryset(self):
         """
@@ -53,7 +61,28 @@ class CircleViewSet(mixins.CreateModelMixin,
         if self.action == 'list':
             queryset = Circle.objects.filter(is_public=True)
 
-        return queryset
+        return eager_load(queryset, self.get_serializer_class(), self.get_serializer_context())
+
+    @action(detail=False, methods=['GET'])
+    def leaderboard(self, request, *args, **kwargs):
+        """
+        Rank public circles by rides offered or taken (`?by=`).
+
+        With `?circle=<slug_name>` the rank of that circle is included.
+        """
+        query = LeaderboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        field, limit = query.validated_data['by'], query.validated_data['limit']
+
+        data = {
+            'by': field,
+            'results': CircleRankSerializer(leaderboards.top_circles(field, limit), many=True).data,
+        }
+        if 'circle' in request.query_params:
+            circle = get_object_or_404(Circle, slug_name=request.query_params['circle'])
+            score, rank = leaderboards.circle_rank(circle, field)
+            data['circle'] = {'slug_name': circle.slug_name, 'rank': rank, 'score': score}
+        return Response(data)
 
     def perform_create(self, serializer):
         """
@@ -1,5 +1,10 @@
 """Circle membership views"""
 
+# Django
+from django.core.cache import cache
+from django.db.models import ExpressionWrapper, F, IntegerField
+from django.http import Http404
+
 # Django REST Framework
 from rest_framework import viewsets, mixins, status
 from rest_framework.generics import get_object_or_404
@@ -8,13 +13,24 @@ from rest_framework.response import Response
 
 # Models
 from cride.circles.models import Circle, Membership, Invitation
+from cride.rides.models import RideStatDelta
+from cride.taskapp.models import OutboxMessage
 
 # Serializers
-from cride.circles.serializers import MembershipModelSerializer, AddMemberSerializer
+from cride.circles.serializers import (MembershipModelSerializer, AddMemberSerializer, LeaderboardQuerySerializer,
+                                      MemberRankSerializer)
+from cride.utils.serializers import eager_load
+
+# Tasks
+from cride.taskapp.tasks import issue_missing_invitations
+
+# Utilities
+from cride.circles.leaderboards import leaderboards
+from cride.utils.exports import export_format, export_response
 
 # Permissions
 from rest_framework.permissions import IsAuthenticated
-from cride.circles.permissions import IsActiveCircleMember, IsSelfMember
+from cride.circles.permissions import IsActiveCircleMember, IsCircleAdmin, IsSelfMember
 
 
 class MembershipViewSet(mixins.ListModelMixin,
@@ -33,11 +49,10 @@ class MembershipViewSet(mixins.ListModelMixin,
         """
         Verify that circle exists.
         """
-        slug_name = kwargs['slug_name']
-        self.circle = get_object_or_404(
-            Circle,
-            slug_name=slug_name
-        )
+        try:
+            self.circle = Circle.objects.get_by_slug(kwargs['slug_name'])
+        except Circle.DoesNotExist:
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
     def get_permissions(self):
@@ -49,16 +64,20 @@ class MembershipViewSet(mixins.ListModelMixin,
         if self.action == 'invitations':
             permissions.append(IsSelfMember)
 
+        if self.action == 'export':
+            permissions.append(IsCircleAdmin)
+
         return [p() for p in permissions]
 
     def get_queryset(self):
         """
         Return circle members
         """
-        return Membership.objects.filter(
+        queryset = Membership.objects.filter(
             circle=self.circle,
             is_active=True
         )
+        return eager_load(queryset, self.get_serializer_class(), self.get_serializer_context())
 
     def get_object(self):
         """
@@ -86,24 +105,29 @@ class MembershipViewSet(mixins.ListModelMixin,
         Will return a list containing all the members that have
         used it's invitations and another list containing invitations
         that haven't being used yet.
+
+        The breakdown is cached until the member issues codes or one of
+        the members it invited changes. Codes the member is still owed
+        are issued by a task instead of on the request path, queued
+        unless one is already waiting to be published.
         """
 
         member = self.get_object()
 
-        invited_members = Membership.objects.filter(circle=self.circle,
-                                                    invited_by=request.user,
-                                                    is_active=True)
+        key = Invitation.objects.breakdown_key(self.circle.pk, request.user.pk)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data=data)
 
-        unused_invitations = Invitation.objects.filter(circle=self.circle,
-                                                       issued_by=request.user,
-                                                       used=False).values_list('code',
-                                                                               flat=True)
+        invited_members = eager_load(Membership.objects.filter(circle=self.circle,
+                                                               invited_by=request.user,
+                                                               is_active=True),
+                                     MembershipModelSerializer)
 
-        difference_between_invitations = member.remaining_invitations - len(unused_invitations)
-
-        for i in range(0, difference_between_invitations):
-            unused_invitations.append(Invitation.objects.create(issued_by=request.user,
-                                                                circle=self.circle).code)
+        unused_invitations = list(Invitation.objects.filter(circle=self.circle,
+                                                            issued_by=request.user,
+                                                            used=False).values_list('code',
+                                                                                    flat=True))
 
         data = {
             'used_invitations': MembershipModelSerializer(invited_members,
@@ -111,8 +135,69 @@ class MembershipViewSet(mixins.ListModelMixin,
             'unused_invitations': unused_invitations
         }
 
+        if member.remaining_invitations > len(unused_invitations):
+            OutboxMessage.objects.enqueue_once(issue_missing_invitations, member.pk)
+        else:
+            cache.set(key, data, Invitation.objects.BREAKDOWN_TIMEOUT)
+
         return Response(data=data)
 
+    @action(detail=False, methods=['GET'])
+    def leaderboard(self, request, *args, **kwargs):
+        """
+        Rank the circle members by rides offered or taken (`?by=`).
+
+        Includes the rank of the requesting member.
+        """
+        query = LeaderboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        field, limit = query.validated_data['by'], query.validated_data['limit']
+
+        membership = Membership.objects.resolve(request.user, self.circle)
+        score, rank = leaderboards.member_rank(self.circle, membership.pk, field)
+        return Response({
+            'by': field,
+            'results': MemberRankSerializer(leaderboards.top_members(self.circle, field, limit), many=True).data,
+            'me': {'rank': rank, 'score': score},
+        })
+
+    @action(detail=False, methods=['GET'])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream every member of the circle as CSV or NDJSON (`?type=`).
+
+        Exports the fields of the member list, active or not, straight
+        from the database without building the whole list in memory.
+        """
+        self.check_object_permissions(request, self.circle)
+        file_format = export_format(request)
+
+        queryset = RideStatDelta.objects.annotate_pending(
+            Membership.objects.filter(circle=self.circle)
+        ).annotate(
+            total_rides_taken=ExpressionWrapper(F('rides_taken') + F('pending_rides_taken'),
+                                                output_field=IntegerField()),
+            total_rides_offered=ExpressionWrapper(F('rides_offered') + F('pending_rides_offered'),
+                                                  output_field=IntegerField()),
+        ).order_by('pk')
+
+        columns = {
+            'username': 'user__username',
+            'first_name': 'user__first_name',
+            'last_name': 'user__last_name',
+            'email': 'user__email',
+            'phone_number': 'user__phone_number',
+            'is_admin': 'is_admin',
+            'is_active': 'is_active',
+            'used_invitations': 'used_invitations',
+            'remaining_invitations': 'remaining_invitations',
+            'rides_taken': 'total_rides_taken',
+            'rides_offered': 'total_rides_offered',
+            'joined_at': 'created',
+            'invited_by': 'invited_by__username',
+        }
+        return export_response(queryset, columns, f'{self.circle.slug_name}-members', file_format)
+
     def create(self, request, *args, **kwargs):
         """Handle member creation from invitation code."""
         serializer = AddMemberSerializer(
@@ -1,6 +1,7 @@
 """Rides app."""
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RidesConfig(AppConfig):
@@ -8,3 +9,15 @@ class RidesConfig(AppConfig):
 
     name = 'cride.rides'
     verbose_name = 'Rides'
+
+    def ready(self):
+        """Index the ride search fields and keep the ride cards in sync."""
+        from cride.utils.search import TrigramIndexes
+        import cride.rides.signals  # noqa: F401
+
+        post_migrate.connect(
+            TrigramIndexes('rides.Ride', ('departure_location', 'arrival_location')),
+            sender=self,
+            weak=False,
+            dispatch_uid='rides_trigram_indexes',
+        )
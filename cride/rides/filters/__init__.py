@@ -0,0 +1 @@
+from cride.rides.filters.rides import *
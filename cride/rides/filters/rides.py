@@ -0,0 +1,92 @@
+"""Ride filters"""
+
+# Django
+from django.db.models import F, Q, Value
+from django.db.models.functions import Power, Radians, Sqrt
+
+# Django REST Framework
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+# Utilities
+from cride.utils.geo import EARTH_RADIUS_KM, covering_ranges, parse_point
+import math
+
+
+class RideProximityFilter(BaseFilterBackend):
+    """
+    Filter rides by distance.
+
+    `?near=lat,lng` keeps rides whose pickup point is within `radius` km,
+    `?destination=lat,lng` does the same for the drop-off point. Candidates
+    are narrowed with indexed geohash range lookups and then filtered and
+    sorted by their distance to the requested points.
+    """
+
+    near_param = 'near'
+    destination_param = 'destination'
+    radius_param = 'radius'
+
+    default_radius = 5
+    max_radius = 100
+
+    def filter_queryset(self, request, queryset, view):
+        """Apply the proximity lookups present in the request."""
+        near = request.query_params.get(self.near_param)
+        destination = request.query_params.get(self.destination_param)
+        if not near and not destination:
+            return queryset
+
+        radius = self.get_radius(request)
+        distances = []
+        if near:
+            queryset, distance = self.filter_point(queryset, 'departure', self.get_point(near), radius)
+            distances.append(distance)
+        if destination:
+            queryset, distance = self.filter_point(queryset, 'arrival', self.get_point(destination), radius)
+            distances.append(distance)
+
+        total_distance = distances[0] if len(distances) == 1 else distances[0] + distances[1]
+        return queryset.annotate(distance=total_distance).order_by('distance', 'departure_date')
+
+    def get_radius(self, request):
+        """Return the requested radius in km."""
+        try:
+            radius = float(request.query_params.get(self.radius_param, self.default_radius))
+        except ValueError:
+            raise ValidationError({self.radius_param: 'Radius must be a number of kilometers.'})
+        if not 0 < radius <= self.max_radius:
+            raise ValidationError({self.radius_param: f'Radius must be between 0 and {self.max_radius} km.'})
+        return radius
+
+    def get_point(self, value):
+        """Parse a `lat,lng` query parameter."""
+        try:
+            return parse_point(value)
+        except ValueError:
+            raise ValidationError('Coordinates must be given as `lat,lng`.')
+
+    @staticmethod
+    def filter_point(queryset, prefix, point, radius):
+        """
+        Restrict the queryset to rides whose `prefix` point is within range.
+
+        Return the filtered queryset and the distance expression used.
+        """
+        latitude, longitude = point
+        cells = Q()
+        for start, end in covering_ranges(latitude, longitude, radius):
+            cell_lookup = Q(**{f'{prefix}_geohash__gte': start})
+            if end:
+                cell_lookup &= Q(**{f'{prefix}_geohash__lt': end})
+            cells |= cell_lookup
+
+        # Equirectangular approximation, accurate enough at ride scale.
+        lng_scale = math.cos(math.radians(latitude))
+        x = Radians(F(f'{prefix}_longitude') - Value(longitude)) * Value(lng_scale)
+        y = Radians(F(f'{prefix}_latitude') - Value(latitude))
+        distance = Sqrt(Power(x, 2) + Power(y, 2)) * Value(EARTH_RADIUS_KM)
+
+        alias = f'{prefix}_distance'
+        queryset = queryset.filter(cells).annotate(**{alias: distance}).filter(**{f'{alias}__lte': radius})
+        return queryset, F(alias)
@@ -0,0 +1,20 @@
+"""Backfill rating aggregates"""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Models
+from cride.rides.models import Rating
+
+
+class Command(BaseCommand):
+    """Recompute the running rating aggregates from the ratings table."""
+
+    help = 'Backfill rating sums, counts and histograms of rides and profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rides, profiles = Rating.objects.backfill(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {rides} rides and {profiles} profiles.'))
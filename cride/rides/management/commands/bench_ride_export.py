@@ -0,0 +1,100 @@
+"""Ride export benchmark"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import Profile, User
+
+# Views
+from cride.rides.views import RideViewSet
+
+# Utilities
+from datetime import timedelta
+import os
+import resource
+import time
+
+
+def current_rss():
+    """Return the resident set size of this process in MB."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+class Command(BaseCommand):
+    """
+    Stream the ride history export of a large circle and sample the RSS.
+
+    Every row is created inside a transaction that is rolled back at the end,
+    so the benchmark can be run against any database.
+    """
+
+    help = 'Benchmark the memory used by the streaming ride export.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rides', type=int, default=1_000_000)
+        parser.add_argument('--samples', type=int, default=10)
+        parser.add_argument('--type', choices=('csv', 'ndjson'), default='csv')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark', email='benchmark@comparteride.com')
+            profile = Profile.objects.create(user=user)
+            circle = Circle.objects.create(name='Benchmark', slug_name='benchmark-export', about='Benchmark')
+            Membership.objects.create(user=user, profile=profile, circle=circle, is_admin=True)
+            self.seed(circle, user, options['rides'])
+
+            view = RideViewSet.as_view({'get': 'export'})
+            request = APIRequestFactory().get('/', {'type': options['type']})
+            force_authenticate(request, user)
+            every = max(options['rides'] // options['samples'], 1)
+
+            start = time.perf_counter()
+            before = current_rss()
+            self.stdout.write(f'RSS before streaming: {before:.1f} MB')
+            response = view(request, slug_name=circle.slug_name)
+            rows = size = 0
+            next_sample = every
+            for chunk in response.streaming_content:
+                rows += chunk.count(b'\n')
+                size += len(chunk)
+                if rows >= next_sample:
+                    self.stdout.write(f'{rows:>9} rows streamed, RSS {current_rss():.1f} MB')
+                    next_sample += every
+            elapsed = time.perf_counter() - start
+
+            self.stdout.write(
+                f'Streamed {rows} lines ({size / 2 ** 20:.0f} MB) in {elapsed:.1f}s, '
+                f'RSS grew {current_rss() - before:.1f} MB'
+            )
+            transaction.set_rollback(True)
+
+    def seed(self, circle, user, rides, batch_size=10_000):
+        """Create `rides` finished rides in batches."""
+        start = timezone.now() - timedelta(days=365)
+        for offset in range(0, rides, batch_size):
+            Ride.objects.bulk_create([
+                Ride(
+                    offered_by=user,
+                    offered_in=circle,
+                    available_seats=i % 4 + 1,
+                    departure_location='Zona 10',
+                    departure_date=start + timedelta(minutes=i),
+                    arrival_location='Antigua',
+                    arrival_date=start + timedelta(minutes=i + 45),
+                    is_active=False,
+                )
+                for i in range(offset, min(offset + batch_size, rides))
+            ])
+        self.stdout.write(f'Seeded {rides} rides')
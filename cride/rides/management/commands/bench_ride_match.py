@@ -0,0 +1,168 @@
+"""Ride matching benchmark"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import Profile, User
+
+# Views
+from cride.rides.views import RideMatchViewSet
+
+# Utilities
+from cride.rides.matching import ride_match_index
+from cride.utils.geo import encode_geohash
+from datetime import timedelta
+import random
+import time
+
+
+class Command(BaseCommand):
+    """
+    Measure cross-circle ride matching latency.
+
+    Seeds upcoming rides spread across many circles, makes a rider an
+    active member of some of them and times both the in-memory match
+    and the whole endpoint. Every row is created inside a transaction
+    that is rolled back at the end.
+    """
+
+    help = 'Benchmark the ride matching engine against many circles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rides', type=int, default=100_000)
+        parser.add_argument('--circles', type=int, default=5_000)
+        parser.add_argument('--memberships', type=int, default=50)
+        parser.add_argument('--days', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=500)
+        parser.add_argument('--radius', type=float, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rider, circles = self.seed(options)
+
+            start = time.perf_counter()
+            ride_match_index.clear()
+            ride_match_index.warm(force=True)
+            self.stdout.write(f'Indexed {len(ride_match_index)} rides in {time.perf_counter() - start:.1f}s')
+
+            trips = [
+                entry for entry in ride_match_index.entries.values() if entry.circle in circles
+            ]
+
+            def match():
+                trip = self.random_trip(trips, options['radius'])
+                return len(ride_match_index.match(circles, **trip))
+
+            view = RideMatchViewSet.as_view({'get': 'list'})
+            factory = APIRequestFactory()
+
+            def endpoint():
+                trip = self.random_trip(trips, options['radius'])
+                request = factory.get('/rides/matches/', {
+                    'origin': '%s,%s' % trip['origin'],
+                    'destination': '%s,%s' % trip['destination'],
+                    'departure_after': trip['departure_after'].isoformat(),
+                    'departure_before': trip['departure_before'].isoformat(),
+                    'radius': trip['radius'],
+                })
+                force_authenticate(request, user=rider)
+                response = view(request)
+                return len(response.data)
+
+            self.report('index match', match, options['repeat'])
+            self.report('match endpoint', endpoint, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        """Create the circles, the rides and a rider member of some circles."""
+        start = time.perf_counter()
+        Circle.objects.bulk_create([
+            Circle(name=f'Circle {index}', slug_name=f'bench-circle-{index}', about='Benchmark')
+            for index in range(options['circles'])
+        ], batch_size=options['batch_size'])
+        circles = list(Circle.objects.filter(slug_name__startswith='bench-circle-').values_list('pk', flat=True))
+
+        driver = User.objects.create(username='bench-driver', email='driver@comparteride.com')
+        rider = User.objects.create(username='bench-rider', email='rider@comparteride.com')
+        profile = Profile.objects.create(user=rider)
+        joined = random.sample(circles, min(options['memberships'], len(circles)))
+        Membership.objects.bulk_create([
+            Membership(user=rider, profile=profile, circle_id=circle) for circle in joined
+        ])
+
+        now = timezone.now()
+        total = options['rides']
+        for offset in range(0, total, options['batch_size']):
+            batch = []
+            for _ in range(min(options['batch_size'], total - offset)):
+                departure_point, arrival_point = self.random_point(), self.random_point()
+                departure_date = now + timedelta(seconds=random.uniform(600, options['days'] * 86400))
+                batch.append(Ride(
+                    offered_by=driver,
+                    offered_in_id=random.choice(circles),
+                    available_seats=3,
+                    departure_location='Benchmark',
+                    arrival_location='Benchmark',
+                    departure_date=departure_date,
+                    arrival_date=departure_date + timedelta(hours=1),
+                    departure_latitude=departure_point[0],
+                    departure_longitude=departure_point[1],
+                    departure_geohash=encode_geohash(*departure_point),
+                    arrival_latitude=arrival_point[0],
+                    arrival_longitude=arrival_point[1],
+                    arrival_geohash=encode_geohash(*arrival_point),
+                ))
+            Ride.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Ride._meta.db_table}')
+        self.stdout.write(
+            f'Seeded {total} rides in {len(circles)} circles in {time.perf_counter() - start:.1f}s, '
+            f'rider is a member of {len(joined)}'
+        )
+        return rider, set(joined)
+
+    def random_trip(self, entries, radius):
+        """Return a trip close to a random ride, with a six hours window around its departure."""
+        entry = random.choice(entries)
+        departure_after = max(entry.departure - timedelta(hours=random.uniform(0, 6)), timezone.now())
+        return {
+            'origin': self.jitter(entry.departure_latitude, entry.departure_longitude),
+            'destination': self.jitter(entry.arrival_latitude, entry.arrival_longitude),
+            'departure_after': departure_after,
+            'departure_before': departure_after + timedelta(hours=6),
+            'radius': radius,
+            'limit': 20,
+        }
+
+    @staticmethod
+    def jitter(latitude, longitude):
+        """Return a point about a kilometer away."""
+        return latitude + random.uniform(-0.01, 0.01), longitude + random.uniform(-0.01, 0.01)
+
+    @staticmethod
+    def random_point():
+        """Return a point around Guatemala City."""
+        return 14.6 + random.uniform(-0.5, 0.5), -90.5 + random.uniform(-0.5, 0.5)
+
+    def report(self, label, query, repeat):
+        """Run `query` and print latency percentiles in milliseconds."""
+        timings = []
+        matches = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches += query()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p50, p99 = (timings[min(len(timings) - 1, int(len(timings) * q))] for q in (0.5, 0.99))
+        self.stdout.write(
+            f'{label}: p50 {p50:.2f} ms, p99 {p99:.2f} ms, {matches / repeat:.1f} matches per query'
+        )
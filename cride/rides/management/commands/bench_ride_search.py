@@ -0,0 +1,111 @@
+"""Ride search benchmark"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Models
+from cride.circles.models import Circle
+from cride.rides.models import Ride
+from cride.users.models import User
+
+# Filters
+from cride.rides.filters import RideProximityFilter
+
+# Utilities
+from cride.utils.geo import encode_geohash
+from datetime import timedelta
+import random
+import statistics
+import time
+
+PLACES = ('Zona 1', 'Zona 10', 'Mixco', 'Villa Nueva', 'Antigua', 'Cayala', 'Oakland', 'Carretera a El Salvador')
+
+
+class Command(BaseCommand):
+    """
+    Compare the `icontains` search with the geohash proximity lookup.
+
+    Every row is created inside a transaction that is rolled back at the end,
+    so the benchmark can be run against any database.
+    """
+
+    help = 'Benchmark ride search against a circle with many rides.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rides', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--radius', type=float, default=2)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            circle = self.seed(options['rides'], options['batch_size'])
+            rides = Ride.objects.filter(offered_in=circle)
+
+            def search():
+                term = random.choice(PLACES)
+                query = rides.filter(Q(departure_location__icontains=term) | Q(arrival_location__icontains=term))
+                return query.count(), list(query.order_by('departure_date')[:3])
+
+            def near():
+                point = self.random_point()
+                query, distance = RideProximityFilter.filter_point(rides, 'departure', point, options['radius'])
+                query = query.order_by(distance.name)
+                return query.count(), list(query[:3])
+
+            self.report('icontains search', search, options['repeat'])
+            self.report(f'near search ({options["radius"]} km)', near, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, total, batch_size):
+        """Create a circle holding `total` rides."""
+        user = User.objects.create(username='benchmark', email='benchmark@comparteride.com')
+        circle = Circle.objects.create(name='Benchmark', slug_name='benchmark-rides', about='Benchmark')
+        departure = timezone.now() + timedelta(days=1)
+
+        start = time.perf_counter()
+        for offset in range(0, total, batch_size):
+            batch = []
+            for _ in range(min(batch_size, total - offset)):
+                departure_point = self.random_point()
+                arrival_point = self.random_point()
+                batch.append(Ride(
+                    offered_by=user,
+                    offered_in=circle,
+                    departure_location=random.choice(PLACES),
+                    arrival_location=random.choice(PLACES),
+                    departure_date=departure,
+                    arrival_date=departure + timedelta(hours=1),
+                    departure_latitude=departure_point[0],
+                    departure_longitude=departure_point[1],
+                    departure_geohash=encode_geohash(*departure_point),
+                    arrival_latitude=arrival_point[0],
+                    arrival_longitude=arrival_point[1],
+                    arrival_geohash=encode_geohash(*arrival_point),
+                ))
+            Ride.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Ride._meta.db_table}')
+        self.stdout.write(f'Seeded {total} rides in {time.perf_counter() - start:.1f}s')
+        return circle
+
+    @staticmethod
+    def random_point():
+        """Return a point around Guatemala City."""
+        return 14.6 + random.uniform(-0.5, 0.5), -90.5 + random.uniform(-0.5, 0.5)
+
+    def report(self, label, query, repeat):
+        """Run `query` and print latency percentiles in milliseconds."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count, _ = query()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(
+            f'{label}: median {statistics.median(timings):.1f} ms, p95 {p95:.1f} ms, last match count {count}'
+        )
@@ -0,0 +1,39 @@
+"""Check ride cards"""
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Models
+from cride.rides.models import Ride, RideCard
+
+
+class Command(BaseCommand):
+    """
+    Compare the ride cards with the rides they render.
+
+    Reports missing cards, cards that differ from a fresh render and
+    cards of rides that are no longer upcoming. Fails unless `--fix`
+    is given, in which case the offending cards are rebuilt.
+    """
+
+    help = 'Check the ride card projection against the rides table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--fix', action='store_true', help='Rebuild inconsistent cards.')
+
+    def handle(self, *args, **options):
+        report = RideCard.objects.check_consistency(batch_size=options['batch_size'])
+        rides = [ride for ids in report.values() for ride in ids]
+        if not rides:
+            self.stdout.write(self.style.SUCCESS('Ride cards are consistent.'))
+            return
+
+        for kind, ids in report.items():
+            if ids:
+                self.stdout.write(f'{kind}: {len(ids)} ({", ".join(map(str, ids[:20]))})')
+
+        if not options['fix']:
+            raise CommandError(f'{len(rides)} inconsistent ride cards.')
+        RideCard.objects.refresh(Ride.objects.filter(pk__in=rides))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rides)} ride cards.'))
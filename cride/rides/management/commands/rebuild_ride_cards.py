@@ -0,0 +1,20 @@
+"""Rebuild ride cards"""
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Models
+from cride.rides.models import RideCard
+
+
+class Command(BaseCommand):
+    """Render the card of every upcoming ride and drop the rest."""
+
+    help = 'Rebuild the ride card projection from the rides table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = RideCard.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} ride cards.'))
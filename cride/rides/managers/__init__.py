@@ -0,0 +1,4 @@
+from cride.rides.managers.stats import RideStatDeltaManager
+from cride.rides.managers.cards import RideCardManager
+from cride.rides.managers.ratings import RatingManager
+from cride.rides.managers.rides import RideManager
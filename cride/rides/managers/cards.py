@@ -0,0 +1,136 @@
+"""Ride card managers"""
+
+# Django
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Utilities
+import json
+import threading
+
+
+class RideCardManager(models.Manager):
+    """
+    Ride card manager.
+
+    Keeps the ride card projection in sync with the rides it renders.
+    """
+
+    pending = threading.local()
+
+    def upcoming_rides(self):
+        """Return the rides that should have a card."""
+        Ride = self.model._meta.get_field('ride').related_model
+        return Ride.objects.filter(is_active=True, departure_date__gt=timezone.now())
+
+    def render(self, rides):
+        """Return a card for each ride in the queryset."""
+        from cride.rides.serializers import RideModelSerializer
+        from cride.utils.serializers import eager_load
+
+        return [
+            self.model(ride=ride,
+                       circle_id=ride.offered_in_id,
+                       departure_date=ride.departure_date,
+                       arrival_date=ride.arrival_date,
+                       available_seats=ride.available_seats,
+                       data=json.loads(json.dumps(RideModelSerializer(ride).data)))
+            for ride in eager_load(rides, RideModelSerializer)
+        ]
+
+    def refresh(self, rides):
+        """
+        Rebuild the cards of the given rides.
+
+        Rides that are no longer upcoming lose their card.
+        """
+        ids = list(rides.values_list('pk', flat=True))
+        if not ids:
+            return 0
+        cards = self.render(self.upcoming_rides().filter(pk__in=ids))
+        with transaction.atomic(using=self.db):
+            self.filter(ride_id__in=ids).delete()
+            self.bulk_create(cards)
+        return len(cards)
+
+    def refresh_on_commit(self, rides=(), users=(), profiles=(), circles=()):
+        """
+        Rebuild some cards once the current transaction commits.
+
+        Covers the given rides, the upcoming rides where the given users
+        or profile owners drive or ride, and the rides carded in the
+        given circles. Everything requested during a transaction is
+        merged and rendered once, in a single on-commit callback.
+        """
+        connection = transaction.get_connection(self.db)
+        pending = getattr(self.pending, self.db, None)
+        # A rollback discards the callback along with what it collected.
+        if pending is None or not any(entry[1] is pending['flush'] for entry in connection.run_on_commit):
+            pending = {'rides': set(), 'users': set(), 'profiles': set(), 'circles': set()}
+            pending['flush'] = lambda: self.flush(pending)
+            setattr(self.pending, self.db, pending)
+            scheduled = False
+        else:
+            scheduled = True
+
+        pending['rides'].update(rides)
+        pending['users'].update(users)
+        pending['profiles'].update(profiles)
+        pending['circles'].update(circles)
+        if not scheduled:
+            transaction.on_commit(pending['flush'], using=self.db)
+
+    def flush(self, pending):
+        """Rebuild the cards collected by `refresh_on_commit`."""
+        if getattr(self.pending, self.db, None) is pending:
+            setattr(self.pending, self.db, None)
+        Ride = self.model._meta.get_field('ride').related_model
+
+        ids = set(pending['rides'])
+        users, profiles = pending['users'], pending['profiles']
+        if users or profiles:
+            ids.update(self.upcoming_rides().filter(
+                Q(offered_by__in=users) | Q(passengers__in=users)
+                | Q(offered_by__profile__in=profiles) | Q(passengers__profile__in=profiles)
+            ).values_list('pk', flat=True))
+        if pending['circles']:
+            ids.update(Ride.objects.filter(card__circle__in=pending['circles']).values_list('pk', flat=True))
+        return self.refresh(Ride.objects.filter(pk__in=ids))
+
+    def rebuild(self, batch_size=500):
+        """Rebuild every card, dropping the ones of past rides."""
+        self.exclude(ride__in=self.upcoming_rides()).delete()
+        ids = list(self.upcoming_rides().values_list('pk', flat=True))
+        total = 0
+        for start in range(0, len(ids), batch_size):
+            total += self.refresh(self.upcoming_rides().filter(pk__in=ids[start:start + batch_size]))
+        return total
+
+    def check_consistency(self, batch_size=500):
+        """
+        Compare the stored cards with freshly rendered ones.
+
+        Return a dict with the ride ids of missing, stale and orphaned cards.
+        """
+        report = {'missing': [], 'stale': [], 'orphaned': []}
+        report['orphaned'] = list(
+            self.exclude(ride__in=self.upcoming_rides()).values_list('ride_id', flat=True)
+        )
+
+        ids = list(self.upcoming_rides().values_list('pk', flat=True))
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            stored = {card.ride_id: card for card in self.filter(ride_id__in=chunk)}
+            for card in self.render(self.upcoming_rides().filter(pk__in=chunk)):
+                current = stored.get(card.ride_id)
+                if current is None:
+                    report['missing'].append(card.ride_id)
+                elif self.fields(current) != self.fields(card):
+                    report['stale'].append(card.ride_id)
+        return report
+
+    @staticmethod
+    def fields(card):
+        """Return the stored values of a card."""
+        return (card.circle_id, card.departure_date, card.arrival_date, card.available_seats, card.data)
@@ -0,0 +1,98 @@
+"""Rating managers"""
+
+# Django
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, Func
+
+
+class RatingAverage(Func):
+    """`round(total / count, 1)` computed by the database."""
+
+    arg_joiner = ' * 1.0 / '
+    template = 'ROUND(%(expressions)s, 1)'
+    output_field = FloatField()
+
+
+class RatingManager(models.Manager):
+    """
+    Rating manager.
+
+    Keeps the running rating aggregates of rides and profiles up to
+    date as ratings are created, so averages never rescan history.
+    """
+
+    STARS = range(1, 6)
+
+    def record(self, circle, ride, rating_user, rated_user, rating, comments=''):
+        """Create a rating and add it to the ride and driver aggregates."""
+        from cride.users.models import Profile
+        Ride = self.model._meta.get_field('ride').related_model
+
+        with transaction.atomic(using=self.db):
+            Ride.objects.filter(pk=ride.pk).update(
+                rating=self.average(rating),
+                **self.increments(rating)
+            )
+            Profile.objects.filter(user=rated_user).update(
+                reputation=self.average(rating),
+                **self.increments(rating)
+            )
+            return self.create(circle=circle,
+                               ride=ride,
+                               rating_user=rating_user,
+                               rated_user=rated_user,
+                               rating=rating,
+                               comments=comments)
+
+    @staticmethod
+    def increments(rating):
+        """Return the F() updates adding `rating` to the aggregates."""
+        return {
+            'rating_sum': F('rating_sum') + rating,
+            'rating_count': F('rating_count') + 1,
+            f'rating_{rating}': F(f'rating_{rating}') + 1,
+        }
+
+    @staticmethod
+    def average(rating):
+        """Return the average after adding `rating`, from the pre-update row."""
+        return RatingAverage(F('rating_sum') + rating, F('rating_count') + 1)
+
+    def backfill(self, batch_size=1000):
+        """
+        Recompute every ride and profile aggregate from the ratings table.
+
+        Return the number of rides and profiles with ratings.
+        """
+        from cride.users.models import Profile
+        Ride = self.model._meta.get_field('ride').related_model
+
+        with transaction.atomic(using=self.db):
+            rides = self._backfill(Ride, 'ride', 'pk', 'rating', batch_size)
+            profiles = self._backfill(Profile, 'rated_user', 'user', 'reputation', batch_size)
+        return rides, profiles
+
+    def _backfill(self, model, group, key, average, batch_size):
+        """Rebuild the aggregates of `model` rows matched by `key` from ratings grouped by `group`."""
+        fields = ['rating_sum', 'rating_count'] + [f'rating_{stars}' for stars in self.STARS]
+        totals = {}
+        rows = self.filter(rating__in=self.STARS).exclude(**{group: None}) \
+            .values_list(group, 'rating').annotate(ratings=Count('pk')).order_by()
+        for target, rating, ratings in rows:
+            stats = totals.setdefault(target, dict.fromkeys(fields, 0))
+            stats['rating_sum'] += rating * ratings
+            stats['rating_count'] += ratings
+            stats[f'rating_{rating}'] += ratings
+
+        model.objects.filter(rating_count__gt=0).update(**dict.fromkeys(fields, 0))
+        attname = model._meta.pk.attname if key == 'pk' else model._meta.get_field(key).attname
+        targets = sorted(totals)
+        for start in range(0, len(targets), batch_size):
+            instances = list(model.objects.filter(**{f'{key}__in': targets[start:start + batch_size]}))
+            for instance in instances:
+                stats = totals[getattr(instance, attname)]
+                for field, value in stats.items():
+                    setattr(instance, field, value)
+                setattr(instance, average, round(stats['rating_sum'] / stats['rating_count'], 1))
+            model.objects.bulk_update(instances, fields + [average], batch_size=batch_size)
+        return len(targets)
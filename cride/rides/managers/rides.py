@@ -0,0 +1,60 @@
+"""Ride managers"""
+
+# Django
+from django.db import connections, models, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+
+class RideManager(models.Manager):
+    """
+    Ride manager.
+
+    Expires rides once they arrive.
+    """
+
+    def due(self, now=None):
+        """Return the active rides that have already arrived."""
+        return self.filter(is_active=True, arrival_date__lte=now or timezone.now())
+
+    def expire(self, batch_size=500, max_batches=100, now=None):
+        """
+        Deactivate arrived rides in bounded batches.
+
+        Each batch is claimed and updated in its own short transaction,
+        oldest arrival first, using the partial index over active rides.
+        Batches are claimed with SKIP LOCKED when the database supports
+        it, so overlapping runs never wait on each other. A run stops
+        after `max_batches`; whatever is left is reported as backlog.
+
+        Return a dict with the number of rides expired, the rides still
+        due after the run and the lag in seconds between the oldest of
+        them and the run, 0 when none is left.
+        """
+        from cride.rides.models import RideCard
+
+        connection = connections[self.db]
+        now = now or timezone.now()
+        expired = 0
+
+        for _ in range(max_batches):
+            with transaction.atomic(using=self.db):
+                batch = self.due(now).order_by('arrival_date')
+                if connection.features.has_select_for_update_skip_locked:
+                    batch = batch.select_for_update(skip_locked=True)
+                ids = list(batch.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                self.filter(pk__in=ids).update(is_active=False, modified=timezone.now())
+                RideCard.objects.filter(ride_id__in=ids).delete()
+
+            expired += len(ids)
+            if len(ids) < batch_size:
+                break
+
+        pending = self.due(now).aggregate(backlog=Count('pk'), oldest=Min('arrival_date'))
+        return {
+            'expired': expired,
+            'backlog': pending['backlog'],
+            'lag': (now - pending['oldest']).total_seconds() if pending['oldest'] else 0.0,
+        }
@@ -0,0 +1,95 @@
+"""Ride stats managers"""
+
+# Django
+from django.db import connections, models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+class RideStatDeltaManager(models.Manager):
+    """
+    Ride stat delta manager.
+
+    Records stats increments as cheap inserts and folds them into
+    the circle, membership and profile rows in bulk.
+    """
+
+    TARGETS = ('circle', 'membership', 'profile')
+    FIELDS = ('rides_offered', 'rides_taken')
+
+    def record(self, circle, membership, profile, rides_offered=0, rides_taken=0):
+        """
+        Record an increment for a circle, a membership and a profile.
+
+        `membership` only needs a `pk`, so resolved memberships can be passed.
+        """
+        return self.create(circle=circle,
+                           membership_id=membership.pk,
+                           profile=profile,
+                           rides_offered=rides_offered,
+                           rides_taken=rides_taken)
+
+    def pending(self, instance, field):
+        """
+        Return the increments of `field` not folded into `instance` yet.
+
+        Uses the value annotated by `annotate_pending` when available.
+        """
+        annotated = getattr(instance, f'pending_{field}', None)
+        if annotated is not None:
+            return annotated
+        target = instance._meta.model_name
+        return self.filter(**{target: instance}).aggregate(total=Sum(field))['total'] or 0
+
+    def annotate_pending(self, queryset):
+        """Annotate circles, memberships or profiles with their pending increments."""
+        target = queryset.model._meta.model_name
+        annotations = {}
+        for field in self.FIELDS:
+            totals = self.filter(
+                **{target: OuterRef('pk')}
+            ).order_by().values(target).annotate(total=Sum(field)).values('total')
+            annotations[f'pending_{field}'] = Coalesce(Subquery(totals), 0)
+        return queryset.annotate(**annotations)
+
+    def fold(self, batch_size=1000):
+        """
+        Apply pending increments and delete them.
+
+        Works through the deltas in batches, each one in its own short
+        transaction issuing a single UPDATE per affected row. Batches are
+        claimed with SKIP LOCKED when the database supports it, so
+        concurrent folds never apply the same delta twice.
+
+        Return the number of deltas folded.
+        """
+        connection = connections[self.db]
+        folded = 0
+
+        while True:
+            with transaction.atomic(using=self.db):
+                batch = self.order_by('pk')
+                if connection.features.has_select_for_update_skip_locked:
+                    batch = batch.select_for_update(skip_locked=True)
+                ids = list(batch.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+
+                deltas = self.filter(pk__in=ids)
+                for target in self.TARGETS:
+                    model = self.model._meta.get_field(target).related_model
+                    totals = deltas.order_by(target).values(target).annotate(
+                        **{field: Sum(field) for field in self.FIELDS}
+                    )
+                    for row in totals:
+                        model.objects.filter(pk=row[target]).update(**{
+                            field: F(field) + row[field]
+                            for field in self.FIELDS
+                        })
+                deltas.delete()
+
+            folded += len(ids)
+            if len(ids) < batch_size:
+                break
+
+        return folded
@@ -0,0 +1 @@
+from cride.rides.matching.index import *
@@ -0,0 +1,214 @@
+"""Ride matching index"""
+
+# Django
+from django.utils import timezone
+
+# Models
+from cride.rides.models import Ride
+
+# Utilities
+from cride.utils.geo import KM_PER_DEGREE, cell_size, encode_geohash, haversine
+from collections import namedtuple
+from datetime import timedelta
+import math
+import threading
+import time
+
+__all__ = ('RideMatch', 'RideMatchIndex', 'ride_match_index')
+
+RideMatch = namedtuple('RideMatch', (
+    'ride', 'circle', 'departure', 'departure_latitude', 'departure_longitude',
+    'departure_geohash', 'arrival_latitude', 'arrival_longitude', 'available_seats',
+))
+
+
+class RideMatchIndex:
+    """
+    In-memory index of upcoming geocoded rides.
+
+    Rides are bucketed by departure hour and, inside each bucket, by a
+    geohash prefix of their departure point, so matching a trip only
+    looks at the rides leaving from nearby cells inside the requested
+    window. Each worker process keeps its own copy: the first query
+    loads every upcoming ride, later queries apply the rides modified
+    since the last sync at most every `sync_interval` seconds, and the
+    whole index is rebuilt every `rebuild_interval` seconds to drop
+    deleted rides. Full rides are left out. Matches are checked against
+    the database before being served, so a stale entry can hide a ride
+    for a few seconds but never show an unavailable one.
+
+    Syncs and rebuilds never change the dicts queries read: they build
+    new ones, copying only the buckets and cells they touch, and swap
+    them in, so queries run without the lock.
+    """
+
+    bucket_seconds = 3600
+    precision = 5
+    sync_interval = 5
+    rebuild_interval = 600
+    sync_overlap = timedelta(seconds=5)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """Drop every entry."""
+        self.entries = {}
+        self.buckets = {}
+        self.synced_at = None
+        self.checked_at = 0.0
+        self.built_at = 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def warm(self, force=False):
+        """Load or refresh the index when it is due."""
+        clock = time.monotonic()
+        if not force and clock - self.checked_at < self.sync_interval:
+            return
+        with self.lock:
+            if not force and clock - self.checked_at < self.sync_interval:
+                return
+            if force or self.synced_at is None or clock - self.built_at >= self.rebuild_interval:
+                self.rebuild()
+            else:
+                self.sync()
+            self.checked_at = time.monotonic()
+
+    def rebuild(self):
+        """Load every upcoming ride."""
+        now = timezone.now()
+        entries, buckets, fresh = {}, {}, {}
+        rides = self.rides().filter(departure_date__gt=now, is_active=True, available_seats__gte=1)
+        for ride in rides.iterator(chunk_size=5000):
+            self.add(ride, entries, buckets, fresh)
+        self.entries, self.buckets = entries, buckets
+        self.synced_at = now
+        self.built_at = time.monotonic()
+
+    def sync(self):
+        """Apply the rides modified since the last sync."""
+        now = timezone.now()
+        rides = list(self.rides('is_active').filter(modified__gte=self.synced_at - self.sync_overlap))
+        if rides:
+            entries, buckets, fresh = dict(self.entries), dict(self.buckets), {}
+            for *row, is_active in rides:
+                self.discard(row[0], entries, buckets, fresh)
+                entry = RideMatch(*row)
+                if is_active and entry.departure > now and entry.available_seats >= 1:
+                    self.add(entry, entries, buckets, fresh)
+            self.entries, self.buckets = entries, buckets
+        self.synced_at = now
+
+    @staticmethod
+    def rides(*extra):
+        """Return the rows the index is built from."""
+        return Ride.objects.exclude(departure_geohash='').exclude(arrival_geohash='').order_by().values_list(
+            'pk', 'offered_in_id', 'departure_date', 'departure_latitude', 'departure_longitude',
+            'departure_geohash', 'arrival_latitude', 'arrival_longitude', 'available_seats', *extra
+        )
+
+    def bucket(self, departure):
+        """Return the time bucket of a departure date."""
+        return int(departure.timestamp() // self.bucket_seconds)
+
+    @staticmethod
+    def writable(parent, key, fresh):
+        """
+        Return a copy of `parent[key]` that can be changed, stored in `parent`.
+
+        `fresh` holds the dicts created by the current update, which are
+        not visible to queries yet and are changed in place.
+        """
+        child = parent.get(key)
+        if child is None or id(child) not in fresh:
+            child = dict(child or {})
+            parent[key] = child
+            fresh[id(child)] = child
+        return child
+
+    def add(self, row, entries, buckets, fresh):
+        """Index a ride row into new `entries` and `buckets`."""
+        entry = RideMatch(*row)
+        entries[entry.ride] = entry
+        cells = self.writable(buckets, self.bucket(entry.departure), fresh)
+        self.writable(cells, entry.departure_geohash[:self.precision], fresh)[entry.ride] = entry
+
+    def discard(self, ride, entries, buckets, fresh):
+        """Remove a ride from new `entries` and `buckets`, if present."""
+        entry = entries.pop(ride, None)
+        if entry is None:
+            return
+        key = self.bucket(entry.departure)
+        prefix = entry.departure_geohash[:self.precision]
+        if ride not in buckets.get(key, {}).get(prefix, {}):
+            return
+        cells = self.writable(buckets, key, fresh)
+        cell = self.writable(cells, prefix, fresh)
+        del cell[ride]
+        if not cell:
+            del cells[prefix]
+        if not cells:
+            del buckets[key]
+
+    def match(self, circles, origin, destination, departure_after, departure_before, radius, limit=None):
+        """
+        Return the best `limit` matches as (score, origin km, destination km, entry), all by default.
+
+        Candidates must belong to one of `circles`, depart inside the
+        window and have both ends within `radius` km of the trip. They
+        are ranked by the sum of both distances, then departure date.
+        """
+        self.warm()
+        buckets = self.buckets
+        prefixes = self.prefixes(origin, radius)
+        matches = []
+        for key in range(self.bucket(departure_after), self.bucket(departure_before) + 1):
+            cells = buckets.get(key)
+            if not cells:
+                continue
+            for cell in self.cells(cells, prefixes):
+                for entry in cell.values():
+                    if entry.circle not in circles or not departure_after <= entry.departure <= departure_before:
+                        continue
+                    origin_km = haversine(*origin, entry.departure_latitude, entry.departure_longitude)
+                    if origin_km > radius:
+                        continue
+                    destination_km = haversine(*destination, entry.arrival_latitude, entry.arrival_longitude)
+                    if destination_km > radius:
+                        continue
+                    matches.append((origin_km + destination_km, entry.departure, origin_km, destination_km, entry))
+        matches.sort(key=lambda match: match[:2])
+        return [(score, origin_km, destination_km, entry)
+                for score, _, origin_km, destination_km, entry in matches[:limit]]
+
+    def prefixes(self, origin, radius):
+        """Return the indexed cells overlapping the bounding box of the search circle."""
+        latitude, longitude = origin
+        height, width = cell_size(self.precision)
+        lat_delta = radius / KM_PER_DEGREE
+        lng_delta = radius / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+
+        cells = set()
+        for lat in self.span(latitude, lat_delta, height):
+            for lng in self.span(longitude, lng_delta, width):
+                lat = min(max(lat, -90.0), 90.0)
+                lng = (lng + 180.0) % 360.0 - 180.0
+                cells.add(encode_geohash(lat, lng, self.precision))
+        return cells
+
+    @staticmethod
+    def span(center, delta, step):
+        """Return points from `center - delta` to `center + delta`, `step` apart."""
+        return [center - delta + step * index for index in range(int(2 * delta / step) + 1)] + [center + delta]
+
+    def cells(self, cells, prefixes):
+        """Yield the indexed cells among the covering ones."""
+        for prefix in prefixes:
+            cell = cells.get(prefix)
+            if cell:
+                yield cell
+
+ride_match_index = RideMatchIndex()
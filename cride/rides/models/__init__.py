@@ -1,2 +1,4 @@
 from cride.rides.models.rides import *
 from cride.rides.models.ratings import *
+from cride.rides.models.stats import *
+from cride.rides.models.cards import *
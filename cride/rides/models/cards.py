@@ -0,0 +1,45 @@
+"""Ride card models"""
+
+# Django
+from django.db import models
+
+# Managers
+from cride.rides.managers import RideCardManager
+
+
+class RideCard(models.Model):
+    """
+    Ride card.
+
+    Denormalized projection of an upcoming ride holding exactly what
+    the ride list renders: the ride, its driver and passengers with
+    their profiles, seats left and circle name. Kept in sync by the
+    signals in `cride.rides.signals`, so the feed is a single indexed
+    read with no joins.
+    """
+
+    ride = models.OneToOneField('rides.Ride',
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='card')
+    circle = models.ForeignKey('circles.Circle',
+                               on_delete=models.CASCADE,
+                               null=True,
+                               related_name='+')
+
+    departure_date = models.DateTimeField()
+    arrival_date = models.DateTimeField()
+    available_seats = models.PositiveSmallIntegerField()
+
+    data = models.JSONField(help_text='Ride as rendered by the ride list.')
+
+    objects = RideCardManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['circle', 'departure_date', 'arrival_date', 'available_seats', 'ride']),
+        ]
+
+    def __str__(self):
+        """Return the ride the card renders."""
+        return f'Card of ride #{self.ride_id}'
@@ -6,6 +6,37 @@ from django.db import models
 # Utilities
 from cride.utils.models import CRideModel
 
+# Managers
+from cride.rides.managers import RatingManager
+
+
+RATING_STATS_FIELDS = ('rating_sum', 'rating_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5')
+
+
+class RatingStats(models.Model):
+    """
+    Running rating aggregates.
+
+    Updated with F() expressions as each rating is created; see
+    `RatingManager.record`.
+    """
+
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField('1 star ratings', default=0)
+    rating_2 = models.PositiveIntegerField('2 star ratings', default=0)
+    rating_3 = models.PositiveIntegerField('3 star ratings', default=0)
+    rating_4 = models.PositiveIntegerField('4 star ratings', default=0)
+    rating_5 = models.PositiveIntegerField('5 star ratings', default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating_histogram(self):
+        """Return the number of ratings per star."""
+        return {str(stars): getattr(self, f'rating_{stars}') for stars in RatingManager.STARS}
+
 
 class Rating(CRideModel):
     """Model to manage user qualifications of a ride"""
@@ -28,6 +59,8 @@ class Rating(CRideModel):
                                 blank=True)
     rating = models.PositiveSmallIntegerField(default=1)
 
+    objects = RatingManager()
+
     def __str__(self):
         """String model representation"""
         return '@{} rated {} @{}'.format(self.rating_user.username,
@@ -2,12 +2,18 @@
 
 # Django
 from django.db import models
+from django.db.models import Q
 
 # Utilities
 from cride.utils.models import CRideModel
+from cride.utils.geo import encode_geohash
+from cride.rides.models.ratings import RatingStats
 
+# Managers
+from cride.rides.managers import RideManager
 
-class Ride(CRideModel):
+
+class Ride(CRideModel, RatingStats):
     """Ride model"""
     offered_by = models.ForeignKey('users.User',
                                    on_delete=models.SET_NULL,
@@ -27,12 +33,48 @@ class Ride(CRideModel):
     arrival_location = models.CharField(max_length=255)
     arrival_date = models.DateTimeField()
 
+    # Geolocation
+    departure_latitude = models.FloatField(null=True, blank=True)
+    departure_longitude = models.FloatField(null=True, blank=True)
+    departure_geohash = models.CharField(max_length=12,
+                                         blank=True,
+                                         help_text='Computed from the departure coordinates.')
+    arrival_latitude = models.FloatField(null=True, blank=True)
+    arrival_longitude = models.FloatField(null=True, blank=True)
+    arrival_geohash = models.CharField(max_length=12,
+                                       blank=True,
+                                       help_text='Computed from the arrival coordinates.')
+
     rating = models.FloatField(null=True)
 
     is_active = models.BooleanField('active status',
                                     default=True,
                                     help_text='Used for disabling the ride or marking it as finished')
 
+    objects = RideManager()
+
+    class Meta(CRideModel.Meta):
+        indexes = [
+            models.Index(fields=['offered_in', 'departure_date', 'arrival_date', 'available_seats', 'id']),
+            models.Index(fields=['offered_in', 'departure_geohash']),
+            models.Index(fields=['offered_in', 'arrival_geohash']),
+            models.Index(fields=['arrival_date'], condition=Q(is_active=True), name='rides_ride_active_arrival'),
+            models.Index(fields=['modified']),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Keep geohashes in sync with the coordinates."""
+        self.departure_geohash = self._geohash(self.departure_latitude, self.departure_longitude)
+        self.arrival_geohash = self._geohash(self.arrival_latitude, self.arrival_longitude)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def _geohash(latitude, longitude):
+        """Return the geohash of a coordinate, blank if it isn't geocoded."""
+        if latitude is None or longitude is None:
+            return ''
+        return encode_geohash(latitude, longitude)
+
     def __str__(self):
         """Return ride details"""
         return '{_from} to {to} | {day} {i_time} - {f_time}'.format(
@@ -0,0 +1,60 @@
+"""Ride stats models"""
+
+# Django
+from django.db import models
+
+# Utilities
+from cride.utils.models import CRideModel
+
+# Managers
+from cride.rides.managers import RideStatDeltaManager
+
+
+class RideStatDelta(CRideModel):
+    """
+    Pending ride stats increment.
+
+    Offering or taking a ride appends one of these instead of updating
+    the circle, membership and profile rows on the request path; a
+    periodic task folds them into those rows in bulk.
+    """
+
+    circle = models.ForeignKey('circles.Circle',
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    membership = models.ForeignKey('circles.Membership',
+                                   on_delete=models.CASCADE,
+                                   related_name='+')
+    profile = models.ForeignKey('users.Profile',
+                                on_delete=models.CASCADE,
+                                related_name='+')
+
+    rides_offered = models.SmallIntegerField(default=0)
+    rides_taken = models.SmallIntegerField(default=0)
+
+    objects = RideStatDeltaManager()
+
+    class Meta(CRideModel.Meta):
+        ordering = ['pk']
+
+    def __str__(self):
+        """Return the increment."""
+        return f'#{self.circle_id}: +{self.rides_offered} offered, +{self.rides_taken} taken'
+
+
+class RideStatsMixin:
+    """
+    Ride stats including increments not folded yet.
+
+    Expects the model to have `rides_offered` and `rides_taken` fields.
+    """
+
+    @property
+    def total_rides_offered(self):
+        """Return stored plus pending rides offered."""
+        return self.rides_offered + RideStatDelta.objects.pending(self, 'rides_offered')
+
+    @property
+    def total_rides_taken(self):
+        """Return stored plus pending rides taken."""
+        return self.rides_taken + RideStatDelta.objects.pending(self, 'rides_taken')
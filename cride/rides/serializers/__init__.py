@@ -1 +1,3 @@
-from cride.rides.serializers.rides import *
\ No newline at end of file
+from cride.rides.serializers.rides import *
+from cride.rides.serializers.ratings import *
+from cride.rides.serializers.matches import *
@@ -0,0 +1,70 @@
+"""Ride match serializers"""
+
+# Django
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework import serializers
+
+# Serializers
+from cride.rides.serializers.rides import RideModelSerializer
+
+# Utilities
+from cride.utils.geo import parse_point
+from datetime import timedelta
+
+
+class RideMatchQuerySerializer(serializers.Serializer):
+    """
+    Ride match query serializer.
+
+    Validate the trip to match: `lat,lng` origin and destination, a
+    departure window (the next six hours by default) and a radius in km.
+    """
+
+    max_window = timedelta(days=7)
+    default_window = timedelta(hours=6)
+
+    origin = serializers.CharField()
+    destination = serializers.CharField()
+    departure_after = serializers.DateTimeField(required=False)
+    departure_before = serializers.DateTimeField(required=False)
+    radius = serializers.FloatField(min_value=0.1, max_value=100, default=5)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_origin(self, data):
+        """Parse the origin point."""
+        return self.parse(data)
+
+    def validate_destination(self, data):
+        """Parse the destination point."""
+        return self.parse(data)
+
+    def validate(self, data):
+        """Fill in and verify the departure window."""
+        now = timezone.now()
+        departure_after = max(data.get('departure_after', now), now)
+        departure_before = data.get('departure_before', departure_after + self.default_window)
+        if departure_before <= departure_after:
+            raise serializers.ValidationError('Departure window must end after it starts.')
+        if departure_before - departure_after > self.max_window:
+            raise serializers.ValidationError('Departure window can\'t be longer than 7 days.')
+        data['departure_after'] = departure_after
+        data['departure_before'] = departure_before
+        return data
+
+    @staticmethod
+    def parse(data):
+        """Parse a `lat,lng` point."""
+        try:
+            return parse_point(data)
+        except ValueError:
+            raise serializers.ValidationError('Coordinates must be given as `lat,lng`.')
+
+
+class RideMatchSerializer(RideModelSerializer):
+    """Ride match serializer."""
+
+    circle = serializers.SlugRelatedField(source='offered_in', slug_field='slug_name', read_only=True)
+    origin_distance = serializers.FloatField(read_only=True)
+    destination_distance = serializers.FloatField(read_only=True)
@@ -1,8 +1,5 @@
 """Rating class serializers"""
 
-# Django
-from django.db.models import Avg
-
 # Django REST Framework
 from rest_framework import serializers
 
@@ -29,39 +26,21 @@ class CreateRideRatingSerializer(serializers.ModelSerializer):
         if not ride.passengers.filter(pk=user.pk).exists():
             raise serializers.ValidationError('Current user isn\'t a passenger')
 
-        query = Rating.objects.filter(rating_by=user,
+        query = Rating.objects.filter(rating_user=user,
                                       ride=ride,
                                       circle=self.context['circle'])
 
         if query.exists():
             raise serializers.ValidationError('Rating already issued.')
+        return attrs
 
     def create(self, validated_data):
-        """Create rating."""
-        offered_by = self.context['ride'].offered_by
-
-        Rating.objects.create(
-            circle=self.context['circle'],
-            ride=self.context['ride'],
-            rating_user=self.context['request'].user,
-            rated_user=offered_by,
-            **validated_data
-        )
-
-        ride_average = round(
-            Rating.objects.create(circle=self.context['circle'],
-                                  ride=self.context['ride']
-                                  ).aggregate(Avg('rating'))['rating__avg'], 1)
-        self.context['ride'].rating = ride_average
-        self.context['ride'].save()
-
-        user_avg = round(
-            Rating.objects.filter(
-                rated_user=offered_by
-            ).aggregate(Avg('rating'))['rating__avg'],
-            1
-        )
-        offered_by.profile.reputation = user_avg
-        offered_by.profile.save()
-
-        return self.context['ride']
+        """Create rating and update the ride and driver aggregates."""
+        ride = self.context['ride']
+        Rating.objects.record(circle=self.context['circle'],
+                              ride=ride,
+                              rating_user=self.context['request'].user,
+                              rated_user=ride.offered_by,
+                              **validated_data)
+        ride.refresh_from_db()
+        return ride
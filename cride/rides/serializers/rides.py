@@ -1,22 +1,27 @@
 """Ride serializers"""
 
+# Django
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
 # Django REST Framework
 from rest_framework import serializers
 
 # Models
-from cride.rides.models import Ride
+from cride.rides.models import Ride, RideCard, RideStatDelta, RATING_STATS_FIELDS
 from cride.circles.models import Membership
 from cride.users.models import User
 
 # Serializers
 from cride.users.serializers import UserModelSerializer
+from cride.utils.serializers import DynamicFieldsMixin
 
 # Utilities
 from datetime import timedelta
 from django.utils import timezone
 
 
-class RideModelSerializer(serializers.ModelSerializer):
+class RideModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Ride model serializer"""
 
     offered_by = UserModelSerializer(read_only=True)
@@ -29,7 +34,9 @@ class RideModelSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('offered_by',
                             'offered_in',
-                            'rating')
+                            'rating',
+                            'departure_geohash',
+                            'arrival_geohash') + RATING_STATS_FIELDS
 
     def update(self, instance, validated_data):
         """Prevent an update when ride is stared"""
@@ -52,7 +59,15 @@ class CreateRideSerializer(serializers.ModelSerializer):
         exclude = ('offered_in',
                    'passengers',
                    'rating',
-                   'is_active')
+                   'is_active',
+                   'departure_geohash',
+                   'arrival_geohash') + RATING_STATS_FIELDS
+        extra_kwargs = {
+            'departure_latitude': {'min_value': -90, 'max_value': 90},
+            'departure_longitude': {'min_value': -180, 'max_value': 180},
+            'arrival_latitude': {'min_value': -90, 'max_value': 90},
+            'arrival_longitude': {'min_value': -180, 'max_value': 180},
+        }
 
     @staticmethod
     def validate_departure_date(attr):
@@ -74,16 +89,17 @@ class CreateRideSerializer(serializers.ModelSerializer):
         if self.context['request'].user != user:
             serializers.ValidationError('Rides offered on behalf of others are not allowed.')
 
-        try:
-            membership = Membership.objects.get(user=user,
-                                                circle=circle,
-                                                is_active=True)
-        except Membership.DoesNotExist:
+        membership = Membership.objects.resolve(user, circle)
+        if membership is None:
             raise serializers.ValidationError('User is not an active member of the circle.')
 
         if attrs['arrival_date'] <= attrs['departure_date']:
             raise serializers.ValidationError('Departure date must happen after of arrival date.')
 
+        for point in ('departure', 'arrival'):
+            if (attrs.get(f'{point}_latitude') is None) ^ (attrs.get(f'{point}_longitude') is None):
+                raise serializers.ValidationError(f'Both {point} latitude and longitude must be provided.')
+
         self.context['membership'] = membership
 
         return attrs
@@ -93,19 +109,10 @@ class CreateRideSerializer(serializers.ModelSerializer):
         circle = self.context['circle']
         ride = Ride.objects.create(**validated_data, offered_in=circle)
 
-        # Circle
-        circle.rides_offered += 1
-        circle.save()
-
-        # Membership
-        membership = self.context['membership']
-        membership.rides_offered += 1
-        membership.save()
-
-        # Profile
-        profile = validated_data['offered_by'].profile
-        profile.rides_offered += 1
-        profile.save()
+        RideStatDelta.objects.record(circle=circle,
+                                     membership=self.context['membership'],
+                                     profile=validated_data['offered_by'].profile,
+                                     rides_offered=1)
 
         return ride
 
@@ -128,16 +135,8 @@ class JoinRideSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Invalid passenger.')
 
         circle = self.context['circle']
-        if not Membership.objects.filter(user=user,
-                                         circle=circle,
-                                         is_active=True).exists:
-            raise serializers.ValidationError('User is not an active member of the circle.')
-
-        try:
-            membership = Membership.objects.get(user=user,
-                                                circle=circle,
-                                                is_active=True)
-        except Membership.DoesNotExist:
+        membership = Membership.objects.resolve(user, circle)
+        if membership is None:
             raise serializers.ValidationError('User is not an active member of the circle.')
 
         self.context['user'] = user
@@ -155,35 +154,45 @@ class JoinRideSerializer(serializers.ModelSerializer):
         if ride.available_seats < 1:
             raise serializers.ValidationError('Ride is already full')
 
-        if Ride.objects.filter(passengers__pk=attrs['passenger']):
+        if ride.passengers.filter(pk=attrs['passenger']).exists():
             raise serializers.ValidationError('Passenger is already in this trip.')
 
+        return attrs
+
     def update(self, instance, validated_data):
-        """Add passenger to ride, and update stats"""
+        """
+        Add passenger to ride, and update stats.
+
+        The seat is claimed with a single conditional UPDATE, so concurrent
+        joins can't overbook the ride, and the passenger and stats increment
+        are added in the same transaction so a failed insert gives the seat back.
+        """
         ride = self.context['ride']
         circle = self.context['circle']
         user = self.context['user']
 
-        ride.passengers.add(user)
-
-        # Instance
-        ride.avaialbe_seats -= 1
-        ride.save()
-
-        # Profile
-        profile = user.profile
-        profile.rides_taken += 1
-        profile.save()
-
-        # Membership
-        member = self.context['member']
-        member.rides_taken += 1
-        member.save()
-
-        # Circle
-        circle.rides_taken += 1
-        circle.save()
+        try:
+            with transaction.atomic():
+                reserved = Ride.objects.filter(
+                    pk=ride.pk,
+                    available_seats__gt=0
+                ).update(available_seats=F('available_seats') - 1,
+                         modified=timezone.now())
+                if not reserved:
+                    raise serializers.ValidationError('Ride is already full')
+
+                # Through rows send no post_save, so ask for the card here.
+                Ride.passengers.through.objects.create(ride=ride, user=user)
+                RideCard.objects.refresh_on_commit(rides=[ride.pk])
+
+                RideStatDelta.objects.record(circle=circle,
+                                             membership=self.context['member'],
+                                             profile=user.profile,
+                                             rides_taken=1)
+        except IntegrityError:
+            raise serializers.ValidationError('Passenger is already in this trip.')
 
+        ride.refresh_from_db(fields=['available_seats', 'modified'])
         return ride
 
 
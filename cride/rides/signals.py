@@ -0,0 +1,85 @@
+"""
+Rides signals
+
+Card refreshes are collected during the transaction and rendered once
+it commits, however many signals ask for them.
+"""
+
+# Django
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+# Models
+from cride.circles.models import Circle
+from cride.rides.models import Rating, Ride, RideCard, RideStatDelta
+from cride.users.models import Profile, User
+
+
+@receiver(post_save, sender=Ride, dispatch_uid='ride_card_ride_saved')
+def ride_saved(sender, instance, raw=False, **kwargs):
+    """Render the card of a saved ride."""
+    if not raw:
+        RideCard.objects.refresh_on_commit(rides=[instance.pk])
+
+
+@receiver(m2m_changed, sender=Ride.passengers.through, dispatch_uid='ride_card_passengers_changed')
+def passengers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Render the cards of rides whose passengers changed through the relation manager."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        RideCard.objects.refresh_on_commit(rides=[instance.pk])
+    elif pk_set:
+        RideCard.objects.refresh_on_commit(rides=pk_set)
+    else:
+        RideCard.objects.refresh_on_commit(users=[instance.pk])
+
+
+@receiver(post_save, sender=User, dispatch_uid='ride_card_user_saved')
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Render the cards where the user drives or rides."""
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    RideCard.objects.refresh_on_commit(users=[instance.pk])
+
+
+@receiver(post_save, sender=Profile, dispatch_uid='ride_card_profile_saved')
+def profile_saved(sender, instance, raw=False, **kwargs):
+    """Render the cards where the profile owner drives or rides."""
+    if not raw:
+        RideCard.objects.refresh_on_commit(users=[instance.user_id])
+
+
+@receiver(post_save, sender=RideStatDelta, dispatch_uid='ride_card_stats_recorded')
+def stats_recorded(sender, instance, raw=False, **kwargs):
+    """
+    Render the cards showing the profile's ride totals.
+
+    Folding deltas leaves the totals unchanged, so only recording them
+    needs to refresh the cards.
+    """
+    if not raw:
+        RideCard.objects.refresh_on_commit(profiles=[instance.profile_id])
+
+
+@receiver(post_save, sender=Circle, dispatch_uid='ride_card_circle_saved')
+def circle_saved(sender, instance, raw=False, **kwargs):
+    """Render the cards of the circle's rides."""
+    if not raw:
+        RideCard.objects.refresh_on_commit(circles=[instance.pk])
+
+
+@receiver(post_save, sender=Rating, dispatch_uid='ride_card_rating_saved')
+def rating_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Render the cards showing the rated ride and driver.
+
+    Rating aggregates are updated with queryset updates, which send no
+    signals of their own.
+    """
+    if raw or not created:
+        return
+    RideCard.objects.refresh_on_commit(
+        rides=[instance.ride_id],
+        users=[instance.rated_user_id] if instance.rated_user_id is not None else [],
+    )
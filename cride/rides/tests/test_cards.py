@@ -0,0 +1,193 @@
+"""Ride card tests."""
+
+# Django
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APITransactionTestCase
+
+# Models
+from cride.circles.models import Circle
+from cride.rides.models import Ride, RideCard
+from rest_framework.authtoken.models import Token
+
+# Managers
+from cride.rides.managers import RideCardManager
+
+# Serializers
+from cride.rides.serializers import RideModelSerializer
+
+# Utilities
+from cride.rides.tests.test_join import create_member, create_ride
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+import json
+
+
+def render(ride):
+    """Return the ride as the ride list renders it."""
+    return json.loads(json.dumps(RideModelSerializer(Ride.objects.get(pk=ride.pk)).data))
+
+
+class RideCardSyncTestCase(TransactionTestCase):
+    """
+    Ride card signals test case.
+
+    Cards are refreshed on commit, so the changes are committed.
+    """
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.driver, _ = create_member(self.circle, 'driver')
+        self.ride = create_ride(self.circle, self.driver, seats=3)
+
+    def test_card_follows_ride(self):
+        """Creating and updating a ride renders its card."""
+        card = RideCard.objects.get(ride=self.ride)
+        self.assertEqual(card.data, render(self.ride))
+        self.assertEqual(card.data['offered_in'], 'Facultad de Ciencias')
+
+        self.ride.comments = 'Leaving from the main gate'
+        self.ride.save()
+        self.assertEqual(RideCard.objects.get(ride=self.ride).data['comments'], 'Leaving from the main gate')
+
+        self.ride.is_active = False
+        self.ride.save()
+        self.assertFalse(RideCard.objects.filter(ride=self.ride).exists())
+
+    def test_card_follows_passengers_and_profiles(self):
+        """Passenger and profile changes reach the cards."""
+        passenger, _ = create_member(self.circle, 'passenger')
+        self.ride.passengers.add(passenger)
+        self.assertEqual(RideCard.objects.get(ride=self.ride).data['passengers'][0]['username'], 'passenger')
+
+        passenger.profile.reputation = 4.5
+        passenger.profile.save()
+        self.driver.first_name = 'Julio'
+        self.driver.save()
+        card = RideCard.objects.get(ride=self.ride)
+        self.assertEqual(card.data['passengers'][0]['profile']['reputation'], 4.5)
+        self.assertEqual(card.data['offered_by']['first_name'], 'Julio')
+
+        self.ride.passengers.remove(passenger)
+        self.assertEqual(RideCard.objects.get(ride=self.ride).data['passengers'], [])
+        self.assertEqual(RideCard.objects.check_consistency()['stale'], [])
+
+    def test_check_and_rebuild(self):
+        """The checker reports writes that bypassed the signals."""
+        Ride.objects.filter(pk=self.ride.pk).update(available_seats=2)
+        with self.assertRaises(CommandError):
+            call_command('check_ride_cards', stdout=StringIO())
+
+        call_command('check_ride_cards', '--fix', stdout=StringIO())
+        self.assertEqual(RideCard.objects.get(ride=self.ride).available_seats, 2)
+
+        RideCard.objects.all().delete()
+        self.assertEqual(RideCard.objects.check_consistency()['missing'], [self.ride.pk])
+        call_command('rebuild_ride_cards', stdout=StringIO())
+        call_command('check_ride_cards', stdout=StringIO())
+
+
+class RideCardFeedTestCase(APITransactionTestCase):
+    """Ride feed served from ride cards test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        driver, _ = create_member(self.circle, 'driver')
+        self.user, token = create_member(self.circle, 'member')
+        for seats in (1, 2, 3, 4):
+            ride = create_ride(self.circle, driver, seats=seats)
+            passenger, _ = create_member(self.circle, f'passenger{seats}')
+            ride.passengers.add(passenger)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/rides/'
+
+    def test_feed_matches_rides_table(self):
+        """The card feed renders the same pages in fewer queries."""
+        pages = []
+        for enabled in (False, True):
+            with override_settings(RIDE_FEED_FROM_CARDS=enabled):
+                response = self.client.get(self.url)
+                self.assertEqual(response.status_code, 200)
+                second = self.client.get(response.data['next'])
+                pages.append((json.loads(json.dumps(response.data['results'])), second.data['results']))
+        self.assertEqual(pages[0], pages[1])
+
+        with override_settings(RIDE_FEED_FROM_CARDS=True), CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        selects = [query for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 2)
+
+
+class RideCardRefreshTestCase(APITransactionTestCase):
+    """Ride card refreshes collected per transaction test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.driver, _ = create_member(self.circle, 'driver')
+        self.ride = create_ride(self.circle, self.driver, seats=3)
+
+    def test_join_renders_cards_once(self):
+        """A join saving a passenger and recording stats renders the cards once, after commit."""
+        passenger, token = create_member(self.circle, 'passenger')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+        with mock.patch.object(RideCardManager, 'render', autospec=True,
+                               side_effect=RideCardManager.render) as render:
+            response = self.client.post(f'/circles/{self.circle.slug_name}/rides/{self.ride.pk}/join/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(render.call_count, 1)
+        card = RideCard.objects.get(ride=self.ride)
+        self.assertEqual(card.available_seats, 2)
+        self.assertEqual([user['username'] for user in card.data['passengers']], ['passenger'])
+
+    def test_offer_renders_cards_once(self):
+        """Offering a ride renders the driver's cards once, not once per signal."""
+        token = Token.objects.get(user=self.driver).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        departure = timezone.now() + timedelta(days=2)
+
+        with mock.patch.object(RideCardManager, 'render', autospec=True,
+                               side_effect=RideCardManager.render) as render:
+            response = self.client.post(f'/circles/{self.circle.slug_name}/rides/', {
+                'available_seats': 2,
+                'departure_location': 'Zona 10',
+                'departure_date': departure.isoformat(),
+                'arrival_location': 'Antigua',
+                'arrival_date': (departure + timedelta(hours=1)).isoformat(),
+            })
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(RideCard.objects.count(), 2)
+        self.assertEqual(RideCard.objects.check_consistency()['stale'], [])
+
+    def test_rolled_back_refreshes_are_dropped(self):
+        """Refreshes of a rolled back transaction never run and don't hold back later ones."""
+        with mock.patch.object(RideCardManager, 'render', autospec=True,
+                               side_effect=RideCardManager.render) as render:
+            with transaction.atomic():
+                self.ride.comments = 'Rolled back'
+                self.ride.save()
+                transaction.set_rollback(True)
+            self.assertEqual(render.call_count, 0)
+
+            with transaction.atomic():
+                self.ride.comments = 'Leaving from the main gate'
+                self.ride.save()
+                self.driver.first_name = 'Julio'
+                self.driver.save()
+            self.assertEqual(render.call_count, 1)
+
+        card = RideCard.objects.get(ride=self.ride)
+        self.assertEqual(card.data['comments'], 'Leaving from the main gate')
+        self.assertEqual(card.data['offered_by']['first_name'], 'Julio')
@@ -0,0 +1,109 @@
+"""Ride join tests."""
+
+# Django
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APIClient, APITestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+from rest_framework.authtoken.models import Token
+
+# Utilities
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import threading
+
+
+def create_member(circle, username):
+    """Create a user with a profile, a token and an active membership."""
+    user = User.objects.create(email=f'{username}@mail.com', username=username)
+    profile = Profile.objects.create(user=user)
+    Membership.objects.create(user=user, profile=profile, circle=circle)
+    return user, Token.objects.create(user=user).key
+
+
+def create_ride(circle, driver, seats):
+    """Create a ride departing tomorrow."""
+    departure = timezone.now() + timedelta(days=1)
+    return Ride.objects.create(
+        offered_by=driver,
+        offered_in=circle,
+        available_seats=seats,
+        departure_location='Zona 10',
+        departure_date=departure,
+        arrival_location='Antigua',
+        arrival_date=departure + timedelta(hours=1),
+    )
+
+
+class JoinRideAPITestCase(APITestCase):
+    """Join ride test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        driver, _ = create_member(self.circle, 'driver')
+        self.ride = create_ride(self.circle, driver, seats=1)
+        self.url = f'/circles/{self.circle.slug_name}/rides/{self.ride.pk}/join/'
+
+    def test_join_reserves_seat(self):
+        """Joining takes a seat and updates the passenger stats."""
+        passenger, token = create_member(self.circle, 'passenger')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+        response = self.client.post(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.ride.refresh_from_db()
+        self.assertEqual(self.ride.available_seats, 0)
+        self.assertTrue(self.ride.passengers.filter(pk=passenger.pk).exists())
+        self.assertEqual(Profile.objects.get(user=passenger).total_rides_taken, 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentJoinTestCase(TransactionTestCase):
+    """
+    Many passengers racing for the last seats of one ride.
+
+    Needs a database with row-level locking; SQLite serializes the whole
+    database and its in-memory test database can't be shared by threads.
+    """
+
+    seats = 5
+    passengers = 40
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        driver, _ = create_member(self.circle, 'driver')
+        self.ride = create_ride(self.circle, driver, seats=self.seats)
+        self.tokens = [create_member(self.circle, f'passenger{i}')[1] for i in range(self.passengers)]
+        self.url = f'/circles/{self.circle.slug_name}/rides/{self.ride.pk}/join/'
+
+    def test_no_oversell(self):
+        """Exactly `seats` joins succeed; the rest are rejected cleanly."""
+        barrier = threading.Barrier(self.passengers)
+
+        def join(token):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            barrier.wait()
+            try:
+                return client.post(self.url).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.passengers) as executor:
+            statuses = list(executor.map(join, self.tokens))
+
+        self.assertEqual(statuses.count(200), self.seats)
+        self.assertTrue(all(status in (200, 400, 404) for status in statuses), statuses)
+        self.ride.refresh_from_db()
+        self.assertEqual(self.ride.available_seats, 0)
+        self.assertEqual(self.ride.passengers.count(), self.seats)
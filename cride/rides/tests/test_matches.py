@@ -0,0 +1,171 @@
+"""Ride matching tests."""
+
+# Django
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+
+# Utilities
+from cride.rides.matching import RideMatchIndex, ride_match_index
+from cride.rides.tests.test_join import create_member
+from cride.utils.geo import encode_geohash
+from datetime import timedelta
+from unittest import mock
+import threading
+
+ZONA_10 = (14.6010, -90.5110)
+ANTIGUA = (14.5586, -90.7295)
+
+
+class RideMatchAPITestCase(APITestCase):
+    """Cross-circle ride matching test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        ride_match_index.clear()
+        self.circles = [
+            Circle.objects.create(name=name, slug_name=name.lower(), about=name)
+            for name in ('Ciencias', 'Medicina', 'Derecho')
+        ]
+        self.user, token = create_member(self.circles[0], 'rider')
+        Membership.objects.create(user=self.user, profile=self.user.profile, circle=self.circles[1])
+        self.driver, _ = create_member(self.circles[2], 'driver')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = '/rides/matches/'
+
+    def create_ride(self, circle, departure, arrival, hours=2):
+        """Create a geocoded ride departing in `hours` hours."""
+        departure_date = timezone.now() + timedelta(hours=hours)
+        return Ride.objects.create(
+            offered_by=self.driver,
+            offered_in=circle,
+            available_seats=2,
+            departure_location='Departure',
+            departure_date=departure_date,
+            departure_latitude=departure[0],
+            departure_longitude=departure[1],
+            arrival_location='Arrival',
+            arrival_date=departure_date + timedelta(hours=1),
+            arrival_latitude=arrival[0],
+            arrival_longitude=arrival[1],
+        )
+
+    def match(self, **params):
+        """Match the Zona 10 to Antigua trip."""
+        params = {'origin': '%s,%s' % ZONA_10, 'destination': '%s,%s' % ANTIGUA, **params}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [ride['id'] for ride in response.data]
+
+    def test_matches_across_circles(self):
+        """Rides from every circle of the user are ranked by distance."""
+        exact = self.create_ride(self.circles[1], ZONA_10, ANTIGUA)
+        close = self.create_ride(self.circles[0], (14.6100, -90.5150), (14.5600, -90.7350))
+        self.create_ride(self.circles[2], ZONA_10, ANTIGUA)
+        self.create_ride(self.circles[0], ANTIGUA, ZONA_10)
+        self.create_ride(self.circles[0], ZONA_10, ANTIGUA, hours=10)
+
+        self.assertEqual(self.match(), [exact.pk, close.pk])
+        self.assertEqual(self.match(limit=1), [exact.pk])
+
+    def test_index_follows_changes(self):
+        """Rides modified after the index was loaded are picked up on sync."""
+        ride = self.create_ride(self.circles[0], ZONA_10, ANTIGUA)
+        self.assertEqual(self.match(), [ride.pk])
+        self.assertEqual(len(ride_match_index), 1)
+
+        other = self.create_ride(self.circles[1], ZONA_10, ANTIGUA, hours=3)
+        ride.is_active = False
+        ride.save()
+        ride_match_index.checked_at = 0
+        self.assertEqual(self.match(), [other.pk])
+        self.assertEqual(len(ride_match_index), 1)
+
+    def test_stale_full_rides_are_skipped(self):
+        """Rides that filled up since the last sync don't shrink the response."""
+        full = self.create_ride(self.circles[0], ZONA_10, ANTIGUA)
+        close = self.create_ride(self.circles[0], (14.6100, -90.5150), (14.5600, -90.7350))
+        farther = self.create_ride(self.circles[1], (14.6200, -90.5200), (14.5700, -90.7400))
+        self.assertEqual(self.match(limit=1), [full.pk])
+
+        Ride.objects.filter(pk=full.pk).update(available_seats=0)
+        self.assertEqual(self.match(limit=1), [close.pk])
+        self.assertEqual(self.match(limit=2), [close.pk, farther.pk])
+
+    def test_full_rides_are_not_indexed(self):
+        """Rides synced with no seats left are dropped from the index."""
+        ride = self.create_ride(self.circles[0], ZONA_10, ANTIGUA)
+        self.assertEqual(self.match(), [ride.pk])
+
+        ride.available_seats = 0
+        ride.save()
+        ride_match_index.checked_at = 0
+        self.assertEqual(self.match(), [])
+        self.assertEqual(len(ride_match_index), 0)
+
+    def test_invalid_query(self):
+        """Malformed points and windows are rejected."""
+        response = self.client.get(self.url, {'origin': 'zona 10', 'destination': '%s,%s' % ANTIGUA})
+        self.assertEqual(response.status_code, 400)
+
+        after = timezone.now() + timedelta(hours=1)
+        response = self.client.get(self.url, {'origin': '%s,%s' % ZONA_10,
+                                              'destination': '%s,%s' % ANTIGUA,
+                                              'departure_after': after.isoformat(),
+                                              'departure_before': (after + timedelta(days=8)).isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+
+class RideMatchIndexTestCase(SimpleTestCase):
+    """Ride match index concurrency test case."""
+
+    def row(self, pk, is_active=True):
+        """Return an index row of a ride from Zona 10 to Antigua."""
+        departure = self.departure + timedelta(minutes=pk % 60)
+        return (pk, 1, departure, *ZONA_10, encode_geohash(*ZONA_10, 8), *ANTIGUA, 2, is_active)
+
+    def test_match_during_sync(self):
+        """Queries never see an index being changed by a sync."""
+        self.departure = timezone.now() + timedelta(hours=2)
+        rows = [self.row(pk) for pk in range(1, 2001)]
+        index = RideMatchIndex()
+        index.warm = lambda: None
+        with mock.patch.object(RideMatchIndex, 'rides') as rides:
+            rides.return_value.filter.return_value.iterator.return_value = [row[:-1] for row in rows]
+            index.rebuild()
+        self.assertEqual(len(index), 2000)
+
+        done = threading.Event()
+        errors, counts = [], set()
+
+        def sync():
+            try:
+                for rounds in range(20):
+                    active = rounds % 2 == 1
+                    changes = [self.row(pk, is_active=active or pk % 2) for pk in range(1, 2001)]
+                    with mock.patch.object(RideMatchIndex, 'rides') as rides:
+                        rides.return_value.filter.return_value = changes
+                        index.sync()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                done.set()
+
+        thread = threading.Thread(target=sync)
+        thread.start()
+        try:
+            while not done.is_set():
+                counts.add(len(index.match({1}, ZONA_10, ANTIGUA, self.departure - timedelta(hours=1),
+                                           self.departure + timedelta(hours=2), radius=1)))
+        except Exception as error:
+            errors.append(error)
+        thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(counts, {1000, 2000})
@@ -0,0 +1,73 @@
+"""Ride rating tests."""
+
+# Django
+from django.core.management import call_command
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.circles.models import Circle
+from cride.rides.models import Rating, Ride
+from cride.users.models import Profile
+
+# Utilities
+from cride.rides.tests.test_join import create_member, create_ride
+from datetime import timedelta
+from io import StringIO
+
+
+class RideRatingAPITestCase(APITestCase):
+    """Incremental rating aggregates test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.driver, self.driver_token = create_member(self.circle, 'driver')
+        self.ride = create_ride(self.circle, self.driver, seats=3)
+        self.passengers = []
+        for username in ('ana', 'bob', 'eve'):
+            user, token = create_member(self.circle, username)
+            self.ride.passengers.add(user)
+            self.passengers.append(token)
+        Ride.objects.filter(pk=self.ride.pk).update(departure_date=timezone.now() - timedelta(hours=2),
+                                                    is_active=False)
+        self.url = f'/circles/{self.circle.slug_name}/rides/{self.ride.pk}/rate/'
+
+    def rate(self, token, rating):
+        """Rate the ride as a passenger."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        return self.client.post(self.url, {'rating': rating})
+
+    def test_ratings_update_aggregates(self):
+        """Each rating folds into the ride and driver aggregates."""
+        for token, rating in zip(self.passengers, (5, 4, 4)):
+            response = self.rate(token, rating)
+            self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['rating'], 4.3)
+        self.assertEqual(self.rate(self.passengers[0], 1).status_code, 400)
+
+        profile = Profile.objects.get(user=self.driver)
+        self.assertEqual((profile.rating_sum, profile.rating_count, profile.reputation), (13, 3, 4.3))
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.driver_token}')
+        response = self.client.get(f'/users/{self.driver.username}/ratings/')
+        self.assertEqual(response.data, {
+            'average': 4.3,
+            'count': 3,
+            'histogram': {'1': 0, '2': 0, '3': 0, '4': 2, '5': 1},
+        })
+
+    def test_backfill(self):
+        """The backfill rebuilds the aggregates from existing ratings."""
+        for rating in (2, 3):
+            Rating.objects.create(circle=self.circle, ride=self.ride, rated_user=self.driver, rating=rating)
+        Profile.objects.filter(user=self.driver).update(rating_count=7, rating_5=7)
+
+        call_command('backfill_ratings', stdout=StringIO())
+        profile = Profile.objects.get(user=self.driver)
+        ride = Ride.objects.get(pk=self.ride.pk)
+        self.assertEqual(profile.rating_histogram, {'1': 0, '2': 1, '3': 1, '4': 0, '5': 0})
+        self.assertEqual((profile.rating_count, profile.reputation), (2, 2.5))
+        self.assertEqual((ride.rating_sum, ride.rating), (5, 2.5))
@@ -0,0 +1,248 @@
+"""Ride tests."""
+
+# Django
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import User, Profile
+from rest_framework.authtoken.models import Token
+
+# Utilities
+from cride.rides.tests.test_join import create_member, create_ride
+from cride.utils.geo import covering_cells, encode_geohash, haversine
+from datetime import timedelta
+import csv
+import json
+
+
+class GeohashTestCase(TestCase):
+    """Geohash utilities test case."""
+
+    def test_encode(self):
+        """Known coordinates must produce their reference geohash."""
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+
+    def test_covering_cells_contain_circle(self):
+        """Points inside the radius must fall in one of the covering cells."""
+        cells = covering_cells(14.6, -90.5, 3)
+        for lat, lng in ((14.62, -90.5), (14.6, -90.52), (14.585, -90.485)):
+            self.assertLessEqual(haversine(14.6, -90.5, lat, lng), 3)
+            self.assertTrue(any(encode_geohash(lat, lng).startswith(cell) for cell in cells))
+
+
+class RideProximityAPITestCase(APITestCase):
+    """Ride proximity search test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.user = User.objects.create(
+            first_name='Julio',
+            last_name='Estrada',
+            email='jestrada@mail.com',
+            username='jestrada',
+            password='admin123'
+        )
+        Profile.objects.create(user=self.user)
+
+        self.circle = Circle.objects.create(
+            name='Facultad de Ciencias',
+            slug_name='fciencias',
+            about='Grupo oficial de la facultad de ciencias de la UNAM',
+        )
+        Membership.objects.create(user=self.user, profile=self.user.profile, circle=self.circle)
+
+        departure = timezone.now() + timedelta(days=1)
+        rides = (
+            ('Zona 10', 14.600, -90.510),
+            ('Zona 1', 14.640, -90.513),
+            ('Antigua', 14.557, -90.733),
+        )
+        for location, lat, lng in rides:
+            Ride.objects.create(
+                offered_by=self.user,
+                offered_in=self.circle,
+                departure_location=location,
+                departure_latitude=lat,
+                departure_longitude=lng,
+                departure_date=departure,
+                arrival_location='Mixco',
+                arrival_date=departure + timedelta(hours=1),
+            )
+
+        token = Token.objects.create(user=self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/rides/'
+
+    def test_rides_sorted_by_distance(self):
+        """Only rides within range are returned, closest first."""
+        response = self.client.get(self.url, {'near': '14.635,-90.513', 'radius': 10, 'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        locations = [ride['departure_location'] for ride in response.data['results']]
+        self.assertEqual(locations, ['Zona 1', 'Zona 10'])
+
+    def test_invalid_point(self):
+        """Malformed coordinates are rejected."""
+        response = self.client.get(self.url, {'near': 'north'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_fallback(self):
+        """Text search keeps matching substrings of both locations."""
+        response = self.client.get(self.url, {'search': 'zona', 'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        locations = {ride['departure_location'] for ride in response.data['results']}
+        self.assertEqual(locations, {'Zona 1', 'Zona 10'})
+
+    def test_keyset_pagination(self):
+        """Following the cursors walks every ride exactly once."""
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertIsNone(response.data['previous'])
+        first_page = [ride['departure_location'] for ride in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        second_page = [ride['departure_location'] for ride in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(sorted(first_page + second_page), ['Antigua', 'Zona 1', 'Zona 10'])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([ride['departure_location'] for ride in response.data['results']], first_page)
+
+    def test_pagination_without_count(self):
+        """The total count can be skipped."""
+        response = self.client.get(self.url, {'count': 'false'})
+        self.assertNotIn('count', response.data)
+
+
+class RideListQueriesTestCase(APITestCase):
+    """Ride list query count test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.user, token = create_member(self.circle, 'jestrada')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/rides/'
+
+    def add_rides(self, count):
+        """Create rides from new drivers, each one with two passengers."""
+        for _ in range(count):
+            index = Ride.objects.count()
+            driver, _ = create_member(self.circle, f'driver{index}')
+            ride = create_ride(self.circle, driver, seats=3)
+            for seat in range(2):
+                passenger, _ = create_member(self.circle, f'passenger{index}-{seat}')
+                ride.passengers.add(passenger)
+
+    def count_queries(self):
+        """Return the number of queries issued by a full ride list page."""
+        self.client.get(self.url)  # Warm the membership cache.
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'limit': 100})
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), len(response.data['results'])
+
+    def test_list_queries_are_constant(self):
+        """Rendering more rides, passengers and profiles issues no extra queries."""
+        self.add_rides(1)
+        queries, rendered = self.count_queries()
+        self.assertEqual(rendered, 1)
+
+        self.add_rides(4)
+        self.assertEqual(self.count_queries(), (queries, 5))
+
+    def test_sparse_fields(self):
+        """Passengers and profiles left out aren't fetched."""
+        self.add_rides(2)
+        self.client.get(self.url)  # Warm the membership cache.
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'fields': 'id,departure_location,offered_by.username'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'departure_location', 'offered_by'})
+        self.assertEqual(set(response.data['results'][0]['offered_by']), {'username'})
+
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('rides_ride_passengers', sql)
+        self.assertNotIn('users_profile', sql)
+        self.assertNotIn('"rides_ride"."comments"', sql)
+
+
+class RideExpiryTestCase(TestCase):
+    """Ride expiry test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        driver, _ = create_member(self.circle, 'driver')
+        self.upcoming = create_ride(self.circle, driver, seats=3)
+        for hours in (1, 2, 3, 4, 5):
+            ride = create_ride(self.circle, driver, seats=3)
+            Ride.objects.filter(pk=ride.pk).update(arrival_date=timezone.now() - timedelta(hours=hours))
+
+    def test_expire_in_batches(self):
+        """Arrived rides are expired oldest first, reporting backlog and lag."""
+        report = Ride.objects.expire(batch_size=2, max_batches=2)
+        self.assertEqual((report['expired'], report['backlog']), (4, 1))
+        self.assertGreaterEqual(report['lag'], 3600)
+        self.assertLess(report['lag'], 3660)
+        self.assertGreater(Ride.objects.due().get().arrival_date, timezone.now() - timedelta(hours=1, minutes=1))
+
+        report = Ride.objects.expire(batch_size=2)
+        self.assertEqual((report['expired'], report['backlog'], report['lag']), (1, 0, 0.0))
+        self.assertEqual(list(Ride.objects.filter(is_active=True)), [self.upcoming])
+
+
+class RideExportAPITestCase(APITestCase):
+    """Ride history export test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.admin, token = create_member(self.circle, 'admin')
+        Membership.objects.filter(user=self.admin).update(is_admin=True)
+        self.member, self.member_token = create_member(self.circle, 'member')
+        self.rides = [create_ride(self.circle, self.member, seats=seats) for seats in (1, 2, 3)]
+        Ride.objects.filter(pk=self.rides[0].pk).update(is_active=False)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.url = f'/circles/{self.circle.slug_name}/rides/export/'
+
+    def export(self, **params):
+        """Return the response and its streamed body."""
+        response = self.client.get(self.url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        """Every ride, finished or not, is exported as CSV."""
+        response, body = self.export()
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('fciencias-rides.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual([int(row['id']) for row in rows], [ride.pk for ride in self.rides])
+        self.assertEqual([row['is_active'] for row in rows], ['False', 'True', 'True'])
+        self.assertEqual(rows[0]['offered_by'], 'member')
+        self.assertEqual(rows[0]['departure_date'], self.rides[0].departure_date.isoformat())
+
+    def test_ndjson(self):
+        """NDJSON exports one object per ride."""
+        response, body = self.export(type='ndjson')
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['available_seats'] for row in rows], [1, 2, 3])
+
+    def test_admins_only(self):
+        """Members that don't admin the circle can't export it."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.member_token}')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=self.admin).key}')
+        self.assertEqual(self.client.get(self.url, {'type': 'xml'}).status_code, 400)
@@ -0,0 +1,51 @@
+"""Ride stats tests."""
+
+# Django
+from django.test import TestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import RideStatDelta
+from cride.users.models import User, Profile
+
+
+class RideStatDeltaTestCase(TestCase):
+    """Write-behind ride stats test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.members = []
+        for username in ('driver', 'passenger'):
+            user = User.objects.create(email=f'{username}@mail.com', username=username)
+            profile = Profile.objects.create(user=user)
+            membership = Membership.objects.create(user=user, profile=profile, circle=self.circle)
+            self.members.append((membership, profile))
+
+    def record(self):
+        """Record one ride offered and two rides taken."""
+        driver, passenger = self.members
+        RideStatDelta.objects.record(self.circle, *driver, rides_offered=1)
+        RideStatDelta.objects.record(self.circle, *passenger, rides_taken=1)
+        RideStatDelta.objects.record(self.circle, *passenger, rides_taken=1)
+
+    def test_reads_include_pending(self):
+        """Totals add pending increments to the stored values."""
+        self.record()
+        circle = RideStatDelta.objects.annotate_pending(Circle.objects.all()).get()
+        self.assertEqual((circle.rides_offered, circle.total_rides_offered), (0, 1))
+        self.assertEqual(self.members[1][1].total_rides_taken, 2)
+
+    def test_fold(self):
+        """Folding moves pending increments into the rows."""
+        self.record()
+        self.assertEqual(RideStatDelta.objects.fold(batch_size=2), 3)
+        self.assertFalse(RideStatDelta.objects.exists())
+
+        self.circle.refresh_from_db()
+        self.assertEqual((self.circle.rides_offered, self.circle.rides_taken), (1, 2))
+        membership, profile = self.members[1]
+        membership.refresh_from_db()
+        profile.refresh_from_db()
+        self.assertEqual((membership.rides_taken, profile.rides_taken), (2, 2))
+        self.assertEqual(profile.total_rides_taken, 2)
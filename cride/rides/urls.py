@@ -7,7 +7,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
 # Views
-from cride.rides.views import RideViewSet
+from cride.rides.views import RideMatchViewSet, RideViewSet
 
 router = DefaultRouter()
 router.register(
@@ -15,6 +15,7 @@ router.register(
     RideViewSet,
     basename='ride'
 )
+router.register(r'rides/matches', RideMatchViewSet, basename='ride-match')
 
 urlpatterns = [
     path('', include(router.urls))
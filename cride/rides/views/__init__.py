@@ -1 +1,2 @@
 from cride.rides.views.rides import *
+from cride.rides.views.matches import *
@@ -0,0 +1,81 @@
+"""Ride match views"""
+
+# Django
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework import mixins, viewsets
+from rest_framework.response import Response
+
+# Serializers
+from cride.rides.serializers import RideMatchQuerySerializer, RideMatchSerializer
+
+# Models
+from cride.circles.models import Membership
+from cride.rides.models import Ride
+
+# Permissions
+from rest_framework.permissions import IsAuthenticated
+
+# Utilities
+from cride.rides.matching import ride_match_index
+from cride.utils.serializers import eager_load
+
+
+class RideMatchViewSet(mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Ride match view set.
+
+    Rank the upcoming rides of every circle the requesting user is an
+    active member of against a trip.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = RideMatchSerializer
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        """List the best matches for the requested trip."""
+        query = RideMatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        trip = query.validated_data
+
+        circles = {
+            circle for circle, membership in Membership.objects.memberships(request.user).items()
+            if membership.is_active
+        }
+        limit = trip.pop('limit')
+        matches = ride_match_index.match(circles, **trip)
+
+        results = []
+        for start in range(0, len(matches), limit):
+            results += self.available(matches[start:start + limit], circles)[:limit - len(results)]
+            if len(results) == limit:
+                break
+        return Response(self.get_serializer(results, many=True).data)
+
+    def available(self, matches, circles):
+        """
+        Return the rides of `matches` still open to join, in order.
+
+        The index can lag behind the database, so rides that filled up
+        or were cancelled since the last sync are dropped here.
+        """
+        rides = eager_load(Ride.objects.filter(
+            pk__in=[entry.ride for _, _, _, entry in matches],
+            offered_in__in=circles,
+            is_active=True,
+            available_seats__gte=1,
+            departure_date__gt=timezone.now(),
+        ), self.get_serializer_class()).in_bulk()
+
+        results = []
+        for _, origin_distance, destination_distance, entry in matches:
+            ride = rides.get(entry.ride)
+            if ride is None:
+                continue
+            ride.origin_distance = round(origin_distance, 2)
+            ride.destination_distance = round(destination_distance, 2)
+            results.append(ride)
+        return results
@@ -1,26 +1,38 @@
 """Ride views"""
 
+# Django
+from django.conf import settings
+from django.http import Http404
+
 # Django REST Framework
 from rest_framework import mixins, viewsets, status
-from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
 # Serializers
-from cride.rides.serializers import (CreateRideSerializer, RideModelSerializer, JoinRideSerializer, EndRideSerializer)
+from cride.rides.serializers import (CreateRideSerializer, RideModelSerializer, JoinRideSerializer, EndRideSerializer,
+                                     CreateRideRatingSerializer)
+
+# Pagination
+from cride.utils.pagination import KeysetPagination
 
 # Filters
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from cride.rides.filters import RideProximityFilter
+from cride.utils.search import TrigramSearchFilter
 
 # Models
 from cride.circles.models import Circle
+from cride.rides.models import RideCard
 
 # Permissions
 from rest_framework.permissions import IsAuthenticated
-from cride.circles.permissions import IsActiveCircleMember
+from cride.circles.permissions import IsActiveCircleMember, IsCircleAdmin
 from cride.rides.permissions import IsRideOwner, IsNotRideOwner
 
 # Utilities
+from cride.utils.exports import export_format, export_response
+from cride.utils.serializers import EXPAND_PARAM, FIELDS_PARAM, eager_load
 from django.utils import timezone
 from datetime import timedelta
 
@@ -32,40 +44,45 @@ class RideViewSet(mixins.ListModelMixin,
                   viewsets.GenericViewSet):
     """Ride view set."""
 
-    filter_backends = (SearchFilter, OrderingFilter)
+    pagination_class = KeysetPagination
+    filter_backends = (OrderingFilter, TrigramSearchFilter, RideProximityFilter)
     ordering = ('departure_date', 'arrival_date', 'available_seats')
     ordering_fields = ('departure_date', 'arrival_date', 'available_seats')
     search_fields = ('departure_location', 'arrival_location')
+    card_excluded_params = ('search', 'ordering', 'near', 'destination', FIELDS_PARAM, EXPAND_PARAM)
     circle = None
 
     def dispatch(self, request, *args, **kwargs):
         """
         Verify that circle exists.
         """
-        slug_name = kwargs['slug_name']
-        self.circle = get_object_or_404(
-            Circle,
-            slug_name=slug_name
-        )
+        try:
+            self.circle = Circle.objects.get_by_slug(kwargs['slug_name'])
+        except Circle.DoesNotExist:
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
     def get_permissions(self):
         """Assign permission based on action"""
         permissions = [IsAuthenticated, IsActiveCircleMember]
-        if self.action in ['update', 'partial_update' 'finish']:
+        if self.action in ['update', 'partial_update', 'finish']:
             permissions.append(IsRideOwner)
         if self.action in ['join']:
             permissions.append(IsNotRideOwner)
+        if self.action == 'export':
+            permissions.append(IsCircleAdmin)
         return [p() for p in permissions]
 
     def get_serializer_class(self):
         """Return serializer based on action."""
         if self.action == 'create':
             return CreateRideSerializer
-        if self.action == 'update':
+        if self.action == 'join':
             return JoinRideSerializer
         if self.action == 'finish':
             return EndRideSerializer
+        if self.action == 'rate':
+            return CreateRideRatingSerializer
         return RideModelSerializer
 
     def get_serializer_context(self):
@@ -76,24 +93,79 @@ class RideViewSet(mixins.ListModelMixin,
 
     def get_queryset(self):
         """Return active circle rides"""
-        if self.action not in ['finish']:
+        queryset = self.circle.ride_set.all()
+        if self.action not in ['finish', 'rate']:
             offset = timezone.now() + timedelta(minutes=10)
-            return self.circle.ride_set.filter(departure_date__gte=offset,
-                                               available_seats_gte=1)
-        return self.circle.ride_set.all()
+            queryset = queryset.filter(departure_date__gte=offset,
+                                       available_seats__gte=1)
+        # Keyset pagination reads the ordering columns of the last ride.
+        return eager_load(queryset, self.get_serializer_class(), self.get_serializer_context(),
+                          required=self.ordering)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the circle rides.
+
+        The plain feed is served from the ride cards when
+        `RIDE_FEED_FROM_CARDS` is on; searches and proximity
+        queries go through the rides table.
+        """
+        if not settings.RIDE_FEED_FROM_CARDS or any(
+                param in request.query_params for param in self.card_excluded_params):
+            return super().list(request, *args, **kwargs)
+
+        offset = timezone.now() + timedelta(minutes=10)
+        queryset = RideCard.objects.filter(
+            circle=self.circle,
+            departure_date__gte=offset,
+            available_seats__gte=1
+        ).order_by(*self.ordering)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([card.data for card in page])
+        return Response([card.data for card in queryset])
+
+    @action(detail=False, methods=['GET'])
+    def export(self, request, *args, **kwargs):
+        """
+        Stream the ride history of the circle as CSV or NDJSON (`?type=`).
+
+        Every ride ever offered in the circle is exported in departure
+        order, straight from the database without building the whole list
+        in memory.
+        """
+        self.check_object_permissions(request, self.circle)
+        file_format = export_format(request)
+
+        queryset = self.circle.ride_set.order_by('departure_date', 'arrival_date', 'available_seats', 'pk')
+        columns = {
+            'id': 'pk',
+            'offered_by': 'offered_by__username',
+            'departure_location': 'departure_location',
+            'departure_date': 'departure_date',
+            'arrival_location': 'arrival_location',
+            'arrival_date': 'arrival_date',
+            'available_seats': 'available_seats',
+            'comments': 'comments',
+            'rating': 'rating',
+            'is_active': 'is_active',
+        }
+        return export_response(queryset, columns, f'{self.circle.slug_name}-rides', file_format)
 
     @action(detail=True, methods=['POST'])
     def join(self, request, *args, **kwargs):
         """Add requesting user to ride."""
         ride = self.get_object()
-        serializer = self.get_serializer()
-        serializer(ride,
-                   data={'passenger': request.user.pk},
-                   context={'ride': ride, **self.get_serializer_context()},
-                   partial=True)
-
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        context['ride'] = ride
+        serializer = serializer_class(ride,
+                                      data={'passenger': request.user.pk},
+                                      context=context,
+                                      partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        ride = serializer.save()
 
         data = RideModelSerializer(ride).data
         return Response(data, status=status.HTTP_200_OK)
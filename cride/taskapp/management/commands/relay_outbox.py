@@ -0,0 +1,44 @@
+"""Relay the task outbox"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# Models
+from cride.taskapp.models import OutboxMessage
+
+# Utilities
+import time
+
+
+class Command(BaseCommand):
+    """
+    Publish outbox messages to the broker as they are committed.
+
+    Drains full batches back to back and polls every `--interval`
+    seconds once the outbox is empty or the broker is failing. Several
+    relays can run at once.
+    """
+
+    help = 'Publish queued tasks from the outbox to the broker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls when idle.')
+        parser.add_argument('--once', action='store_true', help='Drain the outbox and exit.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            relayed = 0
+            while True:
+                published = OutboxMessage.objects.relay(batch_size=batch_size)
+                relayed += published
+                if published < batch_size:
+                    break
+            if relayed:
+                self.stdout.write(f'Published {relayed} messages.')
+            if options['once']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1 @@
+from cride.taskapp.managers.outbox import OutboxManager
@@ -0,0 +1,111 @@
+"""Task outbox managers"""
+
+# Django
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+# Utilities
+from datetime import timedelta
+from hashlib import sha1
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxManager(models.Manager):
+    """
+    Outbox message manager.
+
+    Queues tasks as rows of the current transaction and relays them to
+    the broker once committed.
+    """
+
+    MAX_RETRY_DELAY = 300
+    CONNECT_RETRIES = 1
+
+    def enqueue(self, task, *args, **kwargs):
+        """
+        Queue a call to `task` with JSON serializable arguments.
+
+        It is published only if the current transaction commits.
+        """
+        return self.create(task=task.name, args=list(args), kwargs=kwargs,
+                           digest=self.digest(task.name, args, kwargs))
+
+    def enqueue_once(self, task, *args, **kwargs):
+        """
+        Queue a call to `task` unless the same call is still waiting to be published.
+
+        Return the new message, or None.
+        """
+        if self.filter(digest=self.digest(task.name, args, kwargs)).exists():
+            return None
+        return self.enqueue(task, *args, **kwargs)
+
+    @staticmethod
+    def digest(task, args, kwargs):
+        """Return the hash identifying a call to `task`."""
+        call = json.dumps([task, list(args), kwargs], sort_keys=True, separators=(',', ':'))
+        return sha1(call.encode()).hexdigest()
+
+    def relay(self, batch_size=100):
+        """
+        Publish due messages to the broker and delete them.
+
+        Works through a single batch in a short transaction, claimed
+        with SKIP LOCKED when the database supports it so concurrent
+        relays never publish the same message. A message is only
+        deleted after it was published, so a crash in between publishes
+        it again: delivery is at least once, and every copy carries the
+        same task id. A message that can't be published is retried
+        with an exponential backoff and ends the batch, leaving the
+        rest for the next one. Nothing is claimed while the broker is
+        unreachable.
+
+        Return the number of messages published.
+        """
+        # Celery
+        from cride.taskapp.celery import app
+
+        connection = connections[self.db]
+        published = []
+
+        with transaction.atomic(using=self.db):
+            batch = self.filter(available_at__lte=timezone.now()).order_by('available_at', 'pk')
+            if connection.features.has_select_for_update_skip_locked:
+                batch = batch.select_for_update(skip_locked=True)
+            messages = list(batch[:batch_size])
+            if not messages:
+                return 0
+
+            with app.producer_or_acquire() as producer:
+                if not app.conf.task_always_eager:
+                    try:
+                        producer.connection.ensure_connection(max_retries=self.CONNECT_RETRIES)
+                    except Exception:
+                        logger.warning('Broker unreachable, %d messages waiting.', len(messages), exc_info=True)
+                        return 0
+                for message in messages:
+                    try:
+                        app.tasks[message.task].apply_async(message.args, message.kwargs,
+                                                            task_id=str(message.task_id),
+                                                            producer=producer)
+                    except Exception as error:
+                        logger.warning('Could not publish %s, attempt %d.', message, message.attempts + 1,
+                                       exc_info=True)
+                        self.retry_later(message, error)
+                        break
+                    published.append(message.pk)
+
+            self.filter(pk__in=published).delete()
+
+        return len(published)
+
+    def retry_later(self, message, error):
+        """Push a message back with an exponential backoff, keeping the error."""
+        message.attempts += 1
+        delay = min(2 ** message.attempts, self.MAX_RETRY_DELAY)
+        message.available_at = timezone.now() + timedelta(seconds=delay)
+        message.last_error = repr(error)
+        message.save(update_fields=['attempts', 'available_at', 'last_error', 'modified'])
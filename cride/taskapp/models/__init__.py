@@ -0,0 +1 @@
+from cride.taskapp.models.outbox import *
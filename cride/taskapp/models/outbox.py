@@ -0,0 +1,44 @@
+"""Task outbox models"""
+
+# Django
+from django.db import models
+from django.utils import timezone
+
+# Utilities
+from cride.utils.models import CRideModel
+from uuid import uuid4
+
+# Managers
+from cride.taskapp.managers import OutboxManager
+
+
+class OutboxMessage(CRideModel):
+    """
+    Task waiting to be published to the broker.
+
+    Request handlers write these in their own transaction instead of
+    calling the broker, so a task is only sent if the request commits
+    and a broker outage never slows down or fails a request; the
+    relay_outbox command publishes them afterwards.
+    """
+
+    task_id = models.UUIDField(default=uuid4, editable=False,
+                               help_text='Celery task id the message is published with.')
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    digest = models.CharField(max_length=40, db_index=True,
+                              help_text='Hash of the task and its arguments, to spot pending duplicates.')
+
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, db_index=True,
+                                        help_text='Date time after which the message can be published.')
+    last_error = models.TextField(blank=True)
+
+    objects = OutboxManager()
+
+    class Meta(CRideModel.Meta):
+        ordering = ['available_at', 'pk']
+
+    def __str__(self):
+        return f'{self.task}{tuple(self.args)} ({self.task_id})'
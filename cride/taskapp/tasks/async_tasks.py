@@ -3,10 +3,12 @@
 # Django
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 
 # Models
+from cride.circles.models import Invitation, Membership
 from cride.users.models import User
 
 # Celery
@@ -15,7 +17,6 @@ from celery import shared_task
 # Utils
 from datetime import timedelta
 import jwt
-import time
 
 
 def gen_verification_token(user):
@@ -46,10 +47,6 @@ def send_confirmation_email(user_pk):
     """
     Send account verification link to given user.
     """
-    for i in range(30):
-        time.sleep(1)
-        print(f'second {i + 1}')
-
     user = User.objects.get(pk=user_pk)
 
     verification_token = gen_verification_token(user)
@@ -65,3 +62,18 @@ def send_confirmation_email(user_pk):
         'text/html'
     )
     msg.send()
+
+
+@shared_task(name='issue_missing_invitations')
+def issue_missing_invitations(membership_pk):
+    """
+    Issue the invitation codes a member is owed.
+
+    The membership row is locked while counting and issuing, so
+    concurrent runs for the same member issue the codes only once.
+    """
+    with transaction.atomic():
+        membership = Membership.objects.select_for_update().get(pk=membership_pk)
+        issued = Invitation.objects.issue_missing(membership.circle, membership.user,
+                                                  membership.remaining_invitations)
+    return len(issued)
@@ -1,35 +1,45 @@
 """Beat tasks configuration"""
 
-# Django
-from django.utils import timezone
-
 # Celery
 from cride.taskapp.celery import app
 from celery import shared_task
-from celery.schedules import crontab
-
+from celery.utils.log import get_task_logger
 
 # Models
-from cride.rides.models import Ride
+from cride.rides.models import Ride, RideStatDelta
 
 # Utilities
 from datetime import timedelta
 
+logger = get_task_logger(__name__)
+
 
 @shared_task(name='disable_finished_rides')
 def disable_finished_rides():
-    """Disable finished rides."""
-    now = timezone.now()
-    offset = now + timedelta(seconds=5)
-    rides = Ride.objects.filter(arrival_date__gte=now,
-                                arrival_date__lte=offset,
-                                is_active=True)
-    rides.update(is_active=False)
+    """
+    Disable finished rides.
+
+    Return how many rides were expired, how many are still due and
+    how far behind arrival the oldest of them was, in seconds.
+    """
+    report = Ride.objects.expire()
+    logger.info('Expired %(expired)d rides, %(backlog)d still due, %(lag).0fs behind.', report)
+    return report
+
+
+@shared_task(name='fold_ride_stats')
+def fold_ride_stats():
+    """Fold pending ride stats into circles, memberships and profiles."""
+    return RideStatDelta.objects.fold()
 
 
 app.conf.beat_schedule = {
     'disable-finished-rides': {
         'task': 'disable_finished_rides',
-        'schedule': crontab(hour=23)
-    }
+        'schedule': timedelta(minutes=1)
+    },
+    'fold-ride-stats': {
+        'task': 'fold_ride_stats',
+        'schedule': timedelta(minutes=1)
+    },
 }
@@ -0,0 +1,81 @@
+"""Task outbox tests."""
+
+# Django
+from django.core import mail
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.taskapp.models import OutboxMessage
+from cride.users.models import User
+
+# Tasks
+from cride.taskapp.tasks import send_confirmation_email
+
+# Utilities
+from unittest import mock
+
+
+class OutboxAPITestCase(APITestCase):
+    """Task dispatch through the outbox test case."""
+
+    def signup(self):
+        """Sign up a user and return the response."""
+        return self.client.post('/users/signup/', {
+            'email': 'jestrada@mail.com',
+            'username': 'jestrada',
+            'phone_number': '+502123456789',
+            'password': 'Comparte.Ride1',
+            'password_confirmation': 'Comparte.Ride1',
+            'first_name': 'Julio',
+            'last_name': 'Estrada',
+        })
+
+    def test_signup_queues_confirmation_email(self):
+        """Signing up writes an outbox message and sends nothing until it is relayed."""
+        response = self.signup()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.task, send_confirmation_email.name)
+        self.assertEqual(message.args, [User.objects.get(username='jestrada').pk])
+
+        self.assertEqual(OutboxMessage.objects.relay(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['jestrada@mail.com'])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_failed_signup_queues_nothing(self):
+        """Requests that don't commit leave no message behind."""
+        self.signup()
+        response = self.signup()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_publish_failure_is_retried_later(self):
+        """Messages the broker rejects stay in the outbox with a backoff."""
+        self.signup()
+        with mock.patch.object(send_confirmation_email, 'apply_async', side_effect=ConnectionError('down')):
+            self.assertEqual(OutboxMessage.objects.relay(), 0)
+
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.available_at, timezone.now())
+        self.assertIn('down', message.last_error)
+        self.assertEqual(OutboxMessage.objects.relay(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(OutboxMessage.objects.relay(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_messages_are_published_with_their_task_id(self):
+        """Every copy of a message is published with the same task id."""
+        self.signup()
+        message = OutboxMessage.objects.get()
+        with mock.patch.object(send_confirmation_email, 'apply_async') as apply_async:
+            OutboxMessage.objects.relay()
+        self.assertEqual(apply_async.call_args.kwargs['task_id'], str(message.task_id))
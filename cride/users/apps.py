@@ -9,3 +9,7 @@ class UsersAppConfig(AppConfig):
 
     name = 'cride.users'
     verbose_name = 'Users'
+
+    def ready(self):
+        """Connect the token cache signals."""
+        import cride.users.signals  # noqa: F401
@@ -0,0 +1,87 @@
+"""Users authentication"""
+
+# Django REST Framework
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+
+# Utilities
+from cride.users.tokens import ACCESS, CLAIMS, decode_token, token_user
+from cride.utils.cache import TwoTierCache
+from hashlib import sha256
+import jwt
+
+token_cache = TwoTierCache('users:tokens', maxsize=10000)
+
+
+def token_digest(key):
+    """Return the digest a token is cached under, so keys never reach the cache in clear."""
+    return sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication resolving tokens through a two-tier cache.
+
+    Drop-in replacement for TokenAuthentication: the claims of the
+    token's user are cached in a process-local LRU backed by the shared
+    cache, so warm requests skip the token and user query. Each request
+    gets its own user built from them, like signed tokens do. Deleting
+    a token or saving its user evicts it from every process, which
+    revokes the token or applies the user's new `is_active` and
+    `is_verified` at once.
+    """
+
+    def authenticate_credentials(self, key):
+        claims = token_cache.get(token_digest(key), lambda digest: self.load_claims(key))
+        if claims is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if not claims['is_active']:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        user = token_user(claims)
+        return user, self.get_model()(key=key, user=user)
+
+    def load_claims(self, key):
+        """Return the claims of the user owning the token, or None."""
+        row = self.get_model().objects.filter(key=key).values_list(*(f'user__{claim}' for claim in CLAIMS)).first()
+        return dict(zip(CLAIMS, row)) if row is not None else None
+
+    @staticmethod
+    def invalidate(*keys):
+        """Drop cached tokens from every process."""
+        token_cache.invalidate(*(token_digest(key) for key in keys))
+
+
+class JWTAuthentication(BaseAuthentication):
+    """
+    Signed access token authentication.
+
+    Clients authenticate with an `Authorization: Bearer <access token>`
+    header. Tokens are checked with their signature, expiry and the
+    revoked tokens deny-list, and the user is built from their claims,
+    so authenticating a request never touches the database.
+    """
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            payload = decode_token(auth[1].decode(), ACCESS)
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        except jwt.PyJWTError:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        if not payload['is_active']:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return token_user(payload), payload
+
+    def authenticate_header(self, request):
+        return self.keyword
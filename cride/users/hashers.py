@@ -0,0 +1,195 @@
+"""Users password hashers"""
+
+# Django
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.core.signals import setting_changed
+from django.dispatch import Signal, receiver
+
+# Django REST Framework
+from rest_framework.exceptions import APIException
+
+# Utilities
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sent every `report_every` hashes with the pool `stats`.
+password_hashing_stats = Signal()
+
+
+class PasswordHashingBusy(APIException):
+    status_code = 503
+    default_detail = 'Too many password checks in progress, try again shortly.'
+    default_code = 'password_hashing_busy'
+
+
+def run_hasher(method, params, *args):
+    """Call an Argon2 hasher `method` with `(time_cost, memory_cost, parallelism)`, timing its start."""
+    started = time.time()
+    hasher = Argon2PasswordHasher()
+    hasher.time_cost, hasher.memory_cost, hasher.parallelism = params
+    return started, getattr(hasher, method)(*args)
+
+
+def percentile(values, fraction):
+    """Return the `fraction` percentile of a sorted list, 0 when empty."""
+    return values[max(int(len(values) * fraction) - 1, 0)] if values else 0.0
+
+
+class PasswordHashingPool:
+    """
+    Bounded process pool hashing passwords off the request threads.
+
+    `workers` processes per server process do the hashing, so a burst of
+    logins can't take more than that many cores from cheap requests. At
+    most `concurrency` hashes are running or queued at once: further
+    calls wait up to `timeout` seconds for a slot and then fail with
+    PasswordHashingBusy instead of piling up. With no workers hashes run
+    on the calling thread, still bounded by `concurrency`. A pool broken
+    by a worker dying is replaced and the hash retried once.
+
+    Queue and run times of the last `window` hashes are kept for `stats`.
+    """
+
+    def __init__(self, workers=2, concurrency=16, timeout=5, window=1000, report_every=1000):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.report_every = report_every
+
+        self.lock = threading.Lock()
+        self.timings = deque(maxlen=window)
+        self.counters = dict.fromkeys(('hashed', 'rejected'), 0)
+        self.pid = None
+        self.slots = None
+        self.pool = None
+
+    def run(self, method, params, *args):
+        """Run an Argon2 hasher `method` in the pool and return its result."""
+        self.setup()
+        submitted = time.time()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.counters['rejected'] += 1
+            raise PasswordHashingBusy()
+        try:
+            if self.pool is not None:
+                started, result = self.submit(method, params, *args)
+            else:
+                started, result = run_hasher(method, params, *args)
+        finally:
+            self.slots.release()
+        self.record(started - submitted, time.time() - started)
+        return result
+
+    def submit(self, method, params, *args):
+        """Run a hasher method in the worker processes, replacing a broken pool once."""
+        pool = self.pool
+        try:
+            return pool.submit(run_hasher, method, params, *args).result()
+        except BrokenProcessPool:
+            self.replace(pool)
+        return self.pool.submit(run_hasher, method, params, *args).result()
+
+    def replace(self, broken):
+        """Replace the `broken` worker processes, unless another thread already did."""
+        with self.lock:
+            if self.pool is broken:
+                logger.warning('Password hashing pool broken, starting new workers.')
+                self.pool = self.executor()
+        broken.shutdown(wait=False)
+
+    def executor(self):
+        """Return new worker processes, spawned rather than forked."""
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def setup(self):
+        """
+        Create the slots and the worker processes once per process.
+
+        Created lazily so each forked server worker gets its own. Workers
+        are spawned rather than forked, which is safe from threaded servers.
+        """
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        with self.lock:
+            if self.pid == pid:
+                return
+            self.slots = threading.BoundedSemaphore(self.concurrency)
+            self.pool = self.executor() if self.workers else None
+            self.pid = pid
+
+    def record(self, queued, ran):
+        """Keep the timings of a hash and report the stats when due."""
+        with self.lock:
+            self.timings.append((max(queued, 0.0), ran))
+            self.counters['hashed'] += 1
+            hashed = self.counters['hashed']
+        if self.report_every and hashed % self.report_every == 0:
+            password_hashing_stats.send(sender=self.__class__, stats=self.stats())
+
+    def stats(self):
+        """Return the counters and the queue and run time percentiles, in ms."""
+        with self.lock:
+            stats = dict(self.counters)
+            timings = list(self.timings)
+        for index, name in enumerate(('queue', 'run')):
+            values = sorted(timing[index] * 1000 for timing in timings)
+            stats[f'{name}_p50'] = percentile(values, 0.5)
+            stats[f'{name}_p99'] = percentile(values, 0.99)
+        return stats
+
+
+@lru_cache(maxsize=None)
+def hashing_pool():
+    """Return the password hashing pool configured in the settings."""
+    return PasswordHashingPool(
+        workers=settings.PASSWORD_HASHING_WORKERS,
+        concurrency=settings.PASSWORD_HASHING_CONCURRENCY,
+        timeout=settings.PASSWORD_HASHING_TIMEOUT,
+    )
+
+
+@receiver(setting_changed)
+def reset_hashing_pool(setting, **kwargs):
+    if setting.startswith('PASSWORD_HASHING_'):
+        hashing_pool.cache_clear()
+
+
+class PooledArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher using the ARGON2_* costs, hashing in the hashing pool.
+
+    Hashes made with other costs are upgraded on the next successful login.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+    def params(self):
+        return self.time_cost, self.memory_cost, self.parallelism
+
+    def encode(self, password, salt):
+        return hashing_pool().run('encode', self.params(), password, salt)
+
+    def verify(self, password, encoded):
+        return hashing_pool().run('verify', self.params(), password, encoded)
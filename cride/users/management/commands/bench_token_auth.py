@@ -0,0 +1,101 @@
+"""Token authentication benchmark"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+# Django REST Framework
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import Profile, User
+from rest_framework.authtoken.models import Token
+
+# Views
+from cride.circles.views import MembershipViewSet
+
+# Utilities
+from cride.users.authentication import CachedTokenAuthentication, JWTAuthentication
+from cride.users.tokens import issue_tokens
+import time
+
+
+class WhoAmIView(APIView):
+    """Return the authenticated user id."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({'user': request.user.pk})
+
+
+class Command(BaseCommand):
+    """
+    Compare authenticated request throughput with TokenAuthentication,
+    with CachedTokenAuthentication, cold and warm, and with JWTAuthentication.
+
+    Every row is created inside a transaction that is rolled back at the end,
+    so the benchmark can be run against any database.
+    """
+
+    help = 'Benchmark authenticated request throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--auth-only', action='store_true',
+            help='Hit a view doing nothing but authentication instead of the members list.'
+        )
+
+    def handle(self, *args, **options):
+        self.auth_only = options['auth_only']
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark', email='benchmark@comparteride.com')
+            circle = Circle.objects.create(name='Benchmark', slug_name='benchmark-auth', about='Benchmark')
+            Membership.objects.create(user=user, profile=Profile.objects.create(user=user), circle=circle)
+            key = Token.objects.create(user=user).key
+            factory = APIRequestFactory()
+
+            access_token = issue_tokens(user)['access_token']
+
+            def request_with(authentication, header=f'Token {key}'):
+                view = self.view(authentication)
+
+                def fetch():
+                    request = factory.get('/', HTTP_AUTHORIZATION=header)
+                    response = view(request, slug_name=circle.slug_name)
+                    assert response.status_code == 200, response.status_code
+                return fetch
+
+            cached = request_with(CachedTokenAuthentication)
+
+            def cold():
+                CachedTokenAuthentication.invalidate(key)
+                cached()
+
+            cached()
+            self.report('TokenAuthentication', request_with(TokenAuthentication), options['requests'])
+            self.report('CachedTokenAuthentication, cold', cold, options['requests'])
+            self.report('CachedTokenAuthentication, warm', cached, options['requests'])
+            self.report('JWTAuthentication', request_with(JWTAuthentication, f'Bearer {access_token}'),
+                        options['requests'])
+            transaction.set_rollback(True)
+
+    def view(self, authentication):
+        """Return the view under test, the circle members list unless `--auth-only`."""
+        if self.auth_only:
+            return WhoAmIView.as_view(authentication_classes=[authentication])
+        return MembershipViewSet.as_view({'get': 'list'}, authentication_classes=[authentication])
+
+    def report(self, label, fetch, requests):
+        """Send `requests` requests and print the throughput."""
+        start = time.perf_counter()
+        for _ in range(requests):
+            fetch()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label}: {requests / elapsed:.0f} requests/s')
@@ -0,0 +1,141 @@
+"""Login load test"""
+
+# Django
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+# Django REST Framework
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.rides.models import Ride
+from cride.users.models import Profile, User
+
+# Views
+from cride.rides.views import RideViewSet
+from cride.users.views import UserViewSet
+
+# Utilities
+from cride.users.hashers import hashing_pool
+from datetime import timedelta
+import statistics
+import threading
+import time
+
+
+class Command(BaseCommand):
+    """
+    Mix login bursts with ride list traffic and compare the list latency
+    without logins, with passwords hashed on the request threads and with
+    the password hashing pool.
+
+    Threads share the database through their own connections, so the rows
+    are committed and deleted at the end. Run it with settings hashing
+    with Argon2, like config.settings.local.
+    """
+
+    help = 'Load test ride listing during login bursts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--list-clients', type=int, default=4)
+        parser.add_argument('--login-clients', type=int, default=8)
+        parser.add_argument('--workers', type=int, default=1, help='Hashing pool processes.')
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory(SERVER_NAME='localhost')
+        self.user, self.circle = self.seed()
+        try:
+            phases = (
+                ('no logins', None, 0),
+                ('logins, hashing on request threads', 0, options['login_clients']),
+                ('logins, hashing pool', options['workers'], options['login_clients']),
+            )
+            for label, workers, login_clients in phases:
+                self.phase(label, workers, options['list_clients'], login_clients, options['seconds'])
+        finally:
+            self.circle.delete()
+            User.objects.filter(pk=self.user.pk).delete()
+
+    def seed(self):
+        """Create the login user, its circle and some upcoming rides."""
+        user = User.objects.create_user(
+            email='loadtest@comparteride.com', username='loadtest', password='loadtest123', is_verified=True
+        )
+        profile = Profile.objects.create(user=user)
+        circle = Circle.objects.create(name='Load test', slug_name='load-test-logins', about='Load test')
+        Membership.objects.create(user=user, profile=profile, circle=circle)
+        departure = timezone.now() + timedelta(days=1)
+        Ride.objects.bulk_create([
+            Ride(
+                offered_by=user,
+                offered_in=circle,
+                available_seats=3,
+                departure_location='Zona 10',
+                departure_date=departure + timedelta(minutes=i),
+                arrival_location='Antigua',
+                arrival_date=departure + timedelta(minutes=i + 45),
+            )
+            for i in range(50)
+        ])
+        return user, circle
+
+    def phase(self, label, workers, list_clients, login_clients, seconds):
+        """Run list and login clients for `seconds` and print the list latency."""
+        list_timings, login_statuses = [], []
+        deadline = time.monotonic() + seconds
+        with override_settings(PASSWORD_HASHING_WORKERS=workers or 0):
+            pool = hashing_pool()
+            if workers:
+                pool.run('encode', (1, 8, 1), 'warm up', 'saltsalt')
+            threads = [
+                threading.Thread(target=self.client, args=(self.list_rides, deadline, list_timings))
+                for _ in range(list_clients)
+            ] + [
+                threading.Thread(target=self.client, args=(self.login, deadline, login_statuses))
+                for _ in range(login_clients)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = pool.stats()
+            if pool.pool is not None:
+                pool.pool.shutdown()
+
+        list_timings.sort()
+        self.stdout.write(
+            f'{label}: ride list p50 {statistics.median(list_timings):.1f} ms, '
+            f'p99 {list_timings[int(len(list_timings) * 0.99) - 1]:.1f} ms, '
+            f'{len(list_timings) / seconds:.0f} lists/s, '
+            f'{login_statuses.count(201) / seconds:.1f} logins/s, '
+            f'{login_statuses.count(503)} logins shed, '
+            f'hash queue p99 {stats["queue_p99"]:.0f} ms'
+        )
+
+    def client(self, request, deadline, results):
+        """Send requests until `deadline`, collecting their results."""
+        try:
+            while time.monotonic() < deadline:
+                results.append(request())
+        finally:
+            connection.close()
+
+    def list_rides(self):
+        """List the circle rides and return the latency in ms."""
+        request = self.factory.get('/')
+        force_authenticate(request, self.user)
+        start = time.perf_counter()
+        response = RideViewSet.as_view({'get': 'list'})(request, slug_name=self.circle.slug_name)
+        response.render()
+        return (time.perf_counter() - start) * 1000
+
+    def login(self):
+        """Log in and return the status code."""
+        request = self.factory.post(
+            '/', {'email': 'loadtest@comparteride.com', 'password': 'loadtest123'}, format='json'
+        )
+        return UserViewSet.as_view({'post': 'login'})(request).status_code
@@ -5,9 +5,11 @@ from django.db import models
 
 # Utils
 from cride.utils.models import CRideModel
+from cride.rides.models.stats import RideStatsMixin
+from cride.rides.models.ratings import RatingStats
 
 
-class Profile(CRideModel):
+class Profile(RideStatsMixin, CRideModel, RatingStats):
     """
     Profile model.
 
@@ -1,3 +1,3 @@
 from cride.users.serializers.users import (UserSignupSerializer, UserModelSerializer, AccountVerificationSerializer,
-                                           UserLoginSerializer)
-from cride.users.serializers.profiles import ProfileModelSerializer
+                                           UserLoginSerializer, TokenRefreshSerializer, LogoutSerializer)
+from cride.users.serializers.profiles import ProfileModelSerializer, ProfileRatingSerializer
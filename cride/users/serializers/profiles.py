@@ -5,13 +5,20 @@ from rest_framework import serializers
 
 # Models
 from cride.users.models import Profile
+from cride.rides.models import RideStatDelta
 
+# Serializers
+from cride.utils.serializers import DynamicFieldsMixin
 
-class ProfileModelSerializer(serializers.ModelSerializer):
+
+class ProfileModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Profile model serializer.
     """
 
+    rides_offered = serializers.IntegerField(source='total_rides_offered', read_only=True)
+    rides_taken = serializers.IntegerField(source='total_rides_taken', read_only=True)
+
     class Meta:
         model = Profile
         fields = (
@@ -26,3 +33,31 @@ class ProfileModelSerializer(serializers.ModelSerializer):
             'rides_offered',
             'reputation',
         )
+        field_columns = {
+            'rides_offered': ('rides_offered',),
+            'rides_taken': ('rides_taken',),
+        }
+
+    def setup_queryset(self, queryset):
+        """Annotate the ride stats pending to be folded, when they are rendered."""
+        if self.fields.keys() & {'rides_offered', 'rides_taken'}:
+            return RideStatDelta.objects.annotate_pending(queryset)
+        return queryset
+
+
+class ProfileRatingSerializer(serializers.ModelSerializer):
+    """
+    Profile rating distribution serializer.
+    """
+
+    average = serializers.FloatField(source='reputation', read_only=True)
+    count = serializers.IntegerField(source='rating_count', read_only=True)
+    histogram = serializers.DictField(source='rating_histogram', child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = Profile
+        fields = (
+            'average',
+            'count',
+            'histogram',
+        )
@@ -2,7 +2,6 @@
 
 # Django rest framework
 from rest_framework import serializers
-from rest_framework.authtoken.models import Token
 from rest_framework.validators import UniqueValidator
 
 # Django
@@ -11,15 +10,18 @@ from django.core.validators import RegexValidator
 from django.conf import settings
 
 # Models
+from cride.taskapp.models import OutboxMessage
 from cride.users.models import User, Profile
 
 # Serializers
 from cride.users.serializers.profiles import ProfileModelSerializer
+from cride.utils.serializers import DynamicFieldsMixin
 
 # Tasks
 from cride.taskapp.tasks import send_confirmation_email
 
 # Utilities
+from cride.users.tokens import REFRESH, decode_token, issue_tokens, revoke_token
 import jwt
 
 
@@ -148,14 +150,14 @@ class UserSignupSerializer(serializers.Serializer):
                                         is_verified=False,
                                         is_client=True,
                                         )
-        send_confirmation_email.delay(user.pk)
         Profile.objects.create(
             user=user
         )
+        OutboxMessage.objects.enqueue(send_confirmation_email, user.pk)
         return user
 
 
-class UserModelSerializer(serializers.ModelSerializer):
+class UserModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     User model serializer
     """
@@ -214,9 +216,69 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
     def create(self, validated_data):
-        """Generate or retrieve a token."""
+        """Issue an access and refresh token pair."""
+        return self.context['user'], issue_tokens(self.context['user'])
 
-        token, created = Token.objects.get_or_create(
-            user=self.context['user']
-        )
-        return self.context['user'], token.key
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Token refresh serializer.
+
+    Rotate a refresh token: the token is revoked and a new pair issued.
+    """
+
+    refresh_token = serializers.CharField()
+
+    def validate_refresh_token(self, data):
+        """Verify the refresh token is valid and its user still active."""
+        try:
+            payload = decode_token(data, REFRESH)
+        except jwt.ExpiredSignatureError:
+            raise serializers.ValidationError('Refresh token has expired.')
+        except jwt.PyJWTError:
+            raise serializers.ValidationError('Invalid token')
+
+        user = User.objects.filter(pk=payload['id'], is_active=True, is_verified=True).first()
+        if user is None:
+            raise serializers.ValidationError('Invalid token')
+
+        self.context['payload'] = payload
+        self.context['user'] = user
+        return data
+
+    def create(self, validated_data):
+        """Revoke the refresh token and issue a new pair, once per token."""
+        if not revoke_token(self.context['payload']):
+            raise serializers.ValidationError({'refresh_token': 'Invalid token'})
+        return self.context['user'], issue_tokens(self.context['user'])
+
+
+class LogoutSerializer(serializers.Serializer):
+    """
+    Logout serializer.
+
+    Revoke the access token of the request and, if given, a refresh token.
+    """
+
+    refresh_token = serializers.CharField(required=False)
+
+    def validate_refresh_token(self, data):
+        """Verify the refresh token belongs to the requesting user."""
+        try:
+            payload = decode_token(data, REFRESH)
+        except jwt.PyJWTError:
+            raise serializers.ValidationError('Invalid token')
+
+        if payload['id'] != self.context['request'].user.pk:
+            raise serializers.ValidationError('Invalid token')
+
+        self.context['payload'] = payload
+        return data
+
+    def save(self, **kwargs):
+        """Revoke the tokens."""
+        auth = self.context['request'].auth
+        if isinstance(auth, dict):
+            revoke_token(auth)
+        if 'payload' in self.context:
+            revoke_token(self.context['payload'])
@@ -0,0 +1,71 @@
+"""Users signals"""
+
+# Django
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+# Django REST Framework
+from rest_framework.authtoken.models import Token
+
+# Models
+from cride.users.models import User
+
+# Authentication
+from cride.users.authentication import CachedTokenAuthentication
+from cride.users.tokens import CLAIMS, revoke_user_tokens
+
+# User fields whose change revokes the signed tokens of the user.
+REVOKING_FIELDS = ('password', *CLAIMS)
+
+
+def revoke(*keys):
+    """Drop cached tokens now and again on commit."""
+    CachedTokenAuthentication.invalidate(*keys)
+    transaction.on_commit(lambda: CachedTokenAuthentication.invalidate(*keys))
+
+
+@receiver(post_save, sender=Token, dispatch_uid='token_cache_saved')
+@receiver(post_delete, sender=Token, dispatch_uid='token_cache_deleted')
+def token_changed(sender, instance, raw=False, **kwargs):
+    """Drop a created or deleted token, along with any cached miss."""
+    if not raw:
+        revoke(instance.key)
+
+
+@receiver(post_save, sender=User, dispatch_uid='token_cache_user_saved')
+def token_user_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Drop the tokens of a saved user so its new state applies at once."""
+    if created or raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    keys = list(Token.objects.filter(user=instance).values_list('key', flat=True))
+    if keys:
+        revoke(*keys)
+
+
+@receiver(pre_save, sender=User, dispatch_uid='signed_tokens_user_saving')
+def signed_tokens_user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Flag a user whose password or token claims are changing."""
+    instance._revoke_tokens = False
+    if raw or instance._state.adding or (update_fields is not None and not set(update_fields) & set(REVOKING_FIELDS)):
+        return
+    # Password hash upgrades on login leave `_password` unset: they aren't changes.
+    loaded = [
+        field for field in REVOKING_FIELDS
+        if field in instance.__dict__ and (field != 'password' or instance._password is not None)
+    ]
+    if not loaded:
+        return
+    current = User.objects.filter(pk=instance.pk).values(*loaded).first()
+    instance._revoke_tokens = current is not None and any(
+        current[field] != getattr(instance, field) for field in loaded
+    )
+
+
+@receiver(post_save, sender=User, dispatch_uid='signed_tokens_user_saved')
+def signed_tokens_user_saved(sender, instance, **kwargs):
+    """Revoke the signed tokens of a user whose password or claims changed, now and again on commit."""
+    if getattr(instance, '_revoke_tokens', False):
+        user_id = instance.pk
+        revoke_user_tokens(user_id)
+        transaction.on_commit(lambda: revoke_user_tokens(user_id))
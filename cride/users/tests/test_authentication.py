@@ -0,0 +1,76 @@
+"""Authentication tests."""
+
+# Django
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User, Profile
+from rest_framework.authtoken.models import Token
+
+# Utilities
+from cride.users.authentication import CachedTokenAuthentication, token_cache, token_digest
+from cride.users.tokens import CLAIMS
+
+
+class CachedTokenAuthenticationTestCase(APITestCase):
+    """Cached token authentication test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        token_cache.clear()
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.user = User.objects.create(email='jestrada@mail.com', username='jestrada')
+        Membership.objects.create(user=self.user, profile=Profile.objects.create(user=self.user), circle=self.circle)
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = f'/circles/{self.circle.slug_name}/members/'
+
+    def token_queries(self):
+        """Request the member list and return the status and token queries."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        queries = [query for query in context.captured_queries if 'FROM "authtoken_token"' in query['sql']]
+        return response.status_code, len(queries)
+
+    def test_tokens_are_cached(self):
+        """Known and unknown tokens are resolved once."""
+        self.assertEqual(self.token_queries(), (200, 1))
+        self.assertEqual(self.token_queries(), (200, 0))
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token unknown')
+        self.assertEqual(self.token_queries(), (401, 1))
+        self.assertEqual(self.token_queries(), (401, 0))
+
+    def test_deleted_tokens_are_revoked(self):
+        """Deleting a token rejects it on the next request."""
+        self.assertEqual(self.token_queries(), (200, 1))
+        self.token.delete()
+        self.assertEqual(self.token_queries(), (401, 1))
+
+    def test_deactivated_users_are_rejected(self):
+        """Deactivating a user rejects its token on the next request."""
+        self.assertEqual(self.token_queries(), (200, 1))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.token_queries(), (401, 1))
+
+    def test_only_claims_are_cached(self):
+        """The cache holds the user's claims, never the instance or its password."""
+        self.assertEqual(self.token_queries(), (200, 1))
+        digest = token_digest(self.token.key)
+        (shared,) = cache.get(token_cache.shared_key(digest))
+        self.assertEqual(shared, {claim: getattr(self.user, claim) for claim in CLAIMS})
+        self.assertNotIn('password', shared)
+
+        authentication = CachedTokenAuthentication()
+        first, _ = authentication.authenticate_credentials(self.token.key)
+        second, _ = authentication.authenticate_credentials(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertIn('password', first.get_deferred_fields())
@@ -0,0 +1,104 @@
+"""Password hashing tests."""
+
+# Django
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.test import SimpleTestCase, override_settings
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.users.models import User, Profile
+
+# Utilities
+from cride.users.hashers import PasswordHashingBusy, PasswordHashingPool
+from cride.users.tokens import issue_tokens, revoked_tokens
+import os
+import signal
+
+CHEAP_ARGON2 = (1, 64, 1)
+
+
+class PasswordHashingPoolTestCase(SimpleTestCase):
+    """Password hashing pool test case."""
+
+    def test_hashes_in_workers(self):
+        """Hashes run in the worker processes and are timed."""
+        pool = PasswordHashingPool(workers=1)
+        try:
+            encoded = pool.run('encode', CHEAP_ARGON2, 'admin123', 'saltsalt')
+            self.assertIn('m=64,t=1,p=1', encoded)
+            self.assertTrue(pool.run('verify', CHEAP_ARGON2, 'admin123', encoded))
+            self.assertFalse(pool.run('verify', CHEAP_ARGON2, 'admin456', encoded))
+        finally:
+            pool.pool.shutdown()
+        stats = pool.stats()
+        self.assertEqual((stats['hashed'], stats['rejected']), (3, 0))
+        self.assertGreater(stats['run_p99'], 0)
+
+    def test_replaces_dead_workers(self):
+        """A worker dying breaks the pool once, the next hash gets new workers."""
+        pool = PasswordHashingPool(workers=1)
+        try:
+            encoded = pool.run('encode', CHEAP_ARGON2, 'admin123', 'saltsalt')
+            broken = pool.pool
+            for process in list(broken._processes.values()):
+                os.kill(process.pid, signal.SIGKILL)
+                process.join()
+
+            self.assertTrue(pool.run('verify', CHEAP_ARGON2, 'admin123', encoded))
+            self.assertIsNot(pool.pool, broken)
+            self.assertTrue(pool.run('verify', CHEAP_ARGON2, 'admin123', encoded))
+        finally:
+            pool.pool.shutdown()
+        self.assertEqual(pool.stats()['hashed'], 3)
+
+    def test_rejects_when_busy(self):
+        """Hashes waiting too long for a slot are rejected."""
+        pool = PasswordHashingPool(workers=0, concurrency=1, timeout=0.01)
+        pool.setup()
+        pool.slots.acquire()
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run('encode', CHEAP_ARGON2, 'admin123', 'saltsalt')
+        pool.slots.release()
+        self.assertTrue(pool.run('encode', CHEAP_ARGON2, 'admin123', 'saltsalt'))
+        self.assertEqual(pool.stats()['rejected'], 1)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['cride.users.hashers.PooledArgon2PasswordHasher'],
+    ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=64, ARGON2_PARALLELISM=1,
+)
+class PasswordUpgradeAPITestCase(APITestCase):
+    """Password hash upgrade on login test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        revoked_tokens.clear()
+        self.user = User.objects.create(
+            email='jestrada@mail.com', username='jestrada', is_verified=True,
+            password=Argon2PasswordHasher().encode('admin123', 'saltsalt'),
+        )
+        Profile.objects.create(user=self.user)
+
+    def login(self, password='admin123'):
+        return self.client.post('/users/login/', {'email': 'jestrada@mail.com', 'password': password})
+
+    def test_login_upgrades_hash(self):
+        """Logging in rehashes the password with the configured costs, keeping tokens valid."""
+        access_token = issue_tokens(self.user)['access_token']
+        self.assertEqual(self.login('admin456').status_code, 400)
+        self.user.refresh_from_db()
+        self.assertIn('m=512,t=2,p=2', self.user.password)
+
+        self.assertEqual(self.login().status_code, 201)
+        self.user.refresh_from_db()
+        self.assertIn('m=64,t=1,p=1', self.user.password)
+        upgraded = self.user.password
+
+        self.assertEqual(self.login().status_code, 201)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, upgraded)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        self.assertEqual(self.client.get(f'/users/{self.user.username}/').status_code, 200)
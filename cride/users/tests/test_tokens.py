@@ -0,0 +1,121 @@
+"""Signed access tokens tests."""
+
+# Django
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Django REST Framework
+from rest_framework.test import APITestCase
+
+# Models
+from cride.circles.models import Circle, Membership
+from cride.users.models import User, Profile
+
+# Utilities
+from cride.users.tokens import revoked_tokens
+from cride.utils.denylist import BloomFilter
+
+
+class SignedTokensAPITestCase(APITestCase):
+    """Login, refresh and logout with signed tokens test case."""
+
+    def setUp(self) -> None:
+        """Test case setup."""
+        cache.clear()
+        revoked_tokens.clear()
+        self.circle = Circle.objects.create(name='Facultad de Ciencias', slug_name='fciencias', about='UNAM')
+        self.user = User.objects.create_user(
+            email='jestrada@mail.com', username='jestrada', password='admin123', is_verified=True
+        )
+        Membership.objects.create(user=self.user, profile=Profile.objects.create(user=self.user), circle=self.circle)
+        self.url = f'/circles/{self.circle.slug_name}/members/'
+
+    def login(self):
+        """Log in and return the token pair."""
+        response = self.client.post('/users/login/', {'email': 'jestrada@mail.com', 'password': 'admin123'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['access_token'], response.data['refresh_token']
+
+    def members(self, access_token):
+        """Request the member list with an access token and return the status and user queries."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.client.credentials()
+        queries = [
+            query for query in context.captured_queries
+            if 'FROM "users_user"' in query['sql'] or 'FROM "authtoken_token"' in query['sql']
+        ]
+        return response.status_code, len(queries)
+
+    def refresh(self, refresh_token):
+        return self.client.post('/users/refresh/', {'refresh_token': refresh_token})
+
+    def test_access_token_skips_database(self):
+        """Requests are authenticated from the access token alone."""
+        access_token, refresh_token = self.login()
+        self.assertEqual(self.members(access_token), (200, 0))
+        self.assertEqual(self.members(refresh_token), (401, 0))
+        self.assertEqual(self.members(access_token[:-2]), (401, 0))
+
+    @override_settings(ACCESS_TOKEN_LIFETIME=-1)
+    def test_expired_access_token(self):
+        """Expired access tokens are rejected."""
+        access_token, refresh_token = self.login()
+        self.assertEqual(self.members(access_token), (401, 0))
+
+    def test_refresh_rotates_tokens(self):
+        """A refresh token is exchanged once for a new pair."""
+        access_token, refresh_token = self.login()
+        response = self.refresh(refresh_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh_token'], refresh_token)
+        self.assertEqual(self.members(response.data['access_token']), (200, 0))
+
+        self.assertEqual(self.refresh(refresh_token).status_code, 400)
+        self.assertEqual(self.refresh(access_token).status_code, 400)
+        self.assertEqual(self.refresh(response.data['refresh_token']).status_code, 200)
+
+    def test_logout_revokes_tokens(self):
+        """Logging out revokes the access and refresh tokens."""
+        access_token, refresh_token = self.login()
+        other_access_token, _ = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        response = self.client.post('/users/logout/', {'refresh_token': refresh_token})
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.members(access_token), (401, 0))
+        self.assertEqual(self.refresh(refresh_token).status_code, 400)
+        self.assertEqual(self.members(other_access_token), (200, 0))
+
+    def test_user_changes_revoke_tokens(self):
+        """Changing the password or deactivating the user revokes its tokens."""
+        access_token, refresh_token = self.login()
+        self.user.first_name = 'Juan'
+        self.user.save()
+        self.assertEqual(self.members(access_token), (200, 0))
+
+        self.user.set_password('admin456')
+        self.user.save()
+        self.assertEqual(self.members(access_token), (401, 0))
+        self.assertEqual(self.refresh(refresh_token).status_code, 400)
+
+        response = self.client.post('/users/login/', {'email': 'jestrada@mail.com', 'password': 'admin456'})
+        self.assertEqual(self.members(response.data['access_token']), (200, 0))
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.members(response.data['access_token']), (401, 0))
+
+
+class BloomFilterTestCase(SimpleTestCase):
+    """Bloom filter test case."""
+
+    def test_membership(self):
+        """Added keys are always found, others rarely."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'added:{i}')
+        self.assertTrue(all(f'added:{i}' in bloom for i in range(1000)))
+        self.assertLess(sum(f'missing:{i}' in bloom for i in range(10000)), 300)
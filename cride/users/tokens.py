@@ -0,0 +1,90 @@
+"""Users access tokens"""
+
+# Django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Models
+from cride.users.models import User
+
+# Utilities
+from cride.utils.denylist import DenyList
+from uuid import uuid4
+import jwt
+import time
+
+ACCESS = 'access'
+REFRESH = 'refresh'
+
+# User fields carried by the tokens, enough to authenticate without a query.
+CLAIMS = ('id', 'username', 'is_active', 'is_verified', 'is_client')
+
+revoked_tokens = DenyList('users:tokens:revoked')
+
+
+def encode_token(user, token_type, lifetime):
+    """Return a signed token of `token_type` for `user`, valid for `lifetime` seconds."""
+    now = time.time()
+    payload = {
+        'type': token_type,
+        'jti': uuid4().hex,
+        'iat': now,
+        'exp': int(now + lifetime),
+        **{claim: getattr(user, claim) for claim in CLAIMS},
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
+
+
+def issue_tokens(user):
+    """Return a new access and refresh token pair for `user`."""
+    return {
+        'access_token': encode_token(user, ACCESS, settings.ACCESS_TOKEN_LIFETIME),
+        'refresh_token': encode_token(user, REFRESH, settings.REFRESH_TOKEN_LIFETIME),
+    }
+
+
+def decode_token(token, token_type):
+    """
+    Return the payload of a token of `token_type`.
+
+    Raise `jwt.PyJWTError` when it is malformed, forged, expired, of
+    another type or revoked.
+    """
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+    if payload.get('type') != token_type or any(claim not in payload for claim in CLAIMS):
+        raise jwt.InvalidTokenError('Invalid token type.')
+    if is_revoked(payload):
+        raise jwt.InvalidTokenError('Token has been revoked.')
+    return payload
+
+
+def is_revoked(payload):
+    """Return whether the token, or every token of its user, was revoked after it was issued."""
+    for key in (payload['jti'], f'user:{payload["id"]}'):
+        revoked_at = revoked_tokens.get(key)
+        if revoked_at is not None and payload['iat'] <= revoked_at:
+            return True
+    return False
+
+
+def revoke_token(payload):
+    """Revoke a single token. Return False if it was already revoked."""
+    return revoked_tokens.add(payload['jti'], time.time(), payload['exp'], replace=False)
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to a user so far."""
+    now = time.time()
+    revoked_tokens.add(f'user:{user_id}', now, now + settings.REFRESH_TOKEN_LIFETIME)
+
+
+def token_user(payload):
+    """
+    Return the user of a token payload, built from its claims.
+
+    The other fields are deferred: reading one loads it from the
+    database, and saving the user only writes the fields it loaded.
+    """
+    names = {claim: payload[claim] for claim in CLAIMS}
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in names]
+    return User.from_db(DEFAULT_DB_ALIAS, fields, [names[field] for field in fields])
@@ -11,9 +11,10 @@ from cride.users.permissions import IsAccountOwner
 
 # Serializers
 from cride.users.serializers import (UserLoginSerializer, UserModelSerializer, UserSignupSerializer,
-                                     AccountVerificationSerializer)
+                                     AccountVerificationSerializer, TokenRefreshSerializer, LogoutSerializer)
 from cride.circles.serializers import CircleModelSerializer
-from cride.users.serializers import ProfileModelSerializer
+from cride.users.serializers import ProfileModelSerializer, ProfileRatingSerializer
+from cride.utils.serializers import eager_load
 
 # Models
 from cride.users.models import User
@@ -26,7 +27,7 @@ class UserViewSet(mixins.RetrieveModelMixin,
     """
     User view set.
 
-    Handle sign up, login, and account verification.
+    Handle sign up, login, token refresh, logout and account verification.
     """
 
     queryset = User.objects.filter(is_active=True,
@@ -40,7 +41,7 @@ class UserViewSet(mixins.RetrieveModelMixin,
 
         :return:
         """
-        if self.action in ['signup', 'login', 'verify']:
+        if self.action in ['signup', 'login', 'refresh', 'verify']:
             permissions = (AllowAny,)
         elif self.action in ['retrieve', 'update', 'partial_update']:
             permissions = [IsAuthenticated, IsAccountOwner]
@@ -72,15 +73,41 @@ class UserViewSet(mixins.RetrieveModelMixin,
         """
         serializer = UserLoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user, token = serializer.save()
+        user, tokens = serializer.save()
 
         # Serialize response
         data = {
             'user': UserModelSerializer(user).data,
-            'access_token': token
+            **tokens
         }
         return Response(data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'])
+    def refresh(self, request):
+        """
+        Rotate a refresh token into a new token pair.
+
+        :param request:
+        :return:
+        """
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user, tokens = serializer.save()
+        return Response(tokens, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        """
+        Revoke the access token and, if given, the refresh token.
+
+        :param request:
+        :return:
+        """
+        serializer = LogoutSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=['post'])
     def verify(self, request):
         """
@@ -105,8 +132,9 @@ class UserViewSet(mixins.RetrieveModelMixin,
         :return:
         """
         response = super().retrieve(request, *args, **kwargs)
-        circles = Circle.objects.filter(members=request.user,
-                                        membership__is_active=True)
+        circles = eager_load(Circle.objects.filter(members=request.user,
+                                                   membership__is_active=True),
+                             CircleModelSerializer)
         data = {
             'user': response.data,
             'circle': CircleModelSerializer(circles, many=True).data
@@ -136,3 +164,17 @@ class UserViewSet(mixins.RetrieveModelMixin,
         serializer.save()
         data = UserModelSerializer(user).data
         return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['GET'])
+    def ratings(self, request, *args, **kwargs):
+        """
+        Rating distribution of a user.
+
+        :param request:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        user = self.get_object()
+        data = ProfileRatingSerializer(user.profile).data
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,175 @@
+"""Cache utilities"""
+
+# Django
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import Signal
+
+# Utilities
+from collections import OrderedDict
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sent every `report_every` lookups with the cache `namespace` and its `stats`.
+cache_stats = Signal()
+
+
+class TwoTierCache:
+    """
+    Process-local LRU in front of a shared Django cache.
+
+    Lookups are served from the LRU, then from the shared cache, then
+    from the loader, whose result is stored in both tiers. Misses (a
+    loader returning None) are cached too, for `miss_timeout` seconds,
+    so repeated lookups of unknown keys stay cheap.
+
+    `invalidate` drops a key from both tiers and, when the shared cache
+    is django-redis, publishes it so every other process evicts it from
+    its LRU. Local entries expire after `local_timeout` seconds anyway,
+    which bounds staleness when no message gets through.
+    """
+
+    def __init__(self, namespace, maxsize=1024, local_timeout=30, timeout=300, miss_timeout=30,
+                 alias='default', report_every=1000):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.local_timeout = local_timeout
+        self.timeout = timeout
+        self.miss_timeout = miss_timeout
+        self.alias = alias
+        self.report_every = report_every
+        self.channel = f'{namespace}:invalidate'
+
+        self.lock = threading.Lock()
+        self.local = OrderedDict()
+        self.counters = dict.fromkeys(('local_hits', 'shared_hits', 'misses'), 0)
+        self.listener_pid = None
+
+    def get(self, key, load):
+        """Return the value of `key`, calling `load(key)` on a miss of both tiers."""
+        self.listen()
+        now = time.monotonic()
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None and entry[0] > now:
+                self.local.move_to_end(key)
+            else:
+                entry = None
+        if entry is not None:
+            return self.hit('local_hits', entry[1])
+
+        shared = caches[self.alias]
+        cached = shared.get(self.shared_key(key))
+        if cached is not None:
+            self.store_local(key, cached[0])
+            return self.hit('shared_hits', cached[0])
+
+        value = load(key)
+        shared.set(self.shared_key(key), (value,), self.timeout if value is not None else self.miss_timeout)
+        self.store_local(key, value)
+        return self.hit('misses', value)
+
+    def invalidate(self, *keys):
+        """Drop keys from every tier and every process."""
+        caches[self.alias].delete_many([self.shared_key(key) for key in keys])
+        self.evict(*keys)
+        connection = self.redis()
+        if connection is None:
+            return
+        try:
+            for key in keys:
+                connection.publish(self.channel, key)
+        except Exception:
+            logger.warning('Could not publish %s invalidations.', self.namespace, exc_info=True)
+
+    def evict(self, *keys):
+        """Drop keys from the local tier."""
+        with self.lock:
+            for key in keys:
+                self.local.pop(key, None)
+
+    def clear(self):
+        """Drop the local tier and reset the counters."""
+        with self.lock:
+            self.local.clear()
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def stats(self):
+        """Return the lookup counters and hit ratios."""
+        with self.lock:
+            stats = dict(self.counters, size=len(self.local))
+        lookups = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        stats['lookups'] = lookups
+        stats['local_ratio'] = stats['local_hits'] / lookups if lookups else 0.0
+        stats['hit_ratio'] = (stats['local_hits'] + stats['shared_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def shared_key(self, key):
+        """Return the shared cache key of `key`."""
+        return f'{self.namespace}:{key}'
+
+    def store_local(self, key, value):
+        """Store a value in the local tier, evicting the least recently used entry."""
+        timeout = self.local_timeout if value is not None else min(self.local_timeout, self.miss_timeout)
+        with self.lock:
+            self.local[key] = (time.monotonic() + timeout, value)
+            self.local.move_to_end(key)
+            while len(self.local) > self.maxsize:
+                self.local.popitem(last=False)
+
+    def hit(self, counter, value):
+        """Count a lookup, report the stats when due and return `value`."""
+        with self.lock:
+            self.counters[counter] += 1
+            lookups = sum(self.counters.values())
+        if self.report_every and lookups % self.report_every == 0:
+            cache_stats.send(sender=self.__class__, namespace=self.namespace, stats=self.stats())
+        return value
+
+    def redis(self):
+        """Return the redis client behind the shared cache, if it is django-redis."""
+        if not settings.CACHES[self.alias]['BACKEND'].startswith('django_redis.'):
+            return None
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias)
+
+    def listen(self):
+        """
+        Subscribe to invalidations once per process.
+
+        Started lazily so each forked worker runs its own subscriber.
+        """
+        pid = os.getpid()
+        if self.listener_pid == pid:
+            return
+        with self.lock:
+            if self.listener_pid == pid:
+                return
+            self.listener_pid = pid
+            self.local.clear()
+        if self.redis() is None:
+            return
+        threading.Thread(target=self.subscribe, name=f'{self.namespace} invalidations', daemon=True).start()
+
+    def subscribe(self, retry_delay=5):
+        """Evict the keys published by other processes, reconnecting on errors."""
+        while True:
+            try:
+                pubsub = self.redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    data = message['data']
+                    self.evict(data.decode() if isinstance(data, bytes) else data)
+            except Exception:
+                logger.warning('Lost %s invalidations channel.', self.namespace, exc_info=True)
+                self.clear_local()
+                time.sleep(retry_delay)
+
+    def clear_local(self):
+        """Drop the local tier, keeping the counters."""
+        with self.lock:
+            self.local.clear()
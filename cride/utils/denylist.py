@@ -0,0 +1,203 @@
+"""Deny-list utilities"""
+
+# Django
+from django.conf import settings
+from django.core.cache import caches
+
+# Utilities
+from hashlib import blake2b
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size set of strings answering "maybe" or "no".
+
+    Never forgets a key it was given; reports a key it was not given
+    with probability about `error_rate` while it holds no more than
+    `capacity` keys.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        """Yield the bits of `key`, by double hashing a single digest."""
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & 1 << (position & 7) for position in self.positions(key))
+
+
+class DenyList:
+    """
+    Process-local Bloom filter of denied keys, synced from Redis.
+
+    Each denied key carries a value stored in the shared cache until the
+    key expires. Lookups of keys that were never denied, the common case,
+    are answered by the filter alone with no I/O; the rare positives are
+    confirmed against the shared cache, so a false positive never denies
+    anything.
+
+    When the shared cache is django-redis, denied keys are also kept in a
+    sorted set scored by expiry and published as they are added: every
+    process adds published keys to its filter right away and rebuilds the
+    filter from the set every `sync_interval` seconds, which drops expired
+    keys and catches any message it missed. Without Redis only keys denied
+    in this process reach its filter, which is enough for the single
+    process local and test setups.
+    """
+
+    def __init__(self, namespace, capacity=100000, error_rate=0.001, sync_interval=60, alias='default'):
+        self.namespace = namespace
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.alias = alias
+        self.key = f'{namespace}:keys'
+        self.channel = f'{namespace}:added'
+
+        self.lock = threading.Lock()
+        self.filter = BloomFilter(capacity, error_rate)
+        self.recent = None
+        self.next_sync = 0
+        self.listener_pid = None
+
+    def get(self, key):
+        """Return the value `key` was denied with, or None."""
+        self.sync_if_due()
+        if key not in self.filter:
+            return None
+        return caches[self.alias].get(self.shared_key(key))
+
+    def add(self, key, value, expires_at, replace=True):
+        """
+        Deny `key` with `value` until the `expires_at` timestamp.
+
+        With `replace=False` a key that is already denied is left alone
+        and False is returned, which makes the first caller win.
+        """
+        timeout = max(math.ceil(expires_at - time.time()), 1)
+        shared = caches[self.alias]
+        if replace:
+            shared.set(self.shared_key(key), value, timeout)
+        elif not shared.add(self.shared_key(key), value, timeout):
+            return False
+        self.remember(key)
+
+        connection = self.redis()
+        if connection is not None:
+            try:
+                pipeline = connection.pipeline()
+                pipeline.zadd(self.key, {key: expires_at})
+                pipeline.publish(self.channel, key)
+                pipeline.execute()
+            except Exception:
+                logger.warning('Could not publish %s key.', self.namespace, exc_info=True)
+        return True
+
+    def remember(self, key):
+        """Add `key` to the local filter, and to the one being rebuilt."""
+        with self.lock:
+            self.filter.add(key)
+            if self.recent is not None:
+                self.recent.append(key)
+
+    def clear(self):
+        """Drop the local filter."""
+        with self.lock:
+            self.filter = BloomFilter(self.capacity, self.error_rate)
+            self.next_sync = 0
+
+    def shared_key(self, key):
+        """Return the shared cache key of `key`."""
+        return f'{self.namespace}:{key}'
+
+    def redis(self):
+        """Return the redis client behind the shared cache, if it is django-redis."""
+        if not settings.CACHES[self.alias]['BACKEND'].startswith('django_redis.'):
+            return None
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias)
+
+    def sync_if_due(self):
+        """Rebuild the filter from Redis every `sync_interval` seconds."""
+        now = time.monotonic()
+        if now < self.next_sync:
+            return
+        with self.lock:
+            if now < self.next_sync:
+                return
+            self.next_sync = now + self.sync_interval
+            self.recent = []
+        try:
+            self.listen()
+            self.sync()
+        finally:
+            with self.lock:
+                self.recent = None
+
+    def sync(self):
+        """Replace the filter with one holding the unexpired keys kept in Redis."""
+        connection = self.redis()
+        if connection is None:
+            return
+        try:
+            now = time.time()
+            connection.zremrangebyscore(self.key, '-inf', now)
+            keys = connection.zrangebyscore(self.key, now, '+inf')
+        except Exception:
+            logger.warning('Could not sync %s keys.', self.namespace, exc_info=True)
+            return
+
+        rebuilt = BloomFilter(max(self.capacity, 2 * len(keys)), self.error_rate)
+        for key in keys:
+            rebuilt.add(key.decode() if isinstance(key, bytes) else key)
+        with self.lock:
+            for key in self.recent:
+                rebuilt.add(key)
+            self.filter = rebuilt
+
+    def listen(self):
+        """
+        Subscribe to added keys once per process.
+
+        Started lazily so each forked worker runs its own subscriber.
+        """
+        pid = os.getpid()
+        if self.listener_pid == pid or self.redis() is None:
+            return
+        self.listener_pid = pid
+        threading.Thread(target=self.subscribe, name=f'{self.namespace} keys', daemon=True).start()
+
+    def subscribe(self, retry_delay=5):
+        """Add the keys published by other processes, reconnecting on errors."""
+        while True:
+            try:
+                pubsub = self.redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    data = message['data']
+                    self.remember(data.decode() if isinstance(data, bytes) else data)
+            except Exception:
+                logger.warning('Lost %s keys channel.', self.namespace, exc_info=True)
+                with self.lock:
+                    self.next_sync = 0
+                time.sleep(retry_delay)
@@ -0,0 +1,80 @@
+"""Export utilities"""
+
+# Django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Django REST Framework
+from rest_framework.exceptions import ValidationError
+
+# Utilities
+from datetime import date, time
+import csv
+import json
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_FORMAT_PARAM = 'type'
+
+
+class Echo:
+    """File-like object handing back whatever is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    """Yield the header and the rows as CSV lines."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if isinstance(value, (date, time)) else value
+            for value in row
+        ])
+
+
+def ndjson_lines(columns, rows):
+    """Yield the rows as JSON objects, one per line."""
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def chunks(lines, size):
+    """Join lines in chunks of `size` so the response isn't written line by line."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def export_format(request):
+    """Return the export format requested with `?type=`, csv by default."""
+    file_format = request.query_params.get(EXPORT_FORMAT_PARAM, 'csv')
+    if file_format not in EXPORT_FORMATS:
+        raise ValidationError({EXPORT_FORMAT_PARAM: f'Choose one of {", ".join(EXPORT_FORMATS)}.'})
+    return file_format
+
+
+def export_response(queryset, columns, filename, file_format='csv', chunk_size=2000):
+    """
+    Stream `queryset` as a CSV or NDJSON attachment.
+
+    `columns` maps the exported column names to `values()` lookups. Rows
+    are read with `iterator(chunk_size)` as the response is sent, so only
+    one chunk is ever held in memory however large the queryset.
+    """
+    lookups = list(columns.values())
+    rows = queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+    lines = (csv_lines if file_format == 'csv' else ndjson_lines)(list(columns), rows)
+
+    response = StreamingHttpResponse(chunks(lines, chunk_size), content_type=EXPORT_FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
@@ -0,0 +1,124 @@
+"""Geospatial utilities"""
+
+# Utilities
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_PRECISION = 12
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode a coordinate as a geohash.
+
+    Geohashes sharing a prefix lie in the same grid cell, so a
+    B-tree index over them can answer "which points fall in this
+    cell" with a range scan.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    char = 0
+    bit = 0
+    even = True
+
+    while len(geohash) < precision:
+        interval, value = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        char <<= 1
+        if value >= middle:
+            char |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            geohash.append(GEOHASH_ALPHABET[char])
+            char = 0
+            bit = 0
+
+    return ''.join(geohash)
+
+
+def cell_size(precision):
+    """Return the (height, width) in degrees of a geohash cell."""
+    bits = 5 * precision
+    lat_bits = bits // 2
+    lng_bits = bits - lat_bits
+    return 180 / 2 ** lat_bits, 360 / 2 ** lng_bits
+
+
+def covering_cells(latitude, longitude, radius):
+    """
+    Return the geohash prefixes covering a circle of `radius` km.
+
+    Picks the finest precision whose cells are at least as large as the
+    radius, so the cell holding the center plus its eight neighbours
+    always contain the whole circle.
+    """
+    lng_scale = max(math.cos(math.radians(latitude)), 1e-6)
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height * KM_PER_DEGREE >= radius and width * KM_PER_DEGREE * lng_scale >= radius:
+            precision = candidate
+            break
+
+    height, width = cell_size(precision)
+    cells = set()
+    for lat_offset in (-height, 0, height):
+        for lng_offset in (-width, 0, width):
+            lat = min(max(latitude + lat_offset, -90.0), 90.0)
+            lng = (longitude + lng_offset + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
+
+
+def prefix_range(prefix):
+    """
+    Return the [start, end) bounds of the geohashes starting with `prefix`.
+
+    Range lookups use a plain B-tree index on every backend, unlike
+    `LIKE 'prefix%'` which needs a pattern operator class.
+    """
+    for position in range(len(prefix) - 1, -1, -1):
+        index = GEOHASH_ALPHABET.index(prefix[position])
+        if index < len(GEOHASH_ALPHABET) - 1:
+            return prefix, prefix[:position] + GEOHASH_ALPHABET[index + 1]
+    return prefix, None
+
+
+def covering_ranges(latitude, longitude, radius):
+    """Return the merged geohash ranges covering a circle of `radius` km."""
+    ranges = []
+    for cell in covering_cells(latitude, longitude, radius):
+        start, end = prefix_range(cell)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Return the great-circle distance in km between two coordinates."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def parse_point(value):
+    """
+    Parse a `lat,lng` string.
+
+    Raise ValueError when the value is malformed or out of range.
+    """
+    latitude, longitude = (float(part) for part in value.split(','))
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError('Coordinates out of range.')
+    return latitude, longitude
@@ -0,0 +1,108 @@
+"""Leaderboard utilities"""
+
+# Django
+from django.conf import settings
+
+# Utilities
+from itertools import islice
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Leaderboard:
+    """
+    Ranking of integer ids kept in a Redis sorted set.
+
+    Lookups are O(log n) whatever the size of the ranking. Ids missing
+    from the set score 0, so only ids with a score need to be stored.
+    Ranks are competition ranks: ids with the same score share a rank.
+
+    Only available when the `alias` cache is django-redis; `available`
+    is False otherwise and callers rank from the database instead.
+    Redis errors are logged and swallowed like the cache's own, so a
+    ranking can drift until it is rebuilt but requests never fail.
+    """
+
+    def __init__(self, key, alias='default'):
+        self.key = key
+        self.alias = alias
+
+    @property
+    def available(self):
+        """Return whether the rankings are served by Redis."""
+        return settings.CACHES[self.alias]['BACKEND'].startswith('django_redis.')
+
+    def redis(self):
+        """Return the redis client behind the cache."""
+        from django_redis import get_redis_connection
+        return get_redis_connection(self.alias)
+
+    def increment(self, member, amount):
+        """Add `amount` to the score of `member`."""
+        self.execute('increment', lambda redis: redis.zincrby(self.key, amount, member))
+
+    def set(self, member, score):
+        """Set the score of `member`, dropping it when the score is 0."""
+        if score:
+            self.execute('set', lambda redis: redis.zadd(self.key, {member: score}))
+        else:
+            self.remove(member)
+
+    def remove(self, member):
+        """Drop `member` from the ranking."""
+        self.execute('remove', lambda redis: redis.zrem(self.key, member))
+
+    def top(self, count):
+        """Return the `(member, score, rank)` of the `count` best ranked members."""
+        entries = self.execute('top', lambda redis: redis.zrevrange(self.key, 0, count - 1, withscores=True)) or []
+        ranking = []
+        for position, (member, score) in enumerate(entries):
+            score = int(score)
+            rank = ranking[-1][2] if ranking and ranking[-1][1] == score else position + 1
+            ranking.append((int(member), score, rank))
+        return ranking
+
+    def rank(self, member):
+        """Return the `(score, rank)` of `member`."""
+        def lookup(redis):
+            score = int(redis.zscore(self.key, member) or 0)
+            return score, redis.zcount(self.key, f'({score}', '+inf') + 1
+        return self.execute('rank', lookup) or (0, None)
+
+    def replace(self, scores, batch_size=1000):
+        """
+        Replace the ranking with the `(member, score)` pairs of `scores`.
+
+        The new ranking is written to a temporary key and renamed over
+        the old one, so readers never see it half built.
+        """
+        building = f'{self.key}:rebuild'
+        scores = iter(scores)
+
+        def write(redis):
+            redis.delete(building)
+            written = 0
+            while True:
+                chunk = list(islice(scores, batch_size))
+                if not chunk:
+                    break
+                batch = {member: score for member, score in chunk if score}
+                if batch:
+                    redis.zadd(building, batch)
+                    written += len(batch)
+            if written:
+                redis.rename(building, self.key)
+            else:
+                redis.delete(self.key)
+            return written
+
+        return self.execute('replace', write) or 0
+
+    def execute(self, operation, command):
+        """Run `command` against Redis, logging failures."""
+        try:
+            return command(self.redis())
+        except Exception:
+            logger.warning('Leaderboard %s failed on %s.', operation, self.key, exc_info=True)
+            return None
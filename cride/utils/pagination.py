@@ -0,0 +1,189 @@
+"""Pagination utilities"""
+
+# Django
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# Django REST Framework
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Utilities
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import date, time
+from functools import reduce
+import json
+import operator
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over the view's default ordering.
+
+    The keyset is the view's `ordering` followed by the primary key, and
+    each page is fetched with a `(keyset) > (last row)` condition instead
+    of an OFFSET, so a page costs the same however deep the client
+    scrolls. `?count=false` skips the `COUNT(*)` query.
+
+    Requests ordered by anything else (an explicit `?ordering=`, a search
+    rank, a distance) are paginated with LimitOffsetPagination instead.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.fallback = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return a page of results, or None if pagination is disabled."""
+        ordering = tuple(getattr(view, 'ordering', None) or ())
+        if not ordering or tuple(queryset.query.order_by) != ordering:
+            self.fallback = LimitOffsetPagination()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.keyset = ordering + ('pk',)
+        self.page_size = self.get_page_size(request)
+        self.count = queryset.count() if self.include_count(request) else None
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position, reverse))
+
+        ordering = [self.reverse_ordering(field) for field in self.keyset] if reverse else self.keyset
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        """Return the page with its navigation links."""
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        """Return the requested page size, capped at `max_page_size`."""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def include_count(self, request):
+        """Return whether the total count was requested."""
+        return request.query_params.get(self.count_query_param, 'true').lower() not in ('0', 'false')
+
+    def get_next_link(self):
+        """Return the link to the page after the last result."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        """Return the link to the page before the first result."""
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        """Return the current url pointing at the given row."""
+        position = [getattr(instance, self.field_name(field)) for field in self.keyset]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, default=self.serialize)
+        cursor = urlsafe_b64encode(payload.encode()).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'offset')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        """Return the (position, reverse) pair encoded in the request cursor."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['p']
+            if len(values) != len(self.keyset):
+                raise ValueError
+            position = [
+                self.get_field(model, field).to_python(value)
+                for field, value in zip(self.keyset, values)
+            ]
+            reverse = bool(payload.get('r'))
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def keyset_filter(self, position, reverse):
+        """
+        Return the condition selecting rows after (or before) `position`.
+
+        Expands the row comparison `(a, b, c) > (x, y, z)` into
+        `a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)` and
+        adds `a >= x` so the leading column drives an index range scan.
+        """
+        conditions = []
+        for index, field in enumerate(self.keyset):
+            equal = {self.field_name(previous): position[i] for i, previous in enumerate(self.keyset[:index])}
+            lookup = self.comparison(field, reverse)
+            conditions.append(Q(**equal, **{f'{self.field_name(field)}__{lookup}': position[index]}))
+
+        leading = self.keyset[0]
+        bound = 'gte' if self.comparison(leading, reverse) == 'gt' else 'lte'
+        return Q(**{f'{self.field_name(leading)}__{bound}': position[0]}) & reduce(operator.or_, conditions)
+
+    @staticmethod
+    def serialize(value):
+        """Encode keyset values JSON can't represent, keeping full precision."""
+        if isinstance(value, (date, time)):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def comparison(field, reverse):
+        """Return the lookup that moves forward along `field`."""
+        descending = field.startswith('-')
+        return 'lt' if descending ^ reverse else 'gt'
+
+    @staticmethod
+    def reverse_ordering(field):
+        """Flip the direction of an ordering term."""
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def field_name(field):
+        """Strip the direction from an ordering term."""
+        return field.lstrip('-')
+
+    def get_field(self, model, field):
+        """Return the model field behind an ordering term."""
+        name = self.field_name(field)
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
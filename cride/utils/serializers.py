@@ -0,0 +1,195 @@
+"""Serializers utilities"""
+
+# Django
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+# Django REST Framework
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def field_tree(value):
+    """Turn `a,b.c,b.d` into `{'a': {}, 'b': {'c': {}, 'd': {}}}`."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def read_request(context):
+    """Return the request of a serializer context if it only reads, else None."""
+    request = (context or {}).get('request')
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    return request
+
+
+class DynamicFieldsMixin:
+    """
+    Let clients pick the fields a model serializer renders.
+
+    `?fields=name,user.username` renders only the listed fields, dotted
+    paths reaching into nested serializers; a nested serializer listed
+    without subfields renders its default fields. Fields listed in
+    `Meta.expandable_fields` are left out unless named in `?fields=` or
+    `?expand=`. Only read requests are trimmed.
+
+    `eager_load` builds the queryset from the same fields, so fields left
+    out aren't fetched or computed. `Meta.field_columns` maps the fields
+    rendered from properties to the columns they read.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expanded = self.field_selection()
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        for name in list(fields):
+            if selected is not None and name not in selected:
+                del fields[name]
+            elif name in expandable and name not in expanded and name not in (selected or {}):
+                del fields[name]
+
+        for name, field in fields.items():
+            child = getattr(field, 'child', field)
+            if isinstance(child, DynamicFieldsMixin):
+                child.selection = ((selected or {}).get(name) or None, expanded.get(name, {}))
+        return fields
+
+    def field_selection(self):
+        """Return the `(fields, expand)` trees picked for this serializer."""
+        selection = getattr(self, 'selection', None)
+        if selection is not None:
+            return selection
+        request = read_request(self.context)
+        if request is None:
+            return None, {}
+        fields = request.query_params.get(FIELDS_PARAM)
+        return field_tree(fields) if fields else None, field_tree(request.query_params.get(EXPAND_PARAM, ''))
+
+
+def eager_load(queryset, serializer_class, context=None, required=()):
+    """
+    Load everything `serializer_class` renders along with the queryset.
+
+    Walks the serializer's field tree: forward foreign keys and one to one
+    relations become `select_related`, reverse and many to many relations
+    become `prefetch_related`, and nested serializers are followed
+    recursively so rendering a page costs a fixed number of queries.
+
+    Serializers can define a `setup_queryset(queryset)` method to
+    annotate the rows they render; relations rendered by them are
+    prefetched with that queryset instead of joined.
+
+    Given the `context` of a read request, only the fields picked by the
+    request are walked and the rows are trimmed with `only()` to the
+    columns they read, plus the `required` ones.
+    """
+    serializer = serializer_class(context=context or {})
+    return _eager_load(queryset, serializer, read_request(context) is not None, required)
+
+
+def _eager_load(queryset, serializer, trim, required=()):
+    """Eager load the relations of a serializer instance, trimming the columns if `trim`."""
+    setup_queryset = getattr(serializer, 'setup_queryset', None)
+    if setup_queryset is not None:
+        queryset = setup_queryset(queryset)
+
+    select_related = []
+    prefetch_related = []
+    only = _columns(serializer, queryset.model) if trim else None
+    if only is not None:
+        only.update(required)
+    _collect(serializer, queryset.model, '', select_related, prefetch_related, only, trim)
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if only is not None:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+def _columns(serializer, model):
+    """Return the columns of `model` read to render `serializer`, or None when unknown."""
+    declared = getattr(getattr(serializer, 'Meta', None), 'field_columns', {})
+    columns = {model._meta.pk.name}
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in declared:
+            columns.update(declared[name])
+            continue
+        if field.source == '*':
+            return None
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            return None
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(model_field.name)
+    return columns
+
+
+def _collect(serializer, model, prefix, select_related, prefetch_related, only=None, trim=False):
+    """
+    Gather the related lookups needed to render `serializer`.
+
+    Columns of joined relations are added to `only` as they are found.
+    """
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        many = isinstance(field, (ListSerializer, ManyRelatedField))
+        child = getattr(field, 'child', None) or getattr(field, 'child_relation', None) or field
+        nested = isinstance(child, BaseSerializer)
+        if not nested and not isinstance(child, RelatedField):
+            continue
+        if isinstance(child, PrimaryKeyRelatedField) and not many:
+            # Rendered from the local `<field>_id` column.
+            continue
+
+        name = field.source_attrs[0]
+        try:
+            relation = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if not relation.is_relation:
+            continue
+
+        lookup = prefix + name
+        related_model = relation.related_model
+        single = relation.many_to_one or relation.one_to_one
+        custom = nested and hasattr(child, 'setup_queryset')
+
+        if only is not None and relation.concrete and not relation.many_to_many:
+            only.add(lookup)
+
+        if single and not custom:
+            select_related.append(lookup)
+            if nested:
+                columns = _columns(child, related_model) if only is not None else None
+                if columns is not None:
+                    only.update(f'{lookup}__{column}' for column in columns)
+                _collect(child, related_model, f'{lookup}__', select_related, prefetch_related,
+                         only if columns is not None else None, trim)
+            continue
+
+        if nested:
+            # Reverse relations are matched to their rows through the remote key.
+            reverse = relation.one_to_many or (relation.one_to_one and not relation.concrete)
+            remote = (relation.field.name,) if reverse else ()
+            related_queryset = _eager_load(related_model._default_manager.all(), child, trim, remote)
+        elif isinstance(child, PrimaryKeyRelatedField):
+            related_queryset = related_model._default_manager.only('pk')
+        else:
+            related_queryset = related_model._default_manager.all()
+        prefetch_related.append(Prefetch(lookup, queryset=related_queryset))